@@ -0,0 +1,93 @@
+import datetime
+import itertools
+import sys
+import threading
+from collections import deque
+
+# Records kept in memory; at one capture every 5 s this is about 14 hours of activity
+MAX_RECORDS = 10000
+
+
+class ActivityRecord:
+    """One screen capture: epoch-second timestamp, interned window title, OCR text and typing flag."""
+
+    __slots__ = ("seq", "timestamp", "window_title", "content", "typing")
+
+    def __init__(self, seq, timestamp, window_title, content, typing):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.window_title = window_title
+        self.content = content
+        self.typing = typing
+
+    @property
+    def captured_at(self):
+        return datetime.datetime.fromtimestamp(self.timestamp)
+
+
+class ActivityView:
+    """A cycle's slice of the shared log, referenced by sequence numbers instead of copied."""
+
+    __slots__ = ("log", "start", "end")
+
+    def __init__(self, log, start, end):
+        self.log = log
+        self.start = start
+        self.end = end
+
+    def __iter__(self):
+        return iter(self.log.between(self.start, self.end))
+
+    def __len__(self):
+        return len(self.log.between(self.start, self.end))
+
+    def tail(self, count):
+        """The newest `count` records of the slice."""
+        return self.log.between(max(self.start, self.end - count), self.end)
+
+
+class ActivityLog:
+    """Bounded ring buffer of screen activity shared by every cycle of a session.
+
+    Repeated window titles are interned and text identical to the previous record shares its
+    string, so a static screen costs one small record per capture.
+    """
+
+    def __init__(self, max_records=MAX_RECORDS):
+        self.records = deque(maxlen=max_records)
+        self.next_seq = 0
+        self.lock = threading.Lock()
+
+    def append(self, timestamp, content, window_title="Unknown", typing=False):
+        if isinstance(timestamp, datetime.datetime):
+            timestamp = timestamp.timestamp()
+        with self.lock:
+            if self.records:
+                previous = self.records[-1].content
+                if content is previous or content == previous:
+                    content = previous
+            self.records.append(ActivityRecord(self.next_seq, int(timestamp), sys.intern(window_title), content,
+                                               bool(typing)))
+            self.next_seq += 1
+
+    def mark(self):
+        """Sequence number the next record will get; use it to delimit a cycle."""
+        return self.next_seq
+
+    def between(self, start, end=None):
+        """Records with start <= seq < end that are still in the buffer, as a list."""
+        with self.lock:
+            if not self.records:
+                return []
+            first = self.records[0].seq
+            end = self.next_seq if end is None else end
+            return list(itertools.islice(self.records, max(0, start - first), max(0, end - first)))
+
+    def view(self, start, end=None):
+        return ActivityView(self, start, self.next_seq if end is None else end)
+
+    def __iter__(self):
+        return iter(self.between(0))
+
+    def __len__(self):
+        return len(self.records)
@@ -0,0 +1,104 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Columnar copy of the session log: per-session arrays plus per-task lookups, indexed by task code
+History = namedtuple("History", ["task_names", "task_codes", "completed", "durations", "study_seconds"])
+
+TaskStats = namedtuple("TaskStats", ["task", "attempts", "completed", "completion_rate", "mean", "median", "p90",
+                                     "estimate_error", "estimate_ratio"])
+
+
+def load_history(store):
+    """Reads the whole session log into NumPy arrays in one pass."""
+    rows = store.session_history()
+    count = len(rows)
+    index = {}  # Task name -> code, in order of first appearance
+    task_codes = np.fromiter((index.setdefault(row[0], len(index)) for row in rows), dtype=np.intp, count=count)
+    task_names = np.array(list(index), dtype=object)
+    completed = np.fromiter((row[1] == "completed" for row in rows), dtype=bool, count=count)
+    durations = np.fromiter((row[2] for row in rows), dtype=np.float64, count=count)
+
+    # Planned study time per task (minutes in the store), NaN where it was never recorded
+    planned = store.study_times()
+    study_seconds = np.array([planned.get(name) for name in task_names], dtype=np.float64) * 60
+    return History(task_names, task_codes, completed, durations, study_seconds)
+
+
+def _group_quantiles(codes, values, groups, quantiles):
+    """Per-group quantiles (linear interpolation) of `values`, NaN for empty groups: shape (groups, quantiles)."""
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    counts = np.bincount(codes, minlength=groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = np.full((groups, len(quantiles)), np.nan)
+    present = counts > 0
+    for column, q in enumerate(quantiles):
+        position = starts[present] + q * (counts[present] - 1)
+        low = np.floor(position).astype(np.intp)
+        high = np.ceil(position).astype(np.intp)
+        fraction = position - low
+        result[present, column] = sorted_values[low] + (sorted_values[high] - sorted_values[low]) * fraction
+    return result
+
+
+def task_stats(history):
+    """Per-task attempt counts, completion rate and completed-duration stats, all as vectorized group-bys.
+
+    estimate_error is the mean of (actual - planned study time) in seconds over completed sessions and
+    estimate_ratio the mean actual over planned; both are NaN for tasks without a planned time.
+    """
+    groups = len(history.task_names)
+    if not groups:
+        return []
+    codes = history.task_codes
+    attempts = np.bincount(codes, minlength=groups)
+    done_codes = codes[history.completed]
+    done_durations = history.durations[history.completed]
+    completed = np.bincount(done_codes, minlength=groups)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(done_codes, weights=done_durations, minlength=groups) / completed
+        planned = history.study_seconds
+        estimate_error = mean - planned
+        estimate_ratio = mean / planned
+    median, p90 = _group_quantiles(done_codes, done_durations, groups, (0.5, 0.9)).T
+
+    return [TaskStats(*row) for row in zip(history.task_names.tolist(), attempts.tolist(), completed.tolist(),
+                                           (completed / attempts).tolist(), mean.tolist(), median.tolist(),
+                                           p90.tolist(), estimate_error.tolist(), estimate_ratio.tolist())]
+
+
+def window_focus(windows, seconds):
+    """Total focus seconds per window from (window, seconds) pairs, longest first."""
+    if not windows:
+        return []
+    names, codes = np.unique(np.array(windows, dtype=object), return_inverse=True)
+    seconds = np.bincount(codes, weights=np.asarray(seconds, dtype=np.float64))
+    order = np.argsort(-seconds, kind="stable")
+    return list(zip(names[order].tolist(), seconds[order].tolist()))
+
+
+def _minutes(seconds):
+    return "n/a" if seconds != seconds else f"{seconds / 60:.1f} min"  # NaN check
+
+
+def describe(row):
+    """Report lines for one task's stats."""
+    lines = [f"  Completed: {row.completed} of {row.attempts} attempts ({row.completion_rate:.0%})"]
+    if row.completed:
+        lines.append(f"  Actual Time: mean {_minutes(row.mean)}, median {_minutes(row.median)}, "
+                     f"p90 {_minutes(row.p90)}")
+    if row.estimate_error == row.estimate_error:
+        lines.append(f"  Versus Planned: {row.estimate_error / 60:+.1f} min ({row.estimate_ratio:.0%} of plan)")
+    return lines
+
+
+def format_task_stats(stats, tasks=None):
+    """Readable report for `stats`, optionally limited to the task names in `tasks` (a set)."""
+    lines = []
+    for row in stats:
+        if tasks is None or row.task in tasks:
+            lines.append(f"\n{row.task}:")
+            lines.extend(describe(row))
+    return "\n".join(lines)
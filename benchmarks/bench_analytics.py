@@ -0,0 +1,60 @@
+"""Analytics benchmark: load years of simulated session history and compute per-task stats.
+
+    python benchmarks/bench_analytics.py --years 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import analytics  # noqa: E402
+import session_store  # noqa: E402
+from session_engine import simulate_sessions  # noqa: E402
+
+
+def fill_store(store, days, tasks_per_day, distinct_tasks, seed):
+    """Writes simulated task attempts straight into the store, renaming tasks to spread them over a catalog."""
+    rows = simulate_sessions(days, tasks_per_day, seed=seed)
+    with store.lock, store.conn:
+        store.conn.executemany(
+            "INSERT OR IGNORE INTO tasks (name, study_time, break_time, long_break_time) VALUES (?, ?, ?, ?)",
+            [(f"task-{i}", 25, 5, 15) for i in range(distinct_tasks)])
+        store.conn.executemany(
+            "INSERT INTO sessions (task, status, duration, logged_at) VALUES (?, ?, ?, '2024-01-01 00:00:00')",
+            [(f"task-{(index * 7919) % distinct_tasks}", status, duration)
+             for index, (_, status, duration, *_) in enumerate(rows)])
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--tasks-per-day", type=int, default=8)
+    parser.add_argument("--distinct-tasks", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = session_store.SessionStore(os.path.join(directory, "sessions.db"))
+        sessions = fill_store(store, int(args.years * 365), args.tasks_per_day, args.distinct_tasks, args.seed)
+
+        start = time.perf_counter()
+        history = analytics.load_history(store)
+        loaded = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats = analytics.task_stats(history)
+        computed = time.perf_counter() - start
+        store.close()
+
+    print(f"{sessions} sessions over {args.years:g} years, {len(stats)} tasks")
+    print(f"  load_history: {loaded * 1000:.1f} ms")
+    print(f"  task_stats:   {computed * 1000:.1f} ms")
+    print(f"  total:        {(loaded + computed) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Task classifier benchmark: lemma-table fast mode vs spaCy, speed and agreement over a corpus.
+
+    python benchmarks/bench_classifier.py [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import build_lemma_table  # noqa: E402
+import model_registry  # noqa: E402
+import task_classifier  # noqa: E402
+
+
+def bench_table(keys, repeat):
+    # The path the app runs in fast mode, with the cache cleared so every name is classified
+    start = time.perf_counter()
+    for _ in range(repeat):
+        task_classifier.clear_cache()
+        results = task_classifier.classify_task_types(keys, fast=True)
+    elapsed = time.perf_counter() - start
+    return results, len(keys) * repeat / elapsed
+
+
+def bench_spacy(keys):
+    nlp = model_registry.get("spacy")
+    start = time.perf_counter()
+    docs = list(nlp.pipe(keys, batch_size=task_classifier.BATCH_SIZE))
+    elapsed = time.perf_counter() - start
+    return [task_classifier.type_from_lemmas(token.lemma_ for token in doc) for doc in docs], len(keys) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=build_lemma_table.CORPUS_PATH)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    keys = [task_classifier.normalize(name) for name in build_lemma_table.read_corpus(args.corpus)]
+
+    start = time.perf_counter()
+    task_classifier.load_lemma_table()
+    print(f"Lemma table loads in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    fast, rate = bench_table(keys, args.repeat)
+    print(f"Fast mode: {rate:,.0f} names/s over {len(keys)} names")
+
+    try:
+        start = time.perf_counter()
+        model_registry.get("spacy")
+    except Exception as e:
+        print(f"spaCy unavailable, skipping comparison: {e}")
+        return
+    print(f"spaCy loads in {time.perf_counter() - start:.2f} s")
+    expected, rate = bench_spacy(keys)
+    print(f"spaCy nlp.pipe: {rate:,.0f} names/s")
+
+    differences = [(key, a, b) for key, a, b in zip(keys, fast, expected) if a != b]
+    for key, a, b in differences:
+        print(f"  {key!r}: fast={a} spacy={b}")
+    print(f"Agreement: {len(keys) - len(differences)}/{len(keys)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""OCR text filtering benchmark: clean_ocr_text / score_lines throughput in MB/s of OCR text.
+
+    python benchmarks/bench_ocr_text.py [--frame-kb 40] [--frames 200]
+
+Uses the cached word list (or NLTK) when available, otherwise a synthetic vocabulary.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import model_registry  # noqa: E402
+import ocr_text  # noqa: E402
+
+PROSE = ("the session notes describe how each study block went and which tasks were finished before the "
+         "break while reading chapter three of the course about data structures and their analysis").split()
+CODE = ("def __init__(self, path=None): return {k: v for k, v in items()} # TODO: fix -> x[i] += 1; "
+        "0x3f @@ -12,7 +12,9 @@ import os, sys; print(f'{n:>8}') == != <= >= && || ::").split()
+
+
+def reference_clean(text):
+    # The filter as it was: two uncompiled passes over the whole frame
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,!?-]', '', text)
+    return text.strip()
+
+
+def reference_comprehensible(text, english_words):
+    words_in_text = reference_clean(text).split()
+    word_count = sum(1 for word in words_in_text if word.lower() in english_words)
+    return word_count / len(words_in_text) > 0.5 if words_in_text else False
+
+
+def make_frame(rng, size, prose_share):
+    """About `size` characters of OCR-like text: lines of prose or code tokens."""
+    lines, length = [], 0
+    while length < size:
+        source = PROSE if rng.random() < prose_share else CODE
+        line = " ".join(rng.choice(source) for _ in range(rng.randint(4, 14)))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def score_frame(frame):
+    """The English-majority decision as FrameGate makes it, from score_lines over the frame's lines."""
+    _, english, total = ocr_text.score_lines(frame.splitlines())
+    return english / total > 0.5 if total else False
+
+
+def english_words():
+    try:
+        return model_registry.get("english_words")
+    except Exception as e:
+        print(f"Word list unavailable ({e}); using a synthetic vocabulary")
+        vocabulary = frozenset(PROSE)
+        model_registry.register("english_words", lambda: vocabulary)
+        return model_registry.get("english_words")
+
+
+def throughput(function, frames):
+    size = sum(len(frame.encode()) for frame in frames)
+    start = time.perf_counter()
+    results = [function(frame) for frame in frames]
+    return results, size / (time.perf_counter() - start) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frame-kb", type=float, default=40)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    words = english_words()
+    print(f"Word list: {len(words)} words, loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = random.Random(args.seed)
+    for label, prose_share in (("prose", 0.9), ("code", 0.1), ("mixed", 0.5)):
+        frames = [make_frame(rng, int(args.frame_kb * 1024), prose_share) for _ in range(args.frames)]
+        cleaned, old_clean = throughput(reference_clean, frames)
+        new_cleaned, new_clean = throughput(ocr_text.clean_ocr_text, frames)
+        expected, old_score = throughput(lambda frame: reference_comprehensible(frame, words), frames)
+        decided, new_score = throughput(score_frame, frames)
+        assert new_cleaned == cleaned and decided == expected, "results differ from the reference filter"
+        print(f"{label:>5}: clean {old_clean:6.1f} -> {new_clean:6.1f} MB/s, "
+              f"clean+score {old_score:6.1f} -> {new_score:6.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
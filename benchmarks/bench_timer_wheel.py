@@ -0,0 +1,123 @@
+"""Timer wheel benchmark: insert/cancel cost, virtual-time throughput and idle CPU with many sessions.
+
+    python benchmarks/bench_timer_wheel.py --sessions 100000 --idle-seconds 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from timer_wheel import Scheduler, TimerWheel  # noqa: E402
+
+# Phase lengths drawn for each simulated session, in seconds (study times and breaks)
+PHASES = (5 * 60, 10 * 60, 15 * 60, 25 * 60, 45 * 60, 50 * 60)
+
+
+def bench_insert_cancel(sessions, rng):
+    wheel = TimerWheel()
+    deadlines = [rng.choice(PHASES) + rng.random() for _ in range(sessions)]
+
+    start = time.perf_counter()
+    timers = [wheel.schedule(deadline, None) for deadline in deadlines]
+    insert = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for timer in timers[::10]:
+        wheel.cancel(timer)
+    cancel = time.perf_counter() - start
+    return {
+        "insert_us": insert / sessions * 1e6,
+        "cancel_us": cancel / len(timers[::10]) * 1e6,
+    }
+
+
+def bench_virtual_time(sessions, rng, hours=1):
+    """Every session starts its next phase when its timer fires; time jumps from deadline to deadline."""
+    wheel = TimerWheel()
+    now = [0.0]
+    fired = 0
+
+    def switch():
+        wheel.schedule(now[0] + rng.choice(PHASES), switch)
+
+    for _ in range(sessions):
+        wheel.schedule(rng.choice(PHASES) * rng.random(), switch)
+
+    start = time.perf_counter()
+    end = hours * 3600
+    while now[0] < end:
+        now[0] = min(end, wheel.next_deadline())
+        for timer in wheel.advance(now[0]):
+            timer.callback()
+            fired += 1
+    elapsed = time.perf_counter() - start
+    return {"virtual_hours": hours, "phase_switches": fired, "switches_per_s": fired / elapsed,
+            "seconds": elapsed}
+
+
+async def _idle(sessions, seconds, rng):
+    scheduler = Scheduler()
+    scheduler.start()
+    now = scheduler.time()
+    # Deadlines all lie beyond the measurement window, as they would between phase changes
+    for _ in range(sessions):
+        scheduler.call_at(now + seconds + rng.choice(PHASES), lambda: None)
+    await asyncio.sleep(0)
+
+    wakeups = scheduler.wakeups
+    cpu = time.process_time()
+    await asyncio.sleep(seconds)
+    cpu = time.process_time() - cpu
+    scheduler.stop()
+    return {"idle_seconds": seconds, "cpu_seconds": cpu, "cpu_percent": cpu / seconds * 100,
+            "wakeups": scheduler.wakeups - wakeups}
+
+
+async def _per_session_ticks(sessions, seconds):
+    """Baseline: every session re-arms its own one-second `after`-style tick."""
+    loop = asyncio.get_running_loop()
+    stop = loop.time() + seconds
+
+    def tick():
+        if loop.time() < stop:
+            loop.call_later(1, tick)
+
+    for _ in range(sessions):
+        loop.call_later(1, tick)
+    cpu = time.process_time()
+    await asyncio.sleep(seconds + 0.5)
+    cpu = time.process_time() - cpu
+    return {"idle_seconds": seconds, "cpu_seconds": cpu, "cpu_percent": cpu / seconds * 100}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    parser.add_argument("--baseline", action="store_true", help="Also time one tick chain per session")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    result = bench_insert_cancel(args.sessions, rng)
+    print(f"{args.sessions} timers: insert {result['insert_us']:.2f} us, cancel {result['cancel_us']:.2f} us")
+
+    result = bench_virtual_time(args.sessions, rng)
+    print(f"{result['virtual_hours']} virtual hour(s): {result['phase_switches']} phase switches in "
+          f"{result['seconds']:.2f}s ({result['switches_per_s']:.0f}/s)")
+
+    result = asyncio.run(_idle(args.sessions, args.idle_seconds, rng))
+    print(f"Idle with {args.sessions} sessions on the wheel: {result['cpu_percent']:.2f}% CPU, "
+          f"{result['wakeups']} wakeups in {result['idle_seconds']:.0f}s")
+
+    if args.baseline:
+        result = asyncio.run(_per_session_ticks(args.sessions, args.idle_seconds))
+        print(f"Idle with one tick chain per session: {result['cpu_percent']:.2f}% CPU")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,518 @@
+"""Headless benchmark suite for the app's hot paths; each run writes a JSON file to compare commits with.
+
+    python benchmarks/run_all.py [--quick] [--only PATTERN] [--output FILE]
+    python benchmarks/run_all.py --compare OLD.json NEW.json [--threshold 1.10]
+
+By default results go to benchmarks/results/<commit>.json. Nothing needs a display: Tk is never
+started (DeadlineTimer runs on FakeTk and GUI functions get their message boxes patched), and
+pyautogui is replaced by a mock when DISPLAY is unset. Benchmarks whose dependencies are missing
+are recorded as skipped, with the reason; any other error is recorded as failed and makes the run
+exit non-zero. Everything runs in a temporary working directory, so
+the databases and caches the app creates there never touch real ones. Fixtures are synthetic and
+seeded, so two runs on one machine measure the same work.
+"""
+import argparse
+import asyncio
+import datetime
+import fnmatch
+import heapq
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from unittest import mock
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# (name, function, {param: (full values, quick values)}), in the order they run
+BENCHMARKS = []
+
+
+def benchmark(name, **params):
+    def register(function):
+        BENCHMARKS.append((name, function, params))
+        return function
+    return register
+
+
+def summarize(samples, unit_scale=1000):
+    """Stats of per-call timings in seconds, reported in milliseconds."""
+    ordered = sorted(samples)
+    return {"median_ms": statistics.median(ordered) * unit_scale, "min_ms": ordered[0] * unit_scale,
+            "p90_ms": ordered[int(0.9 * (len(ordered) - 1))] * unit_scale, "samples": len(ordered)}
+
+
+def measure(function, repeat, warmup=1):
+    for _ in range(warmup):
+        function()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def import_headless(name):
+    """Imports a GUI module without a display: pyautogui is mocked when DISPLAY is unset."""
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        sys.modules.setdefault("pyautogui", mock.MagicMock(name="pyautogui"))
+    return __import__(name)
+
+
+def fill_history(store, sessions, distinct_tasks=500, seed=0):
+    """Writes `sessions` synthetic attempts over `distinct_tasks` tasks straight into the store."""
+    rng = random.Random(seed)
+    with store.lock, store.conn:
+        store.conn.executemany(
+            "INSERT OR IGNORE INTO tasks (name, study_time, break_time, long_break_time) VALUES (?, ?, ?, ?)",
+            [(f"task-{i}", rng.choice((25, 30, 45, 50)), 5, 15) for i in range(distinct_tasks)])
+        store.conn.executemany(
+            "INSERT INTO sessions (task, status, duration, logged_at) VALUES (?, ?, ?, '2024-01-01 00:00:00')",
+            ((f"task-{rng.randrange(distinct_tasks)}", "completed" if rng.random() < 0.7 else "not_completed",
+              rng.randint(300, 3600)) for _ in range(sessions)))
+
+
+class FakeTk:
+    """Just enough of Tk's `after` scheduling to drive DeadlineTimer on a real clock, without a display."""
+
+    def __init__(self):
+        self.queue = []
+        self.ids = itertools.count()
+        self.cancelled = set()
+
+    def after(self, ms, callback, *args):
+        after_id = next(self.ids)
+        heapq.heappush(self.queue, (time.monotonic() + ms / 1000, after_id, callback, args))
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.cancelled.add(after_id)
+
+    def run(self, until):
+        """Runs callbacks in due order until `until()` is true or nothing is scheduled."""
+        while self.queue and not until():
+            due, after_id, callback, args = heapq.heappop(self.queue)
+            if after_id in self.cancelled:
+                continue
+            time.sleep(max(0.0, due - time.monotonic()))
+            callback(*args)
+
+
+# ========================== BENCHMARKS ==========================
+
+@benchmark("predict_time")
+def bench_predict_time(quick):
+    import recommender
+    import task_types
+    import trainer
+    import model_registry
+    recommender.publish(recommender.NumpyRecommender.initialize(trainer.TYPE_LAYER_SIZES, seed=0),
+                        trainer.TYPE_MODEL_PREFIX)
+    model_registry.replace("type_recommender", recommender.load_published(trainer.TYPE_MODEL_PREFIX))
+    types = list(task_types.DEFAULT_TASK_TIMES)
+
+    def cold():
+        task_types.prediction_cache.clear()
+        for task_type in types:
+            task_types.predict_time(task_type)
+
+    repeat = 50 if quick else 500
+    return {"cold": measure(cold, repeat), "cached": measure(lambda: task_types.predict_time(types[0]), repeat)}
+
+
+@benchmark("recommend_minutes", tasks=((1, 100, 1000), (1, 100)))
+def bench_recommend(quick, tasks):
+    import recommender
+    import session_store
+    import trainer
+    store = session_store.SessionStore(f"recommend-{tasks}.db")
+    fill_history(store, 1000, distinct_tasks=max(tasks, 10))
+    model = recommender.NumpyRecommender.initialize(seed=0)
+    names = [f"task-{i}" for i in range(tasks)]
+    try:
+        return {"call": measure(lambda: trainer.recommend_minutes(store, model, names), 20 if quick else 100)}
+    finally:
+        store.close()
+
+
+@benchmark("log_session", history=((0, 10000, 100000, 1000000), (0, 10000, 100000)))
+def bench_log_session(quick, history):
+    """What main.py's log_task does per finished task, against a store already holding `history` sessions."""
+    import session_store
+    store = session_store.SessionStore(f"log-{history}.db")
+    fill_history(store, history)
+    settings = {"study_time": 25, "break_time": 5, "long_break_time": 15, "cycles": 4}
+    counter = itertools.count()
+
+    def log():
+        store.log_session(f"task-{next(counter) % 600}", "completed", 1500, settings)
+
+    try:
+        return {"call": measure(log, 100 if quick else 500)}
+    finally:
+        store.close()
+
+
+@benchmark("classify_task_types", backend=(("table", "spacy"), ("table",)))
+def bench_classify(quick, backend):
+    import build_lemma_table
+    import task_classifier
+    names = build_lemma_table.read_corpus(build_lemma_table.CORPUS_PATH)
+    fast = backend == "table"
+
+    def classify():
+        task_classifier.clear_cache()
+        task_classifier.classify_task_types(names, fast=fast)
+
+    uncached = measure(classify, 5 if quick or not fast else 50)
+    task_classifier.classify_task_types(names, fast=fast)
+    cached = measure(lambda: task_classifier.classify_task_types(names, fast=fast), 20 if quick else 200)
+    return {"uncached": uncached, "cached": cached,
+            "uncached_names_per_s": len(names) / (uncached["median_ms"] / 1000),
+            "cached_names_per_s": len(names) / (cached["median_ms"] / 1000)}
+
+
+@benchmark("ocr_text_filter", content=(("prose", "code", "mixed"), ("mixed",)))
+def bench_ocr_text(quick, content):
+    import bench_ocr_text
+    import ocr_text
+    bench_ocr_text.english_words()
+    rng = random.Random(0)
+    frames = [bench_ocr_text.make_frame(rng, 40 * 1024, {"prose": 0.9, "code": 0.1, "mixed": 0.5}[content])
+              for _ in range(20 if quick else 100)]
+    _, clean = bench_ocr_text.throughput(ocr_text.clean_ocr_text, frames)
+    _, score = bench_ocr_text.throughput(bench_ocr_text.score_frame, frames)
+    return {"clean_mb_per_s": clean, "clean_and_score_mb_per_s": score}
+
+
+def _sample_frames(count, rng):
+    """Screen-sized frames of text lines: each one unchanged, scrolled by a few lines, or a new screen."""
+    from PIL import Image, ImageDraw
+    width, height, line_height = 1920, 1080, 24
+    words = "study notes chapter function return value session summary focus task break timer".split()
+
+    def screen(lines):
+        image = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(image)
+        for row, line in enumerate(lines):
+            draw.text((20, row * line_height), line, fill="black")
+        return image
+
+    def text_line():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(4, 16)))
+
+    lines = [text_line() for _ in range(height // line_height)]
+    frames = []
+    for index in range(count):
+        kind = ("same", "scroll", "new")[index % 3] if index else "new"
+        if kind == "scroll":
+            lines = lines[3:] + [text_line() for _ in range(3)]
+        elif kind == "new":
+            lines = [text_line() for _ in range(height // line_height)]
+        frames.append((kind, screen(lines)))
+    return frames
+
+
+@benchmark("analyze_screenshot")
+def bench_analyze_screenshot(quick):
+    """FrameGate.process on sample frames, as analyze_screenshot runs it; real Tesseract only if installed."""
+    import bench_ocr_text
+    import ocr_cache
+    import ocr_text
+    ocr_pipeline = import_headless("ocr_pipeline")
+    bench_ocr_text.english_words()
+    rng = random.Random(0)
+    frames = _sample_frames(9 if quick else 30, rng)
+    if shutil.which("tesseract"):
+        ocr, ocr_name = ocr_pipeline.ocr_lines, "tesseract"
+    else:
+        def ocr(crop):
+            # Stand-in for Tesseract: one line per 24 px, so stitching and scoring see realistic volumes
+            return [(y + 12, "study notes chapter function return value") for y in range(0, crop.size[1], 24)]
+        ocr_name = "synthetic"
+
+    cache = ocr_cache.OcrCache("bench_ocr_cache.db")
+    gate = ocr_pipeline.FrameGate(cache=cache, scorer=ocr_text.score_lines)
+    samples = {"same": [], "scroll": [], "new": []}
+    try:
+        for kind, frame in frames:
+            start = time.perf_counter()
+            gate.process(ocr_pipeline.prepare_frame(frame), ocr=ocr)
+            samples[kind].append(time.perf_counter() - start)
+    finally:
+        cache.close()
+    result = {kind: summarize(values) for kind, values in samples.items() if values}
+    result["ocr"] = ocr_name
+    return result
+
+
+def _activity_log(records, rng):
+    import activity_log
+    log = activity_log.ActivityLog(max_records=records)
+    windows = [f"Window {i}" for i in range(12)]
+    words = "study notes chapter function return value session summary focus task break timer".split()
+    start = 1_700_000_000
+    for index in range(records):
+        content = "\n".join(" ".join(rng.choice(words) for _ in range(8)) for _ in range(rng.randint(1, 6)))
+        log.append(start + index * 5, content, rng.choice(windows), rng.random() < 0.3)
+    return log
+
+
+@benchmark("session_summary", records=((1000, 10000, 100000), (1000, 10000)))
+def bench_session_summary(quick, records):
+    """Per-cycle digests, the merged prompt and (when scratch_1 imports) generate_structured_summary."""
+    import summary_digest
+    rng = random.Random(0)
+    log = _activity_log(records, rng)
+    cycles = 8
+    per_cycle = records // cycles
+
+    def digest():
+        session = summary_digest.SessionDigest()
+        for cycle in range(cycles):
+            session.add_cycle(f"task-{cycle}", 1500, log.view(cycle * per_cycle, (cycle + 1) * per_cycle))
+        return session
+
+    repeat = 3 if quick else 10
+    session = digest()
+    result = {"digest_cycles": measure(digest, repeat), "prompt": measure(session.prompt, repeat * 5)}
+    try:
+        scratch_1 = import_headless("scratch_1")
+    except ImportError as e:
+        result["structured_summary"] = {"skipped": f"scratch_1 unavailable: {e}"}
+    else:
+        result["structured_summary"] = measure(lambda: scratch_1.generate_structured_summary(session), repeat * 5)
+    return result
+
+
+@benchmark("show_analytics", history=((1000, 100000, 1000000), (1000, 100000)))
+def bench_show_analytics(quick, history):
+    """main.py's end-of-session report against the session history, with the message box patched out."""
+    main = import_headless("main")
+    import session_store
+    store = session_store.SessionStore(f"analytics-{history}.db")
+    fill_history(store, history)
+    app = mock.Mock(completed_tasks={f"task-{i}" for i in range(0, 500, 5)})
+    try:
+        with mock.patch.object(main, "store", store), mock.patch.object(main.messagebox, "showinfo"):
+            return {"call": measure(lambda: main.PomodoroApp.show_analytics(app), 3 if quick else 10)}
+    finally:
+        store.close()
+
+
+@benchmark("deadline_timer_drift", load=((0.0, 0.6, 0.9), (0.6,)))
+def bench_deadline_timer(quick, load):
+    """A DeadlineTimer countdown on an event loop kept `load` busy by other callbacks, plus stalls."""
+    from timer_engine import DeadlineTimer
+    root = FakeTk()
+    seconds = 2 if quick else 5
+    ticks, expired = [], []
+    timer = DeadlineTimer(root, lambda shown: ticks.append((shown, time.monotonic())),
+                          lambda: expired.append(time.monotonic()))
+
+    period = 0.05
+    rng = random.Random(0)
+
+    def busy():
+        # Keep the loop `load` busy on average, with an occasional 300 ms stall like a slow redraw
+        stall = 0.3 if rng.random() < 0.02 else period * load
+        end = time.perf_counter() + stall
+        while time.perf_counter() < end:
+            pass
+        root.after(int(period * 1000), busy)
+
+    if load:
+        root.after(0, busy)
+    start = time.monotonic()
+    timer.start(seconds)
+    root.run(until=lambda: bool(expired))
+    # A tick showing n seconds is due when n seconds remain
+    lags = [at - (start + seconds - shown) for shown, at in ticks]
+    return {"expire_late_ms": (expired[0] - start - seconds) * 1000, "max_tick_lag_ms": max(lags) * 1000,
+            "ticks": len(ticks)}
+
+
+@benchmark("scheduler_lateness", timers=((1000, 10000), (1000,)))
+def bench_scheduler(quick, timers):
+    """timer_wheel.Scheduler deadlines on an asyncio loop with a coroutine blocking it 60% of the time."""
+    from timer_wheel import Scheduler
+    spread = 1.0 if quick else 3.0
+
+    async def run():
+        scheduler = Scheduler()
+        scheduler.start()
+        rng = random.Random(0)
+        loop = asyncio.get_running_loop()
+        lateness = []
+        now = scheduler.time()
+        for _ in range(timers):
+            deadline = now + rng.random() * spread
+            scheduler.call_at(deadline, lambda deadline=deadline: lateness.append(loop.time() - deadline))
+
+        async def load():
+            while len(lateness) < timers:
+                end = time.perf_counter() + 0.03
+                while time.perf_counter() < end:
+                    pass
+                await asyncio.sleep(0.02)
+
+        await load()
+        scheduler.stop()
+        return lateness
+
+    lateness = sorted(asyncio.run(run()))
+    return {"median_late_ms": statistics.median(lateness) * 1000,
+            "p99_late_ms": lateness[int(0.99 * (len(lateness) - 1))] * 1000, "max_late_ms": lateness[-1] * 1000}
+
+
+# ========================== RUNNER ==========================
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(quick, pattern):
+    results = []
+    for name, function, params in BENCHMARKS:
+        if pattern and not fnmatch.fnmatch(name, pattern):
+            continue
+        names = list(params)
+        values = [params[param][1 if quick else 0] for param in names]
+        for combination in itertools.product(*values):
+            combination = dict(zip(names, combination))
+            label = name + "".join(f" {key}={value}" for key, value in combination.items())
+            entry = {"name": name, "params": combination}
+            start = time.perf_counter()
+            try:
+                entry["result"] = function(quick, **combination)
+            except ImportError as e:
+                entry["skipped"] = f"missing dependency: {e}"
+            except Exception as e:
+                entry["failed"] = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+            entry["wall_seconds"] = time.perf_counter() - start
+            if "result" in entry:
+                print(f"{label}: {format_result(entry['result'])}", flush=True)
+            else:
+                print(f"{label}: {'skipped' if 'skipped' in entry else 'FAILED'}: "
+                      f"{entry.get('skipped') or entry['failed']}", flush=True)
+            results.append(entry)
+    return results
+
+
+def format_result(result):
+    parts = []
+    for key, value in result.items():
+        if isinstance(value, dict):
+            shown = value.get("median_ms")
+            parts.append(f"{key} {shown:.3f} ms" if shown is not None else f"{key} {value}")
+        elif isinstance(value, float):
+            parts.append(f"{key} {value:.3f}")
+        else:
+            parts.append(f"{key} {value}")
+    return ", ".join(parts)
+
+
+def flatten(result, prefix=""):
+    """{'cold': {'median_ms': 1.0}, 'ocr': 'x'} -> {'cold.median_ms': 1.0}; only numbers, no sample counts."""
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and key != "samples":
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(old_path, new_path, threshold):
+    """Prints metric ratios between two runs; returns the number of regressions beyond `threshold`."""
+    with open(old_path) as file:
+        old = json.load(file)
+    with open(new_path) as file:
+        new = json.load(file)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+
+    def index(run):
+        return {(entry["name"], json.dumps(entry["params"], sort_keys=True)): flatten(entry["result"])
+                for entry in run["results"] if "result" in entry}
+
+    old_results, new_results = index(old), index(new)
+    regressions = 0
+    for key in new_results:
+        if key not in old_results:
+            continue
+        name, params = key
+        for metric, value in new_results[key].items():
+            before = old_results[key].get(metric)
+            # Ratios of lateness near zero (or of tick counts) say nothing about speed
+            if before is None or before <= 0 or value <= 0 or metric.endswith("ticks"):
+                continue
+            # Rates (..._per_s) are better when higher; times are better when lower
+            ratio = before / value if metric.endswith("_per_s") else value / before
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{name} {params} {metric}: {before:.4g} -> {value:.4g} ({ratio:.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smaller fixtures and fewer repeats")
+    parser.add_argument("--only", help="run benchmarks whose name matches this glob")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=1.10, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    commit = git_commit()
+    output = os.path.abspath(args.output or os.path.join(RESULTS_DIR, f"{commit}.json"))
+    meta = {"commit": commit, "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "quick": args.quick}
+
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            results = run(args.quick, args.only)
+        finally:
+            os.chdir(previous)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump({"meta": meta, "results": results}, file, indent=2)
+    print(f"Wrote {output}")
+    failed = [entry["name"] for entry in results if "failed" in entry]
+    if failed:
+        print(f"{len(failed)} benchmark(s) failed: {', '.join(sorted(set(failed)))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Regenerates task_lemmas.json from spaCy, for task_classifier's fast mode.
+
+    python build_lemma_table.py [--corpus benchmarks/task_names.txt] [--check]
+
+Every inflection of the keyword lemmas, plus every word of the corpus, is lemmatized in a few
+contexts. Forms that always map to the same task type go into "forms"; forms whose lemma depends
+on context (e.g. "reading" as a verb or a noun) go into "ambiguous" with the type spaCy usually gives
+them at the start of a name and elsewhere, and the next words ("list" in "reading list") that
+override that.
+--check then compares the fast and spaCy classifiers over the corpus and lists any differences.
+"""
+import argparse
+import json
+import os
+import re
+from collections import Counter, defaultdict
+
+import model_registry
+import task_classifier
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "task_names.txt")
+
+# Short task-like contexts each candidate form is lemmatized in
+TEMPLATES = ("{}", "{} notes", "{} the report", "{} for the exam", "start {}", "the {}", "finish {} chapter 3")
+
+IRREGULAR = {"read": ["read"], "build": ["built"], "write": ["wrote", "written"], "learn": ["learnt"]}
+
+
+def inflections(lemma):
+    stem = lemma[:-1] if lemma.endswith("e") else lemma
+    if lemma.endswith("y"):
+        forms = [lemma, lemma[:-1] + "ies", lemma[:-1] + "ied", lemma + "ing"]
+    elif lemma.endswith(("ch", "sh", "s", "x")):
+        forms = [lemma, lemma + "es", lemma + "ed", lemma + "ing"]
+    else:
+        forms = [lemma, lemma + "s", stem + "ed", stem + "ing"]
+    return forms + IRREGULAR.get(lemma, [])
+
+
+def read_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def _majority(counts):
+    return counts.most_common(1)[0][0] if counts else None
+
+
+def build_table(nlp, corpus):
+    candidates = set()
+    for lemma in task_classifier.LEARNING_LEMMAS | task_classifier.CREATIVE_LEMMAS:
+        candidates.update(inflections(lemma))
+
+    observed = defaultdict(Counter)  # Word form -> Counter of task types (None = no keyword)
+    positions = defaultdict(lambda: {"first": Counter(), "other": Counter()})  # ... split by where it stood
+    following = defaultdict(lambda: defaultdict(Counter))  # ... split by the word after it
+    texts = [template.format(form) for form in sorted(candidates) for template in TEMPLATES]
+    texts += [task_classifier.normalize(name) for name in corpus]
+    for doc in nlp.pipe(texts, batch_size=task_classifier.BATCH_SIZE):
+        for token in doc:
+            word = token.lower_
+            task_type = task_classifier.type_from_lemmas([token.lemma_])
+            task_type = None if task_type == task_classifier.DEFAULT_TYPE else task_type
+            observed[word][task_type] += 1
+            positions[word]["first" if token.i == 0 else "other"][task_type] += 1
+            if token.i + 1 < len(doc):
+                following[word][doc[token.i + 1].lower_][task_type] += 1
+
+    forms, ambiguous = {}, {}
+    for word, counts in sorted(observed.items()):
+        if not re.fullmatch(r"[a-z]+", word) or set(counts) == {None}:
+            continue
+        if len(counts) == 1:
+            forms[word] = next(iter(counts))
+            continue
+        usual = _majority(counts)
+        first = _majority(positions[word]["first"]) if positions[word]["first"] else usual
+        other = _majority(positions[word]["other"]) if positions[word]["other"] else usual
+        # Next words that always give the form one reading, where it differs from the positional rule
+        before = {next_word: next(iter(types)) for next_word, types in sorted(following[word].items())
+                  if len(types) == 1 and not next(iter(types)) == first == other}
+        ambiguous[word] = {"first": first, "other": other, "before": before}
+    return {"model": nlp.meta.get("name", "en_core_web_sm"), "forms": forms, "ambiguous": ambiguous}
+
+
+def check(corpus, path):
+    """Names the table alone classifies differently from spaCy."""
+    table = task_classifier.load_lemma_table(path)
+    nlp = model_registry.get("spacy")
+    keys = [task_classifier.normalize(name) for name in corpus]
+    differences = []
+    for key, doc in zip(keys, nlp.pipe(keys, batch_size=task_classifier.BATCH_SIZE)):
+        expected = task_classifier.type_from_lemmas(token.lemma_ for token in doc)
+        fast = task_classifier.classify_with_table(key, table)
+        if fast != expected:
+            differences.append((key, fast, expected))
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate the lemma table used by the fast task classifier.")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--output", default=task_classifier.LEMMA_TABLE_PATH)
+    parser.add_argument("--check", action="store_true", help="Compare fast and spaCy results over the corpus")
+    args = parser.parse_args()
+
+    corpus = read_corpus(args.corpus)
+    table = build_table(model_registry.get("spacy"), corpus)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(table, f, indent=2, sort_keys=True)
+    print(f"Wrote {len(table['forms'])} forms and {len(table['ambiguous'])} ambiguous forms to {args.output}")
+
+    if args.check:
+        differences = check(corpus, args.output)
+        for key, fast, expected in differences:
+            print(f"  {key!r}: fast={fast} spacy={expected}")
+        print(f"{len(corpus) - len(differences)}/{len(corpus)} task names classified the same")
+        # Kept in the table, so the parity it was generated with travels with it
+        table["check"] = {"corpus": len(corpus), "agree": len(corpus) - len(differences)}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(table, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
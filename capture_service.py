@@ -0,0 +1,262 @@
+import getpass
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+STOPPED = "stopped"
+RUNNING = "running"
+PAUSED = "paused"
+
+# Share of one core the tracker (capture thread plus OCR worker processes) may use on average
+CPU_BUDGET = float(os.environ.get("POMODORO_CAPTURE_CPU", "10"))
+# Seconds of history behind the frames-per-minute and CPU metrics
+METRICS_WINDOW = 60.0
+
+
+def _processes_cpu_seconds(pids):
+    """CPU time used so far by the processes `pids`, 0 without psutil."""
+    try:
+        import psutil
+    except ImportError:
+        return 0.0
+    total = 0.0
+    for pid in pids:
+        try:
+            times = psutil.Process(pid).cpu_times()
+        except psutil.Error:
+            continue
+        total += times.user + times.system
+    return total
+
+
+class AdaptiveCadence:
+    """Chooses the next capture interval from how much the screen changes and what capturing costs.
+
+    A foreground-window switch or a frame with at least `busy_change` of its bands changed drops
+    to `min_interval`; unchanged frames back off by `backoff` up to `max_interval`. On top of that
+    the interval never goes below the measured CPU seconds per frame divided by the CPU budget.
+    Only the capture thread and the processes `worker_pids()` lists (the OCR pool) count as its cost,
+    not other children such as a training worker.
+    """
+
+    def __init__(self, min_interval, max_interval, cpu_budget=CPU_BUDGET, backoff=1.5, busy_change=0.25,
+                 window_probe=None, worker_pids=None):
+        if cpu_budget <= 0:
+            raise ValueError(f"cpu_budget must be positive, got {cpu_budget}")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cpu_budget = cpu_budget
+        self.backoff = backoff
+        self.busy_change = busy_change
+        self.window_probe = window_probe  # Returns the foreground window's title, if the platform can tell
+        self.worker_pids = worker_pids  # Returns the pids of the processes OCRing captured frames
+        self.interval = min_interval
+        self.cost = 0.0  # Smoothed CPU seconds per frame
+        self.window = None
+        self.window_switches = 0
+        self.samples = deque()  # (monotonic time, CPU seconds) per frame inside METRICS_WINDOW
+
+    def window_changed(self):
+        if self.window_probe is None:
+            return False
+        try:
+            window = self.window_probe()
+        except Exception:
+            return False
+        changed = self.window is not None and window != self.window
+        self.window = window
+        self.window_switches += changed
+        return changed
+
+    def worker_cpu_seconds(self):
+        return _processes_cpu_seconds(self.worker_pids()) if self.worker_pids is not None else 0.0
+
+    def observe(self, change, cpu_seconds, now=None):
+        """Records one frame and returns the next interval; `change` is the fraction of the screen that changed."""
+        now = time.monotonic() if now is None else now
+        self.samples.append((now, cpu_seconds))
+        while self.samples[0][0] < now - METRICS_WINDOW:
+            self.samples.popleft()
+        self.cost = cpu_seconds if len(self.samples) == 1 else 0.7 * self.cost + 0.3 * cpu_seconds
+
+        if self.window_changed() or (change is not None and change >= self.busy_change):
+            interval = self.min_interval
+        elif change == 0:
+            interval = self.interval * self.backoff
+        else:
+            interval = self.interval
+        interval = max(interval, self.cost * 100 / self.cpu_budget)
+        self.interval = min(self.max_interval, max(self.min_interval, interval))
+        return self.interval
+
+    def metrics(self, now=None):
+        """Effective frames per minute and the tracker's CPU use (percent of one core) over the last minute."""
+        now = time.monotonic() if now is None else now
+        recent = [(at, cpu) for at, cpu in self.samples if at >= now - METRICS_WINDOW]
+        span = min(METRICS_WINDOW, now - recent[0][0] + self.interval) if recent else METRICS_WINDOW
+        return {"interval": self.interval, "frames_per_minute": len(recent) * 60 / span,
+                "cpu_percent": sum(cpu for _, cpu in recent) * 100 / span, "cpu_per_frame": self.cost,
+                "window_switches": self.window_switches}
+
+
+class UserLock:
+    """Exclusive per-user lock file, so two app instances of the same user never capture at once."""
+
+    def __init__(self, user):
+        self.path = os.path.join(tempfile.gettempdir(), f"pomodoro-capture-{user}.lock")
+        self.file = None
+
+    def acquire(self):
+        if self.file is not None:
+            return True
+        file = open(self.path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            file.close()
+            return False
+        self.file = file
+        return True
+
+    def release(self):
+        if self.file is None:
+            return
+        if os.name == "nt":
+            import msvcrt
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        self.file.close()
+        self.file = None
+
+
+class CaptureService:
+    """One long-lived capture loop with explicit start, pause, resume and stop.
+
+    The loop calls `capture()` every `interval` seconds while running. Every sleep waits on an Event,
+    so a state change takes effect at once instead of after the current interval, and starting an
+    already started service only swaps the callback: there is never more than one loop.
+
+    With a `cadence` (AdaptiveCadence) the interval follows it instead; capture() then returns the
+    fraction of the screen that changed, or None if it doesn't know.
+    """
+
+    def __init__(self, interval, user=None, cadence=None):
+        self.interval = interval
+        self.cadence = cadence
+        self.user = user or getpass.getuser()
+        self.capture = None
+        self.state = STOPPED
+        self.captures = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+        self.user_lock = UserLock(self.user)
+
+    def start(self, capture, interval=None, cadence=None):
+        """Starts (or resumes) capturing with `capture`; False if another process of this user is capturing."""
+        with self.lock:
+            if not self.user_lock.acquire():
+                return False
+            self.capture = capture
+            if interval is not None:
+                self.interval = interval
+            if cadence is not None:
+                self.cadence = cadence
+            self.state = RUNNING
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name=f"capture-{self.user}", daemon=True)
+                self.thread.start()
+            self.wake.set()
+        return True
+
+    def pause(self):
+        self._set_state(PAUSED)
+
+    def resume(self):
+        self._set_state(RUNNING)
+
+    def _set_state(self, state):
+        with self.lock:
+            if self.state != STOPPED:
+                self.state = state
+                self.wake.set()
+
+    def stop(self, timeout=None):
+        """Ends the loop, waiting up to `timeout` seconds for an in-flight capture to finish."""
+        with self.lock:
+            self.state = STOPPED
+            self.wake.set()
+            thread, self.thread = self.thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        with self.lock:
+            if self.thread is None:
+                self.user_lock.release()
+
+    def _run(self):
+        next_capture = time.monotonic()
+        workers_cpu = None
+        while True:
+            with self.lock:
+                state, capture, interval, cadence = self.state, self.capture, self.interval, self.cadence
+                self.wake.clear()
+            if state == STOPPED or self.thread is not threading.current_thread():
+                return
+            if state == PAUSED:
+                self.wake.wait()
+                # Capture straight away on resume, then keep the cadence from there
+                next_capture = time.monotonic()
+                continue
+
+            now = time.monotonic()
+            if now >= next_capture:
+                thread_cpu = time.thread_time()
+                change = None
+                try:
+                    change = capture()
+                    self.captures += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Screen capture failed: {e}")
+                if cadence is not None:
+                    # OCR may run in worker processes after capture() returns; their CPU is charged to the next frame
+                    total = cadence.worker_cpu_seconds()
+                    cpu = time.thread_time() - thread_cpu
+                    if workers_cpu is not None:
+                        cpu += max(0.0, total - workers_cpu)
+                    workers_cpu = total
+                    interval = self.interval = cadence.observe(change, cpu)
+                # Sleep to the next deadline so slow captures don't make the cadence drift
+                next_capture = max(next_capture + interval, time.monotonic())
+            self.wake.wait(max(0.0, next_capture - time.monotonic()))
+
+    def stats(self):
+        stats = {"state": self.state, "captures": self.captures, "errors": self.errors, "interval": self.interval}
+        if self.cadence is not None:
+            stats.update(self.cadence.metrics())
+        return stats
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_service(interval, user=None):
+    """Returns the process's capture service for `user` (default: the logged-in user), creating it once."""
+    user = user or getpass.getuser()
+    with _services_lock:
+        if user not in _services:
+            _services[user] = CaptureService(interval, user)
+        return _services[user]
@@ -0,0 +1,243 @@
+"""Columnar (Parquet) export of sessions, task metadata and screen activity, partitioned by day.
+
+    python columnar_export.py export [--root exports] [--db sessions.db]
+    python columnar_export.py import [--root exports] [--db sessions.db]
+
+Layout under the export root:
+
+    sessions/date=YYYY-MM-DD/part-<first id>.parquet        appended incrementally
+    activity/date=YYYY-MM-DD/part-<ms>-<first seq>.parquet  one file per exported batch
+    tasks/tasks.parquet                                     snapshot, replaced on each export
+
+The date=... directories are Hive-style partitions, so pyarrow.dataset and most query engines can
+prune by day; read() does the same and memory-maps each file it opens.
+"""
+import argparse
+import datetime
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import session_store
+
+# Export at the end of every session if POMODORO_EXPORT_DIR is set
+EXPORT_DIR = os.environ.get("POMODORO_EXPORT_DIR")
+DEFAULT_ROOT = "exports"
+
+SESSIONS = "sessions"
+ACTIVITY = "activity"
+TASKS = "tasks"
+
+# Rows fetched from the store per exported batch
+BATCH_ROWS = 50000
+
+
+def _schemas():
+    import pyarrow as pa
+    # Low-cardinality strings are dictionary-encoded
+    category = pa.dictionary(pa.int32(), pa.string())
+    return {
+        SESSIONS: pa.schema([("id", pa.int64()), ("task", pa.string()), ("status", category),
+                             ("duration", pa.int32()), ("logged_at", pa.timestamp("s"))]),
+        ACTIVITY: pa.schema([("timestamp", pa.timestamp("s")), ("window_title", category),
+                             ("content", pa.string()), ("typing", pa.bool_())]),
+        TASKS: pa.schema([("name", pa.string()), ("task_type", pa.string()), ("study_time", pa.int32()),
+                          ("break_time", pa.int32()), ("long_break_time", pa.int32()), ("cycles", pa.int32()),
+                          ("completed", pa.int32()), ("attempts", pa.int32()), ("total_time", pa.int64()),
+                          ("last_completed", pa.string())]),
+    }
+
+
+def _write_table(table, path):
+    """Writes a Parquet file atomically, so readers never see a partial partition file."""
+    import pyarrow.parquet as pq
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+class ColumnarExporter:
+    """Appends day partitions under `root`; sessions resume from a cursor kept in the session store."""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self.schemas = _schemas()
+
+    def _cursor_key(self):
+        return f"columnar_export_cursor:{os.path.abspath(self.root)}"
+
+    def _partition(self, kind, day):
+        return os.path.join(self.root, kind, f"date={day}")
+
+    def export_sessions(self, store):
+        """Writes sessions logged since the last export, one file per day touched; returns the row count."""
+        import pyarrow as pa
+        exported = 0
+        cursor = int(store.get_meta(self._cursor_key(), 0))
+        while True:
+            rows = store.sessions_since(cursor, BATCH_ROWS)
+            if not rows:
+                return exported
+            by_day = OrderedDict()
+            for row in rows:
+                by_day.setdefault(row[4][:10], []).append(row)
+            for day, day_rows in by_day.items():
+                ids, tasks, statuses, durations, logged_at = zip(*day_rows)
+                table = pa.table([
+                    pa.array(ids, pa.int64()),
+                    pa.array(tasks, pa.string()),
+                    pa.array(statuses, pa.string()).dictionary_encode(),
+                    pa.array(durations, pa.int32()),
+                    pa.array([datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S") for value in logged_at],
+                             pa.timestamp("s")),
+                ], schema=self.schemas[SESSIONS])
+                _write_table(table, os.path.join(self._partition(SESSIONS, day), f"part-{ids[0]}.parquet"))
+            # Advance only after the files are in place; a crash re-exports from the same id and overwrites
+            cursor = rows[-1][0]
+            store.set_meta(self._cursor_key(), cursor)
+            exported += len(rows)
+
+    def export_tasks(self, store):
+        """Replaces the task snapshot: counters and planned times joined with each task's catalog type."""
+        import pyarrow as pa
+        types = {name: task_type for name, task_type, _ in store.catalog()}
+        tasks = store.tasks()
+        schema = self.schemas[TASKS]
+        columns = {field.name: [] for field in schema}
+        for task in tasks:
+            task["task_type"] = types.get(task["name"])
+            for name, values in columns.items():
+                values.append(task.get(name))
+        table = pa.table([pa.array(columns[field.name], field.type) for field in schema], schema=schema)
+        _write_table(table, os.path.join(self.root, TASKS, "tasks.parquet"))
+        return len(tasks)
+
+    def export_activity(self, records):
+        """Writes ActivityRecords (e.g. ActivityLog.between(...)) as day partitions; returns the row count."""
+        import pyarrow as pa
+        by_day = OrderedDict()
+        for record in records:
+            by_day.setdefault(time.strftime("%Y-%m-%d", time.localtime(record.timestamp)), []).append(record)
+        batch = int(time.time() * 1000)
+        schema = self.schemas[ACTIVITY]
+        for day, day_records in by_day.items():
+            table = pa.table([
+                # Timestamps are naive local time, like the sessions' logged_at
+                pa.array([datetime.datetime.fromtimestamp(record.timestamp) for record in day_records],
+                         pa.timestamp("s")),
+                pa.array([record.window_title for record in day_records], pa.string()).dictionary_encode(),
+                pa.array([record.content for record in day_records], pa.string()),
+                pa.array([record.typing for record in day_records], pa.bool_()),
+            ], schema=schema)
+            _write_table(table, os.path.join(self._partition(ACTIVITY, day),
+                                             f"part-{batch}-{day_records[0].seq}.parquet"))
+        return sum(len(day_records) for day_records in by_day.values())
+
+    def export_in_background(self, store, records=()):
+        """Exports new sessions, the task snapshot and `records` on a worker thread, off the UI's."""
+        def run():
+            try:
+                self.export_sessions(store)
+                self.export_tasks(store)
+                self.export_activity(records)
+            except Exception as e:
+                print(f"Columnar export to {self.root} failed: {e}")
+
+        thread = threading.Thread(target=run, name="columnar-export", daemon=True)
+        thread.start()
+        return thread
+
+
+def partitions(root, kind, start=None, end=None):
+    """Files of the day partitions with start <= date <= end (ISO strings, either may be None), oldest first."""
+    directory = os.path.join(root, kind)
+    if not os.path.isdir(directory):
+        return []
+    files = []
+    for name in sorted(os.listdir(directory)):
+        if not name.startswith("date="):
+            continue
+        day = name[len("date="):]
+        if (start is None or day >= start) and (end is None or day <= end):
+            partition = os.path.join(directory, name)
+            files.extend(os.path.join(partition, file) for file in sorted(os.listdir(partition))
+                         if file.endswith(".parquet"))
+    return files
+
+
+def read(root, kind, start=None, end=None, columns=None):
+    """Reads a date range of one kind as a single Arrow table, memory-mapping each file.
+
+    Only the requested columns are decoded, and nothing becomes Python objects unless the caller
+    converts the table (e.g. with to_pandas() or to_pylist()).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    if kind == TASKS:
+        return pq.read_table(os.path.join(root, TASKS, "tasks.parquet"), columns=columns, memory_map=True)
+    files = partitions(root, kind, start, end)
+    if not files:
+        schema = _schemas()[kind]
+        return schema.empty_table() if columns is None else pa.schema([schema.field(c) for c in columns]).empty_table()
+    return pa.concat_tables([pq.read_table(path, columns=columns, memory_map=True) for path in files])
+
+
+def import_sessions(root, store):
+    """Appends exported sessions from the day of the store's latest one on, e.g. to carry history to a new machine.
+
+    Sessions the store already has are skipped, matched on (task, status, duration, logged_at):
+    logged_at only has one-second resolution, so it can't tell sessions apart on its own. Planned
+    times for tasks the store hasn't seen come from the exported task snapshot.
+    """
+    settings = {}
+    if os.path.exists(os.path.join(root, TASKS, "tasks.parquet")):
+        for task in read(root, TASKS).to_pylist():
+            settings[task["name"]] = task
+
+    latest = store.latest_logged_at()
+    start = latest[:10] if latest else None
+    # A multiset, so two identical sessions in one second are matched one for one
+    existing = Counter(store.sessions_logged_since(start)) if start else Counter()
+    table = read(root, SESSIONS, start=start)
+    imported = 0
+    for batch in table.to_batches(BATCH_ROWS):
+        for row in batch.to_pylist():
+            logged_at = row["logged_at"].strftime("%Y-%m-%d %H:%M:%S")
+            key = (row["task"], row["status"], row["duration"], logged_at)
+            if existing[key]:
+                existing[key] -= 1
+                continue
+            store.log_session(row["task"], row["status"], row["duration"], settings.get(row["task"]),
+                              logged_at=logged_at)
+            imported += 1
+    return imported
+
+
+def open_exporter():
+    """Returns a ColumnarExporter if POMODORO_EXPORT_DIR is set, otherwise None."""
+    return ColumnarExporter(EXPORT_DIR) if EXPORT_DIR else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import session history as partitioned Parquet.")
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("--root", default=EXPORT_DIR or DEFAULT_ROOT)
+    parser.add_argument("--db", default=session_store.DB_PATH)
+    args = parser.parse_args()
+
+    store = session_store.open_store(args.db)
+    try:
+        if args.command == "export":
+            exporter = ColumnarExporter(args.root)
+            print(f"Exported {exporter.export_sessions(store)} sessions and {exporter.export_tasks(store)} tasks "
+                  f"to {args.root}")
+        else:
+            print(f"Imported {import_sessions(args.root, store)} sessions from {args.root}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
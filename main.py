@@ -1,39 +1,30 @@
+import model_registry  # Imported first so the startup report measures from process start
 import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog
-import json
-import tensorflow as tf
-import numpy as np
-from datetime import datetime
-import os
+import session_store
+import analytics
+import recommender
+import trainer
+from timer_engine import DeadlineTimer
+from session_engine import PomodoroEngine
 
-# Load or initialize task data
-if os.path.exists("tasks.json"):
-    with open("tasks.json", "r") as file:
-        tasks_data = json.load(file)
-else:
-    tasks_data = {}
+# Open the append-only session store (imports tasks.json on first run)
+store = session_store.open_store()
 
 
-def save_tasks():
-    """Saves tasks data to tasks.json"""
-    with open("tasks.json", "w") as file:
-        json.dump(tasks_data, file, indent=4)
+def load_inference_model():
+    """NumPy forward pass over the published weights, so everyday use doesn't import TensorFlow."""
+    return trainer.load_current_recommender()
 
 
-# Create or load the deep learning model for recommending time
-def create_model():
-    model = tf.keras.Sequential([
-        tf.keras.layers.Dense(32, activation='relu', input_shape=(3,)),
-        tf.keras.layers.Dense(32, activation='relu'),
-        tf.keras.layers.Dense(1, activation='linear')
-    ])
-    model.compile(optimizer='adam', loss='mse')
-    return model
+# Called from the trainer's worker thread when a retrained version has been published
+def on_recommender_published(version):
+    model_registry.replace("recommender", recommender.load_published(trainer.RECOMMENDER_PREFIX)[1])
+    print(f"Model weights published as {recommender.published_path(trainer.RECOMMENDER_PREFIX, version)}")
 
 
-model = create_model()
-if os.path.exists("trained_model_weights.weights.h5"):
-    model.load_weights("trained_model_weights.weights.h5")
+model_registry.register("recommender", load_inference_model)
+recommender_trainer = trainer.BackgroundTrainer(trainer.train_recommender_increment, on_recommender_published)
 
 
 class PomodoroApp:
@@ -42,9 +33,6 @@ class PomodoroApp:
         self.root.title("Pomodoro Clock")
         self.root.attributes('-topmost', True)
 
-        # Initialize model as a class attribute
-        self.model = model
-
         # Initialize variables
         self.break_time = tk.IntVar()
         self.long_break_time = tk.IntVar()
@@ -53,12 +41,13 @@ class PomodoroApp:
         self.timer_label = tk.StringVar(value="00:00")
         self.task_list = []  # List to hold all tasks with time
         self.active_tasks = []  # List to hold active tasks for dropdown
-        self.completed_tasks = []  # Track completed tasks for analytics
-        self.timer = None
+        self.completed_tasks = set()  # Track completed tasks for analytics
+        self.timer = DeadlineTimer(self.root, self.show_time, self.switch_sessions)
         self.time_left = 0
+        self.pause_label = tk.StringVar(value="Pause")
         self.current_cycle = 1
         self.session_type = tk.StringVar(value="Study")
-        self.start_time = None
+        self.engine = None  # Cycle logic lives in the UI-free PomodoroEngine
 
         # Initial setup menu
         self.setup_menu()
@@ -107,21 +96,14 @@ class PomodoroApp:
                                 f"Task '{task_name}' added with AI-recommended time of {recommended_time} minutes.")
             self.task_entry.delete(0, tk.END)
 
+    def recommend_times(self, task_names):
+        """Recommend times for many tasks with one batched forward pass; tasks without data are skipped."""
+        return trainer.recommend_minutes(store, model_registry.get("recommender"), task_names)
+
     def recommend_time(self, task_name):
         """Recommend time for a task based on past data using AI model."""
-        if task_name in tasks_data:
-            # Scale input features to match training scale (e.g., convert to minutes if needed)
-            study_time = tasks_data[task_name]["study_time"] / 60
-            break_time = tasks_data[task_name]["break_time"] / 60
-            long_break_time = tasks_data[task_name]["long_break_time"] / 60
-            features = np.array([[study_time, break_time, long_break_time]])
-
-            # Model prediction and scaling to get output in minutes
-            recommended_time = model.predict(features).item() * 60  # Scale up if needed
-
-            # Ensure the recommended time is reasonable (e.g., at least 1 minute)
-            recommended_time = max(1, int(recommended_time))
-
+        recommended_time = self.recommend_times([task_name]).get(task_name)
+        if recommended_time is not None:
             # Show the recommended time in a message box
             messagebox.showinfo("Recommendation",
                                 f"Recommended time for '{task_name}': {recommended_time} minutes.")
@@ -141,21 +123,25 @@ class PomodoroApp:
             messagebox.showwarning("Incomplete Setup", "Please enter break times.")
             return
 
-        self.load_next_task()
-
-    def load_next_task(self):
-        """Load the next task from the active tasks list."""
-        if not self.active_tasks:
-            self.show_analytics()
-            return
-
-        task_name, task_time = self.active_tasks[0]  # Keep task in list until marked as complete
+        self.engine = PomodoroEngine(self.break_time.get() * 60, self.long_break_time.get() * 60, self.cycles.get(),
+                                     study_time_for=lambda task_name: self.get_study_time(task_name) * 60)
+        self.engine.on("task_started", self.load_next_task)
+        self.engine.on("phase", self.show_session)
+        self.engine.on("task", self.log_task)
+        self.engine.on("finished", self.finish_tasks)
+        for task_name, task_time in self.active_tasks:
+            self.engine.add_task(task_name, task_time * 60)  # Convert minutes to seconds
+        self.engine.start()
+
+    def load_next_task(self, task_name):
+        """Show the timer screen for the task the engine loaded (tasks stay listed until marked complete)."""
         self.current_task.set(task_name)
-        self.time_left = task_time * 60  # Convert minutes to seconds
-        self.current_cycle = 1
-        self.session_type.set("Study")
-        self.start_time = datetime.now()
         self.timer_screen()
+
+    def show_session(self, session_type, duration, cycle):
+        self.session_type.set(session_type)
+        self.current_cycle = cycle
+        self.time_left = duration
         self.update_timer()
 
     def timer_screen(self):
@@ -170,6 +156,7 @@ class PomodoroApp:
                                    *[task[0] for task in self.active_tasks], command=self.change_task)
         task_menu.pack()
 
+        tk.Button(self.root, textvariable=self.pause_label, command=self.toggle_pause).pack()
         tk.Button(self.root, text="End Task", command=self.end_task).pack()
 
     def change_task(self, selected_task):
@@ -177,135 +164,97 @@ class PomodoroApp:
         for task_name, task_time in self.task_list:
             if task_name == selected_task:
                 self.current_task.set(task_name)
-                self.time_left = task_time * 60  # Update time with task's study time
-                self.start_time = datetime.now()  # Reset start time for new task
+                self.engine.change_task(task_name, task_time * 60)  # Restarts study with the task's time
                 break
 
     def end_task(self):
-        if self.timer:
-            self.root.after_cancel(self.timer)
-            self.timer = None
+        self.timer.cancel()
+        self.pause_label.set("Pause")
 
-        end_time = datetime.now()
-        actual_duration = int((end_time - self.start_time).total_seconds())
-
-        if messagebox.askyesno("End Task", f"Did you complete the task '{self.current_task.get()}'?"):
-            self.completed_tasks.append(self.current_task.get())
-            self.log_task(self.current_task.get(), "completed", actual_duration)
+        completed = messagebox.askyesno("End Task", f"Did you complete the task '{self.current_task.get()}'?")
+        if completed:
+            self.completed_tasks.add(self.current_task.get())
             self.active_tasks = [task for task in self.active_tasks if task[0] != self.current_task.get()]
-        else:
-            self.log_task(self.current_task.get(), "not_completed", actual_duration)
+        # The engine logs the attempt (see log_task) and loads the next task or finishes
+        self.engine.end_task(completed)
 
-        if self.active_tasks:
-            self.load_next_task()
-        else:
-            messagebox.showinfo("Pomodoro", "All tasks completed!")
-            self.show_analytics()
-            self.reset_timer()
+    def finish_tasks(self):
+        messagebox.showinfo("Pomodoro", "All tasks completed!")
+        self.show_analytics()
+        self.reset_timer()
 
     def reset_timer(self):
         self.timer_label.set("00:00")
         self.setup_menu()
 
     def update_timer(self):
-        if self.time_left <= 0:
-            self.switch_sessions()
+        """Counts self.time_left down against a monotonic deadline; switch_sessions runs when it expires."""
+        self.pause_label.set("Pause")
+        self.timer.start(self.time_left)
+
+    def show_time(self, remaining):
+        # Called by the timer only when the displayed second changes
+        self.time_left = remaining
+        minutes, seconds = divmod(remaining, 60)
+        self.timer_label.set(f"{minutes:02}:{seconds:02}")
+
+    def toggle_pause(self):
+        if self.timer.paused:
+            self.timer.resume()
+            self.pause_label.set("Pause")
         else:
-            minutes, seconds = divmod(self.time_left, 60)
-            self.timer_label.set(f"{minutes:02}:{seconds:02}")
-            self.time_left -= 1
-            self.timer = self.root.after(1000, self.update_timer)
+            self.timer.pause()
+            self.pause_label.set("Resume")
 
     def switch_sessions(self):
-        if self.session_type.get() == "Study":
-            if self.current_cycle < self.cycles.get():
-                self.time_left = self.break_time.get() * 60
-                self.session_type.set("Short Break")
-                self.current_cycle += 1
-            else:
-                self.time_left = self.long_break_time.get() * 60
-                self.session_type.set("Long Break")
-                self.current_cycle = 1
-        else:
-            self.time_left = self.get_study_time(self.current_task.get()) * 60
-            self.session_type.set("Study")
-        self.update_timer()
+        # Study -> short/long break -> study; the engine reports the new session through show_session
+        self.engine.expire()
 
     def retrain_model(self):
-        X = []
-        y = []
-
-        # Prepare data for training from tasks_data
-        for task_name, data in tasks_data.items():
-            # Ensure we have the necessary data
-            if "time_adjustments" in data and "study_time" in data:
-                # Scale input features for the model
-                features = [data["study_time"] / 60, data["break_time"] / 60, data["long_break_time"] / 60]
-
-                # Add each time adjustment as a separate training example
-                for adjustment in data["time_adjustments"]:
-                    X.append(features)  # Input features
-                    y.append(adjustment / 60)  # Target output (scaled)
-
-        # Train the model if there's enough data
-        if X and y:
-            X = np.array(X)
-            y = np.array(y)
-
-            # Train the model on the prepared data
-            self.model.fit(X, y, epochs=5, verbose=1)  # Set verbose=1 for progress output
-
-            # Save the trained weights to a file
-            self.model.save_weights("trained_model_weights.h5")
-            print("Model weights saved to 'trained_model_weights.h5'")
-        else:
-            print("Not enough data to retrain the model.")
+        """Trains on sessions logged since the last run, in a worker process so the UI never stalls."""
+        recommender_trainer.request()
 
     def log_task(self, task_name, status, actual_duration):
-        if task_name not in tasks_data:
-            tasks_data[task_name] = {
-                "study_time": self.get_study_time(task_name),
-                "break_time": self.break_time.get(),
-                "long_break_time": self.long_break_time.get(),
-                "cycles": self.cycles.get(),
-                "completed": 0,
-                "attempts": 0,
-                "time_adjustments": []  # Ensure time_adjustments is initialized here
-            }
-
-        # Ensure 'time_adjustments' exists for tasks that might not have it
-        if "time_adjustments" not in tasks_data[task_name]:
-            tasks_data[task_name]["time_adjustments"] = []
-
-        tasks_data[task_name]["attempts"] += 1
-        if status == "completed":
-            tasks_data[task_name]["completed"] += 1
-            tasks_data[task_name]["time_adjustments"].append(actual_duration)  # Log actual time spent
-        tasks_data[task_name]["last_completed"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        save_tasks()
+        # Settings are only used the first time a task is seen; after that this is a single append
+        settings = {
+            "study_time": self.get_study_time(task_name),
+            "break_time": self.break_time.get(),
+            "long_break_time": self.long_break_time.get(),
+            "cycles": self.cycles.get(),
+        }
+        store.log_session(task_name, status, actual_duration, settings)
+        self.retrain_model()
 
     def get_study_time(self, task_name):
-        return tasks_data.get(task_name, {}).get("study_time", 25)
+        task = store.get_task(task_name)
+        if task is None or task["study_time"] is None:
+            return 25
+        return task["study_time"]
 
     def show_analytics(self):
-        analytics = "Task Time Changes:\n"
-        for task, data in tasks_data.items():
+        # Load the session log into arrays once; per-task stats are vectorized group-bys over it
+        stats = {row.task: row for row in analytics.task_stats(analytics.load_history(store))}
+        lines = ["Task Time Changes:"]
+        for data in store.tasks():
+            task = data["name"]
             if task in self.completed_tasks:
-                analytics += f"\n{task}:\n"
-                analytics += f"  Study Time: {data['study_time']} min\n"
-                analytics += f"  Break Time: {data['break_time']} min\n"
-                analytics += f"  Long Break Time: {data['long_break_time']} min\n"
-                analytics += f"  Total Attempts: {data['attempts']}\n"
-                analytics += f"  Completed: {data['completed']} times\n"
-                analytics += f"  Last Completed: {data.get('last_completed', 'N/A')}\n"
-                if "time_adjustments" in data:
-                    analytics += f"  Time Adjustments: {data['time_adjustments']} seconds\n"
+                lines.append(f"\n{task}:")
+                lines.append(f"  Study Time: {data['study_time']} min")
+                lines.append(f"  Break Time: {data['break_time']} min")
+                lines.append(f"  Long Break Time: {data['long_break_time']} min")
+                lines.append(f"  Last Completed: {data.get('last_completed', 'N/A')}")
+                if task in stats:
+                    lines.extend(analytics.describe(stats[task]))
                 else:
-                    analytics += "  No Time Adjustments Recorded\n"
-        messagebox.showinfo("Analytics", analytics)
+                    lines.append("  No Time Adjustments Recorded")
+        messagebox.showinfo("Analytics", "\n".join(lines))
 
 
 # Run the app
-root = tk.Tk()
-app = PomodoroApp(root)
-root.mainloop()
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = PomodoroApp(root)
+    root.after_idle(model_registry.startup_report, "main.py")
+    root.after_idle(model_registry.warm_up, ["recommender"])
+    root.mainloop()
+    recommender_trainer.shutdown()
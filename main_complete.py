@@ -1,53 +1,42 @@
-import time
+import model_registry  # Imported first so the startup report measures from process start
 import datetime
-import psutil  # For tracking active application usage
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from PIL import Image
-import os
-import pandas as pd
-import threading
-import matplotlib.pyplot as plt
 import pytesseract
-from transformers import pipeline
 import numpy as np
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense
-from tensorflow.keras.optimizers import Adam
-import spacy
-import pickle  # For saving and loading tasks
-import pyautogui  # For screen capturing
-
-# Load spaCy NLP model and initialize Hugging Face generator
-nlp = spacy.load("en_core_web_sm")
-text_generator = pipeline("text-generation", model="gpt2")
+import session_store  # For saving and loading tasks
+import ocr_pipeline  # For screen capturing and OCR
+import summary_digest  # Token-budgeted prompt and streaming generation for the AI summary
+import columnar_export  # Optional Parquet export of the session history
+import capture_service  # The one screen capture loop, paused during breaks
+import window_sampler  # Foreground window queries, where the platform supports them
+from activity_log import ActivityLog
+from timer_engine import DeadlineTimer
+from session_engine import PomodoroEngine, STUDY
+from task_classifier import classify_task_type, backend_name
 
 # Ensure pytesseract is installed and configured
 pytesseract.pytesseract.tesseract_cmd = r'/opt/homebrew/bin/tesseract'
 
-# Directory to save screenshots
-if not os.path.exists('screenshots'):
-    os.makedirs('screenshots')
+# Compressed copies of captured frames, only if POMODORO_SAVE_FRAMES=1
+frame_archive = ocr_pipeline.open_frame_archive()
+# Parquet export after each session, only if POMODORO_EXPORT_DIR is set
+exporter = columnar_export.open_exporter()
 
 # Global list to store tasks
 tasks = []
+store = None
 
-# Load saved tasks if available
+# Load saved tasks if available (tasks.pkl is imported into the session store on first run)
 def load_tasks():
-    global tasks
-    try:
-        with open("tasks.pkl", "rb") as f:
-            tasks = pickle.load(f)
-    except (FileNotFoundError, EOFError):
-        tasks = []  # Start with an empty list if file not found or empty
-
-# Save tasks to file
-def save_tasks():
-    with open("tasks.pkl", "wb") as f:
-        pickle.dump(tasks, f)
+    global tasks, store
+    store = session_store.open_store()
+    tasks = [tuple(task) for task in store.catalog()]
 
 # Deep learning model for time recommendations
 def build_recommendation_model():
+    tf = model_registry.get("tensorflow")
+    Sequential, Dense, Adam = tf.keras.models.Sequential, tf.keras.layers.Dense, tf.keras.optimizers.Adam
     model = Sequential([
         Dense(64, activation='relu', input_shape=(1,)),
         Dense(32, activation='relu'),
@@ -56,28 +45,18 @@ def build_recommendation_model():
     model.compile(optimizer=Adam(), loss='mse')
     return model
 
-# Instantiate the recommendation model
-recommendation_model = build_recommendation_model()
+# The recommendation model is built on first use
+model_registry.register("type_recommender", build_recommendation_model)
 
 # Predict ideal time for a task type using the deep learning model
 def predict_time(task_type):
     task_data = {"Learning": [], "Creative": [], "Administrative": []}  # Store time data by task type
     if task_data[task_type]:
         X_new = np.array([[len(task_data[task_type])]])
-        predicted_time = recommendation_model.predict(X_new)[0][0]
+        predicted_time = model_registry.get("type_recommender").predict(X_new)[0][0]
         return int(predicted_time)
     return 1800 if task_type == "Learning" else 1200
 
-# Function to classify task type using NLP
-def classify_task_type(task_name):
-    doc = nlp(task_name)
-    for token in doc:
-        if token.lemma_ in ["study", "learn", "research", "read"]:
-            return "Learning"
-        elif token.lemma_ in ["build", "write", "create", "design"]:
-            return "Creative"
-    return "Administrative"
-
 # Function to add a new task with recommended time and update the dropdown
 def add_task(tasks_menu):
     task_name = simpledialog.askstring("New Task", "Enter task name:")
@@ -85,7 +64,7 @@ def add_task(tasks_menu):
         task_type = classify_task_type(task_name)
         recommended_time = predict_time(task_type)
         tasks.append((task_name, task_type, recommended_time))
-        save_tasks()  # Save the updated tasks list
+        store.add_catalog_task(task_name, task_type, recommended_time)  # Append only the new task
         tasks_menu['values'] = [task[0] for task in tasks]  # Update the dropdown with new tasks
         messagebox.showinfo("Task Added",
                             f"Task '{task_name}' ({task_type}) added with recommended time: {display_time(recommended_time)}")
@@ -98,94 +77,127 @@ def display_time(seconds):
 # Global variable to control recording state
 recording = True
 
-# Function to take and save a screenshot
-def capture_screenshot(interval, duration, screen_activity_log):
-    start_time = datetime.datetime.now()
-    while (datetime.datetime.now() - start_time).seconds < duration:
-        if recording:
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            screenshot = pyautogui.screenshot()
-            screenshot_path = f'screenshots/screen_{timestamp}.png'
-            screenshot.save(screenshot_path)
-            print(f"Captured screenshot at {timestamp}")
-            analyze_screenshot(screenshot_path, screen_activity_log)
-        time.sleep(interval)  # Adjust interval for more or less frequent captures
-
-# Function to analyze a screenshot using OCR
-def analyze_screenshot(image_path, screen_activity_log):
-    image = Image.open(image_path)
-    text = pytesseract.image_to_string(image)
-    screen_activity_log.append((datetime.datetime.now(), text))
-
-# Function to generate a descriptive summary using generative AI
-def generate_ai_summary(session_data):
-    prompt = "Summarize the user's productivity session based on the following data:\n\n"
-    for entry in session_data:
-        prompt += f"Task: {entry['task']}, Time Spent: {int(entry['time_spent'] // 60)} min {int(entry['time_spent'] % 60)} sec, "
-        prompt += "Screen Activity:\n"
-        for timestamp, text in entry["screen_activity"]:
-            prompt += f"  - {timestamp.strftime('%H:%M:%S')}: {text}\n"
-        prompt += "\n"
-
-    prompt += "\nProvide insights on productivity and any potential areas for improvement.\n"
-    ai_summary = text_generator(prompt, max_length=250, num_return_sequences=1)[0]["generated_text"]
-    return ai_summary
-
-# Function to show a summary of time and screen activity
-def show_summary(session_data):
-    ai_summary = generate_ai_summary(session_data)
+# OCR process pool shared by every tracking session; created the first time tracking starts
+ocr_pool = None
+
+def get_ocr_pool():
+    global ocr_pool
+    if ocr_pool is None:
+        ocr_pool = ocr_pipeline.OcrWorkerPool(frame_gate=ocr_pipeline.cached_frame_gate())
+    return ocr_pool
+
+# Foreground window title, so switching windows resets the capture cadence; None where it can't be queried
+window_provider = window_sampler.default_provider()
+
+def active_window_title():
+    window = window_provider.active_window()
+    return window.title if window else None
+
+# Seconds between screenshots while studying: 2 on a busy screen or after a window switch, backing off to 30
+# on a static one
+CAPTURE_INTERVAL = 5
+capture_cadence = capture_service.AdaptiveCadence(
+    min_interval=2, max_interval=30, window_probe=active_window_title if window_provider else None,
+    worker_pids=lambda: ocr_pool.worker_pids() if ocr_pool else [])
+
+# Function to take one screenshot; the capture service calls it on its cadence and OCR happens in the worker pool
+def capture_screenshot(screen_activity_log):
+    if not recording:
+        return 0.0
+    timestamp = datetime.datetime.now()
+    screenshot = ocr_pipeline.capture_frame()
+    if frame_archive:
+        frame_archive.save(screenshot, timestamp)
+    print(f"Captured screenshot at {timestamp.strftime('%Y-%m-%d_%H-%M-%S')}")
+    pool = get_ocr_pool()
+    pool.submit(timestamp, screenshot, lambda captured_at, text, comprehensible: analyze_screenshot(
+        captured_at, text, comprehensible, screen_activity_log))
+    # The gate compares frames in the OCR pipeline, so this is the change seen in the previous frame
+    return pool.frame_gate.last_change
+
+# Function to log the cleaned OCR text of a screenshot under the time it was captured
+def analyze_screenshot(timestamp, text, comprehensible, screen_activity_log):
+    if comprehensible:
+        screen_activity_log.append(timestamp, text)
+
+# Function to generate a descriptive summary using generative AI; the prompt merges the per-cycle
+# digests under a fixed token budget, and the text is generated on a worker thread
+def generate_ai_summary(session_digest):
+    return summary_digest.SummaryStream(session_digest.prompt()).start()
+
+# Function to show a summary of time and screen activity, filling in the AI text as it streams in
+def show_summary(session_digest):
+    stream = generate_ai_summary(session_digest)
     summary_window = tk.Toplevel()
     summary_window.title("Session Summary")
-    label = tk.Label(summary_window, text=f"AI Summary:\n\n{ai_summary}", font=("Arial", 12), justify="left",
-                     wraplength=380)
-    label.pack(padx=10, pady=10)
+    text = tk.Text(summary_window, font=("Arial", 12), wrap="word", width=45, height=20)
+    text.insert(tk.END, "AI Summary:\n\n")
+    text.pack(padx=10, pady=10)
+
+    def drain():
+        if not summary_window.winfo_exists():
+            return
+        chunk, finished = stream.poll()
+        if chunk:
+            text.insert(tk.END, chunk)
+            text.see(tk.END)
+        if not finished:
+            summary_window.after(50, drain)
+
+    drain()
 
 # Main Pomodoro function with cycle logic and task tracking
 def start_pomodoro(root, study_time, short_break_time, long_break_time, cycles, selected_task, timer_label,
                    session_label):
     # Update the UI to display timer and task info
-    session_data = []  # Store data for each session
-    screen_activity_log = []
+    session_digest = summary_digest.SessionDigest()  # Each cycle is digested as it ends
+    screen_activity_log = ActivityLog()  # Shared by every cycle; each cycle digests its own slice
+    cycle_start = screen_activity_log.mark()
+
+    # The engine owns the cycle logic: `cycles` study sessions with short breaks between them
+    engine = PomodoroEngine(short_break_time, long_break_time, cycles, session_limit=cycles)
+    engine.add_task(selected_task.get(), study_time)
 
     def end_cycle():
-        summary_data = {
-            "task": selected_task.get(),
-            "time_spent": study_time,
-            "screen_activity": screen_activity_log.copy()
-        }
-        session_data.append(summary_data)
-        screen_activity_log.clear()
-
-        if messagebox.askyesno("Session Complete", "Do you want more time?"):
-            countdown(study_time, timer_label, session_label, "Study Time", root, screen_activity_log, session_data,
+        nonlocal cycle_start
+        session_digest.add_cycle(selected_task.get(), study_time, screen_activity_log.view(cycle_start))
+        cycle_start = screen_activity_log.mark()
+
+        engine.finish_study(extend=messagebox.askyesno("Session Complete", "Do you want more time?"))
+
+    def start_session(phase, duration, cycle):
+        # Screens are only tracked while studying; a new session takes over the one capture loop
+        if phase == STUDY:
+            if not tracker.start(lambda: capture_screenshot(screen_activity_log), cadence=capture_cadence):
+                print("Screen tracking is already running in another window")
+            countdown(duration, timer_label, session_label, "Study Time", root, screen_activity_log, session_digest,
                       selected_task.get(), "Study", end_cycle)
         else:
-            if len(session_data) >= cycles:
-                show_summary(session_data)
-            else:
-                countdown(short_break_time if (len(session_data) % cycles) else long_break_time, timer_label,
-                          session_label, "Break Time", root, screen_activity_log, session_data, selected_task.get(),
-                          "Break", end_cycle)
+            tracker.pause()
+            countdown(duration, timer_label, session_label, "Break Time", root, screen_activity_log, session_digest,
+                      selected_task.get(), "Break", engine.finish_break)
+
+    def finish_session():
+        tracker.pause()
+        print(f"Screen tracking finished: {get_ocr_pool().stats()}, {tracker.stats()}")
+        show_summary(session_digest)
 
-    # Start the screen tracking in a separate thread
-    tracking_thread = threading.Thread(target=capture_screenshot, args=(5, study_time, screen_activity_log), daemon=True)
-    tracking_thread.start()
+    tracker = capture_service.get_service(CAPTURE_INTERVAL)
+    engine.on("phase", start_session)
+    engine.on("finished", finish_session)
+    if exporter:
+        engine.on("finished", lambda: exporter.export_in_background(store, screen_activity_log.between(0)))
 
     # Start the countdown
-    countdown(study_time, timer_label, session_label, "Study Time", root, screen_activity_log, session_data,
-              selected_task.get(), "Study", end_cycle)
+    engine.start()
 
-# Countdown function for study/break sessions using the `after` method
-def countdown(duration, timer_label, session_label, session_type, root, screen_activity_log, session_data,
+# Countdown function for study/break sessions against a monotonic deadline, so a busy UI can't make it drift
+def countdown(duration, timer_label, session_label, session_type, root, screen_activity_log, session_digest,
               task_description, task_type, end_callback):
     session_label.config(text=session_type)
-    if duration > 0:
-        timer_label.config(text=display_time(duration))
-        root.after(1000, countdown, duration - 1, timer_label, session_label, session_type, root, screen_activity_log,
-                   session_data, task_description, task_type, end_callback)
-    else:
-        timer_label.config(text="00:00")
-        end_callback()
+    timer = DeadlineTimer(root, lambda remaining: timer_label.config(text=display_time(remaining)), end_callback)
+    timer.start(duration)
+    return timer
 
 # Main window for task and time management
 def main_window():
@@ -252,7 +264,12 @@ def main_window():
 
     # Set window size
     root.geometry("400x500")
+    root.after_idle(model_registry.startup_report, "main_complete.py")
+    root.after_idle(model_registry.warm_up, [backend_name(), "gpt2"])
     root.mainloop()
+    capture_service.get_service(CAPTURE_INTERVAL).stop()
+    if ocr_pool is not None:
+        ocr_pool.shutdown()
 
 # Run the main window
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+# Reference point for the startup report; entry points import this module first
+_process_start = time.perf_counter()
+
+# Seconds allowed between process start and the first drawn window
+STARTUP_BUDGET = float(os.environ.get("POMODORO_STARTUP_BUDGET", "1.0"))
+
+# Background warm-up is opt-in so the heavy backends stay out of RSS until needed
+WARM_UP = os.environ.get("POMODORO_WARMUP", "0") == "1"
+
+_loaders = {}
+_backends = {}
+_load_times = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def register(name, loader):
+    """Registers a zero-argument loader for a heavy backend."""
+    _loaders[name] = loader
+
+
+def _lock_for(name):
+    with _registry_lock:
+        if name not in _locks:
+            _locks[name] = threading.Lock()
+        return _locks[name]
+
+
+def get(name):
+    """Returns the named backend, loading it the first time it is asked for."""
+    if name in _backends:
+        return _backends[name]
+    with _lock_for(name):
+        if name not in _backends:
+            start = time.perf_counter()
+            _backends[name] = _loaders[name]()
+            _load_times[name] = time.perf_counter() - start
+            print(f"Loaded '{name}' in {_load_times[name]:.2f}s")
+    return _backends[name]
+
+
+def replace(name, backend):
+    """Swaps in a new instance of a backend, e.g. after retraining."""
+    with _lock_for(name):
+        _backends[name] = backend
+
+
+def is_loaded(name):
+    return name in _backends
+
+
+def warm_up(names, force=False):
+    """Loads backends on a daemon thread so the first real call doesn't wait."""
+    if not (WARM_UP or force):
+        return None
+
+    def load_all():
+        for name in names:
+            try:
+                get(name)
+            except Exception as e:
+                print(f"Warm-up of '{name}' failed: {e}")
+
+    thread = threading.Thread(target=load_all, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def startup_report(label="Pomodoro", budget=None):
+    """Prints and returns how long it took to get the first window on screen."""
+    budget = STARTUP_BUDGET if budget is None else budget
+    elapsed = time.perf_counter() - _process_start
+    report = {
+        "label": label,
+        "startup_seconds": round(elapsed, 3),
+        "budget_seconds": budget,
+        "within_budget": elapsed <= budget,
+        "loaded_backends": {name: round(t, 3) for name, t in _load_times.items()},
+    }
+    status = "OK" if report["within_budget"] else "OVER BUDGET"
+    print(f"{label} startup: {elapsed:.3f}s (budget {budget:.3f}s) {status}")
+    if report["loaded_backends"]:
+        print(f"  Backends loaded before first window: {report['loaded_backends']}")
+    return report
+
+
+# ========================== SHARED HEAVY BACKENDS ==========================
+
+def _load_tensorflow():
+    import tensorflow as tf
+    return tf
+
+
+def _load_spacy():
+    import spacy
+    # Task classification only needs lemmas; the parser and NER would just slow every call down
+    return spacy.load("en_core_web_sm", exclude=["parser", "ner"])
+
+
+def _load_gpt2():
+    from transformers import pipeline
+    return pipeline("text-generation", model="gpt2")
+
+
+# Plain-text copy of the NLTK word list, written the first time it is loaded
+WORDS_CACHE_PATH = os.environ.get("POMODORO_WORDS_CACHE", "english_words.txt")
+
+
+def _load_english_words():
+    # The cache is one word per line; reading it is much faster than importing NLTK
+    try:
+        with open(WORDS_CACHE_PATH, encoding="utf-8") as file:
+            return frozenset(file.read().split())
+    except FileNotFoundError:
+        pass
+    import nltk
+    from nltk.corpus import words
+    try:
+        english_words = frozenset(words.words())
+    except LookupError:
+        # Download the words corpus only if it isn't available yet
+        nltk.download('words')
+        english_words = frozenset(words.words())
+    try:
+        tmp_path = WORDS_CACHE_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(sorted(english_words)))
+        os.replace(tmp_path, WORDS_CACHE_PATH)
+    except OSError as e:
+        print(f"Could not cache the word list at {WORDS_CACHE_PATH}: {e}")
+    return english_words
+
+
+register("tensorflow", _load_tensorflow)
+register("spacy", _load_spacy)
+register("gpt2", _load_gpt2)
+register("english_words", _load_english_words)
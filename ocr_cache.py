@@ -0,0 +1,92 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = "ocr_cache.db"
+MAX_BYTES = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_by_last_used ON entries (last_used);
+"""
+
+
+def image_key(image):
+    """Content address of an image: a hash of its mode, size and pixels."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class OcrCache:
+    """Disk-backed OCR results keyed by image hash, evicting least-recently-used entries over a size cap."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self.conn:
+                self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        encoded = json.dumps(value, separators=(",", ":"))
+        size = len(key) + len(encoded)
+        with self.lock, self.conn:
+            old = self.conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if old:
+                self.total_bytes -= old[0]
+            self.conn.execute("INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                              (key, encoded, size, time.time()))
+            self.total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            rows = self.conn.execute("SELECT key, size FROM entries ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.total_bytes -= size
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes": self.total_bytes,
+            "entries": entries,
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,384 @@
+import datetime
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytesseract
+import pyautogui
+from PIL import Image, ImageChops
+
+import ocr_cache
+import ocr_text
+
+# Frames go straight from the screenshot to OCR in memory; saving them is opt-in
+SAVE_FRAMES = os.environ.get("POMODORO_SAVE_FRAMES", "0") == "1"
+SCREENSHOT_DIR = "screenshots"
+
+# Preprocessing before OCR: grayscale is nearly free and speeds up Tesseract; scale < 1 trades accuracy for speed
+OCR_GRAYSCALE = True
+OCR_SCALE = float(os.environ.get("POMODORO_OCR_SCALE", "1.0"))
+
+
+def capture_frame():
+    """Grabs the screen as a PIL image without touching the disk."""
+    return pyautogui.screenshot()
+
+
+def prepare_frame(image, scale=OCR_SCALE, grayscale=OCR_GRAYSCALE):
+    if grayscale:
+        image = image.convert("L")
+    if scale != 1.0:
+        width, height = image.size
+        image = image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.BILINEAR)
+    return image
+
+
+def ocr_image(image):
+    return pytesseract.image_to_string(image)
+
+
+def ocr_lines(image):
+    """OCRs an image and returns [(center_y, line_text), ...] in reading order."""
+    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        center_y = data["top"][i] + data["height"][i] / 2
+        if key not in lines:
+            lines[key] = [center_y, []]
+        lines[key][1].append(word)
+    return [(center_y, " ".join(words)) for center_y, words in lines.values()]
+
+
+# What FrameGate.plan decided for one frame: crops to OCR, bands answered by the cache, cache keys to fill
+FramePlan = namedtuple("FramePlan", ["height", "runs", "cached", "keys", "thumb", "bands"])
+
+
+def _unscored(lines):
+    return list(lines), 0, 0
+
+
+class FrameGate:
+    """Skips OCR for frames that match what was last read and re-OCRs only the horizontal bands that changed.
+
+    Frames are compared on a small grayscale thumbnail, each band against its pixels when it was
+    last OCR'd, so small edits add up until the band is read again. A band counts as changed when
+    any of its tiles differs enough, so one edited line isn't averaged away over a full-width band. Each
+    band keeps its scored lines (cleaned lines, English words, all words) so a partial update can be
+    stitched back into the full-screen text. With a cache, changed bands whose exact pixels were
+    seen before skip OCR too.
+
+    plan() and apply() may run on different threads (OcrWorkerPool plans on its dispatch thread
+    and applies on its collect thread), so the band state is guarded by a lock.
+    """
+
+    def __init__(self, bands=8, thumb_width=320, threshold=32, padding=0.25, cache=None, scorer=None, tile_width=16):
+        self.bands = bands
+        self.thumb_width = thumb_width
+        self.tiles = max(1, thumb_width // tile_width)  # Tiles per band, across the width
+        # Summed absolute difference (0-255 per thumbnail pixel) in one tile above which its band changed;
+        # on a 1080p screen one edited character sums to about 40, a whole edited line to about 190
+        self.threshold = threshold
+        self.padding = padding  # Extra height, as a fraction of a band, OCR'd around dirty bands
+        self.cache = cache
+        self.scorer = scorer or _unscored
+        self.lock = threading.Lock()
+        self.reference = None  # Thumbnail whose bands each hold the pixels from that band's last OCR
+        self.planned = set()  # Bands in a plan that hasn't been applied or cancelled yet
+        self.band_state = [([], 0, 0) for _ in range(bands)]
+        self.text = ""
+        self.comprehensible = False
+        self.last_change = 1.0  # Fraction of bands that changed in the latest frame
+        self.counters = {"captured": 0, "skipped": 0, "ocr_full": 0, "ocr_partial": 0, "bands_ocrd": 0,
+                         "bands_cached": 0}
+
+    def thumbnail(self, image):
+        width, height = image.size
+        thumb_height = max(self.bands, round(self.thumb_width * height / width / self.bands) * self.bands)
+        return image.convert("L").resize((self.thumb_width, thumb_height), Image.BILINEAR)
+
+    def dirty_bands(self, thumb, reference=None):
+        if reference is None or reference.size != thumb.size:
+            return list(range(self.bands))
+        # A box-filtered resize to one float pixel per tile gives each tile's mean difference, times its area the sum
+        tile_means = ImageChops.difference(thumb, reference).convert("F").resize((self.tiles, self.bands), Image.BOX)
+        area = thumb.size[0] * thumb.size[1] / (self.tiles * self.bands)
+        band_max = np.asarray(tile_means).max(axis=1)  # One row per band, one column per tile
+        return [int(band) for band in np.flatnonzero(band_max * area > self.threshold)]
+
+    def plan(self, image):
+        """Compares a prepared frame with what was last read; returns a FramePlan, or None if nothing changed.
+
+        Bands of an earlier plan that is still being OCR'd are left out, so they aren't read twice; once
+        that plan is applied, any further change in them shows up against the new reference.
+        """
+        thumb = self.thumbnail(image)
+        with self.lock:
+            dirty = self.dirty_bands(thumb, self.reference)
+            self.counters["captured"] += 1
+            self.last_change = len(dirty) / self.bands
+            dirty = [band for band in dirty if band not in self.planned]
+            if not dirty:
+                self.counters["skipped"] += 1
+                return None
+            self.planned.update(dirty)
+
+        width, height = image.size
+        band_height = height / self.bands
+        cached, keys = {}, {}
+        if self.cache is not None:  # OcrCache has its own lock
+            for band in dirty:
+                key = ocr_cache.image_key(image.crop((0, int(band * band_height), width,
+                                                      int((band + 1) * band_height))))
+                entry = self.cache.get(key)
+                if entry is None:
+                    keys[band] = key
+                else:
+                    cached[band] = tuple(entry)
+
+        pad = int(band_height * self.padding)
+        runs = []
+        for first, last in self._runs([band for band in dirty if band not in cached]):
+            top = max(0, int(first * band_height) - pad)
+            bottom = min(height, int((last + 1) * band_height) + pad)
+            runs.append((first, last, top, image.crop((0, top, width, bottom))))
+        return FramePlan(height, runs, cached, keys, thumb, dirty)
+
+    def apply(self, plan, results):
+        """Stitches cached bands and the OCR'd lines of each run back into the screen text; returns it.
+
+        Only here do the planned bands' reference pixels move forward: if OCR fails the plan is
+        cancelled instead, and its bands still differ from their reference and are planned again.
+        """
+        with self.lock:
+            self.planned.difference_update(plan.bands)
+            return self._apply(plan, results)
+
+    def cancel(self, plan):
+        """Gives up on a plan whose OCR failed, so its bands can be planned again."""
+        with self.lock:
+            self.planned.difference_update(plan.bands)
+
+    def _apply(self, plan, results):
+        band_height = plan.height / self.bands
+        for band, entry in plan.cached.items():
+            self.band_state[band] = entry
+        for (first, last, top, _), lines in zip(plan.runs, results):
+            band_lines = {band: [] for band in range(first, last + 1)}
+            for center_y, line in lines:
+                # Keep only lines centred in a dirty band; the padding is just context for Tesseract
+                band = int((top + center_y) // band_height)
+                if band in band_lines:
+                    band_lines[band].append(line)
+            for band, raw_lines in band_lines.items():
+                self.band_state[band] = self.scorer(raw_lines)
+                if band in plan.keys:
+                    self.cache.put(plan.keys[band], self.band_state[band])
+
+        bands_ocrd = sum(last - first + 1 for first, last, _, _ in plan.runs)
+        if bands_ocrd:
+            self.counters["ocr_full" if bands_ocrd == self.bands else "ocr_partial"] += 1
+        self.counters["bands_ocrd"] += bands_ocrd
+        self.counters["bands_cached"] += len(plan.cached)
+
+        self._update_reference(plan)
+        self.text = "\n".join(line for lines, _, _ in self.band_state for line in lines)
+        english = sum(state[1] for state in self.band_state)
+        total = sum(state[2] for state in self.band_state)
+        self.comprehensible = english / total > 0.5 if total else False
+        return self.text
+
+    def _update_reference(self, plan):
+        if self.reference is None or self.reference.size != plan.thumb.size:
+            # A first or resized frame plans every band
+            self.reference = plan.thumb.copy()
+            return
+        thumb_band = plan.thumb.size[1] // self.bands
+        for band in plan.bands:
+            box = (0, band * thumb_band, plan.thumb.size[0], (band + 1) * thumb_band)
+            self.reference.paste(plan.thumb.crop(box), box)
+
+    def process(self, image, ocr=ocr_lines):
+        """Returns (text, changed) for a prepared frame, OCRing as little of it as possible."""
+        plan = self.plan(image)
+        if plan is None:
+            return self.text, False
+        return self.apply(plan, [ocr(crop) for _, _, _, crop in plan.runs]), True
+
+    @staticmethod
+    def _runs(bands):
+        """Groups sorted band indexes into contiguous (first, last) runs."""
+        runs = []
+        for band in bands:
+            if runs and runs[-1][1] == band - 1:
+                runs[-1][1] = band
+            else:
+                runs.append([band, band])
+        return runs
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        captured = stats["captured"]
+        stats["skip_ratio"] = stats["skipped"] / captured if captured else 0.0
+        stats["band_ocr_ratio"] = stats["bands_ocrd"] / (captured * self.bands) if captured else 0.0
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+
+def _ocr_lines_job(image, tesseract_cmd):
+    # Runs in a worker process, which may not have inherited the caller's Tesseract path
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    return ocr_lines(image)
+
+
+def _report_pid(pids):
+    # Runs once in each new worker process
+    pids.put(os.getpid())
+
+
+class OcrWorkerPool:
+    """Bounded capture -> OCR pipeline with the OCR itself spread over a process pool.
+
+    The capture thread only calls submit(). Frames wait in a drop-oldest queue, so a slow OCR pass
+    can never pile up work: at most `max_pending` frames wait and one frame per worker is in flight.
+    Results are delivered in capture order, stamped with the capture time.
+    """
+
+    def __init__(self, workers=None, max_pending=2, frame_gate=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.frame_gate = frame_gate or FrameGate()
+        self.pending = deque(maxlen=max_pending)
+        self.pending_ready = threading.Condition()
+        self.in_flight = queue.Queue(maxsize=self.workers)
+        self.pid_queue = multiprocessing.Queue()
+        self.pids = set()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_report_pid,
+                                            initargs=(self.pid_queue,))
+        self.dropped = 0
+        self.running = True
+        threading.Thread(target=self._dispatch, name="ocr-dispatch", daemon=True).start()
+        threading.Thread(target=self._collect, name="ocr-collect", daemon=True).start()
+
+    def submit(self, timestamp, frame, on_result):
+        """Queues a raw frame; on_result(timestamp, text, comprehensible) is called from a pool thread once it is OCR'd."""
+        with self.pending_ready:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1  # deque(maxlen) discards the oldest frame
+            self.pending.append((timestamp, frame, on_result))
+            self.pending_ready.notify()
+
+    def _dispatch(self):
+        tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        while True:
+            with self.pending_ready:
+                while self.running and not self.pending:
+                    self.pending_ready.wait()
+                if not self.running:
+                    break
+                timestamp, frame, on_result = self.pending.popleft()
+            plan = self.frame_gate.plan(prepare_frame(frame))
+            runs = plan.runs if plan else []
+            futures = [self.executor.submit(_ocr_lines_job, crop, tesseract_cmd) for _, _, _, crop in runs]
+            self.in_flight.put((timestamp, plan, futures, on_result))  # Blocks when workers are busy
+        self.in_flight.put(None)
+
+    def _collect(self):
+        while True:
+            item = self.in_flight.get()
+            if item is None:
+                break
+            timestamp, plan, futures, on_result = item
+            try:
+                if plan is not None:
+                    self.frame_gate.apply(plan, [future.result() for future in futures])
+            except Exception as e:
+                # The gate's reference for these bands didn't move, so the next frame plans them again
+                self.frame_gate.cancel(plan)
+                print(f"OCR failed for frame captured at {timestamp}: {e}")
+                continue
+            on_result(timestamp, self.frame_gate.text, self.frame_gate.comprehensible)
+
+    def worker_pids(self):
+        """Pids of the worker processes started so far, for measuring the pool's CPU use."""
+        while True:
+            try:
+                self.pids.add(self.pid_queue.get_nowait())
+            except queue.Empty:
+                return sorted(self.pids)
+
+    def stats(self):
+        stats = self.frame_gate.stats()
+        stats["dropped"] = self.dropped
+        stats["workers"] = self.workers
+        return stats
+
+    def shutdown(self):
+        with self.pending_ready:
+            self.running = False
+            self.pending_ready.notify()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class FrameArchive:
+    """Compressed on-disk copies of captured frames, trimmed by total size and age."""
+
+    def __init__(self, directory=SCREENSHOT_DIR, max_bytes=200 * 1024 * 1024, max_age=7 * 24 * 3600,
+                 image_format="JPEG", quality=60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.image_format = image_format
+        self.quality = quality
+        self.extension = "jpg" if image_format == "JPEG" else image_format.lower()
+        os.makedirs(directory, exist_ok=True)
+
+        # Track (mtime, path, size) oldest first so retention doesn't rescan the directory on every save
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, path, stat.st_size))
+        self.entries = deque(sorted(entries))
+        self.total_bytes = sum(entry[2] for entry in entries)
+
+    def save(self, image, timestamp=None):
+        timestamp = timestamp or datetime.datetime.now()
+        path = os.path.join(self.directory, f"screen_{timestamp.strftime('%Y-%m-%d_%H-%M-%S')}.{self.extension}")
+        image.convert("L" if image.mode == "L" else "RGB").save(path, self.image_format, quality=self.quality,
+                                                                 optimize=True)
+        size = os.path.getsize(path)
+        self.entries.append((time.time(), path, size))
+        self.total_bytes += size
+        self.enforce_retention()
+        return path
+
+    def enforce_retention(self):
+        cutoff = time.time() - self.max_age
+        while self.entries and (self.entries[0][0] < cutoff or self.total_bytes > self.max_bytes):
+            _, path, size = self.entries.popleft()
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def open_frame_archive():
+    """Returns a FrameArchive if frame saving is enabled, otherwise None."""
+    return FrameArchive() if SAVE_FRAMES else None
+
+
+def cached_frame_gate():
+    """FrameGate that cleans and scores band text and reuses OCR results across sessions."""
+    return FrameGate(cache=ocr_cache.OcrCache(), scorer=ocr_text.score_lines)
@@ -0,0 +1,41 @@
+import re  # Import for cleaning OCR output
+
+import model_registry
+
+# Characters dropped from OCR text: anything but word characters, whitespace and basic punctuation
+_SPECIAL = re.compile(r'[^\w\s.,!?-]+')
+# The same filter for ASCII text as a translate table, derived from the pattern so the two always agree
+_ASCII_SPECIAL = str.maketrans('', '', ''.join(chr(c) for c in range(128) if _SPECIAL.match(chr(c))))
+
+
+def _strip_special(text):
+    # str.translate is many times faster than the regex, but only covers ASCII
+    return text.translate(_ASCII_SPECIAL) if text.isascii() else _SPECIAL.sub('', text)
+
+
+# Clean and filter OCR text for readability, focusing on relevant info
+def clean_ocr_text(text):
+    # split/join collapses whitespace runs exactly like re.sub(r'\s+', ' ', ...), without the regex
+    return _strip_special(' '.join(text.split())).strip()
+
+
+# Count (English words, all words) in already-cleaned text
+def count_english_words(text):
+    english_words = model_registry.get("english_words")
+    words_in_text = text.lower().split()
+    return sum(map(english_words.__contains__, words_in_text)), len(words_in_text)
+
+
+def score_lines(lines):
+    """Cleans OCR'd lines and counts their English words.
+
+    Returns (cleaned lines, English words, all words). The counts are exact, so the counts of several
+    bands add up to the same English-majority decision as scoring their joined text.
+    """
+    # clean_ocr_text line by line, but with one special-character pass over all of them: collapsed
+    # lines contain no newlines, so joining and splitting on them keeps the lines apart
+    collapsed = "\n".join(" ".join(line.split()) for line in lines)
+    cleaned = [line.strip() for line in _strip_special(collapsed).split("\n")] if lines else []
+    cleaned = [line for line in cleaned if line]
+    english, total = count_english_words(" ".join(cleaned))
+    return cleaned, english, total
@@ -0,0 +1,379 @@
+import model_registry  # Imported first so the startup report measures from process start
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+import session_store
+import task_classifier
+import task_types
+import trainer
+from session_engine import PomodoroEngine
+from timer_wheel import Scheduler
+
+# Loopback only: the service has no authentication
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+MAX_SESSIONS = 10000
+EVENT_BACKLOG = 64  # Events kept per session for clients that poll
+MAX_WAIT = 30.0  # Longest a client can long-poll for events
+MAX_BODY = 64 * 1024
+
+model_registry.register("recommender", trainer.load_current_recommender)
+
+
+class ServiceSession:
+    """One user's Pomodoro: a PomodoroEngine whose phases are timed by the shared scheduler."""
+
+    def __init__(self, session_id, service, settings):
+        self.id = session_id
+        self.service = service
+        self.settings = settings
+        self.engine = PomodoroEngine(settings["break_time"] * 60, settings["long_break_time"] * 60,
+                                     settings["cycles"], session_limit=settings.get("session_limit"),
+                                     clock=service.scheduler.time)
+        self.deadline = None
+        self.paused_remaining = None
+        self.timer = None
+        self.study_times = {}  # Minutes per task, kept after the engine drops completed tasks
+        self.events = deque(maxlen=EVENT_BACKLOG)
+        self.next_event = 0
+        self.updated = asyncio.Event()
+
+        for event in ("task_started", "phase", "cycle", "task", "finished"):
+            self.engine.on(event, self._recorder(event))
+        self.engine.on("phase", self._schedule)
+        self.engine.on("task", self._log_task)
+        self.engine.on("finished", self._cancel_timer)
+
+    def _recorder(self, event):
+        def record(*args):
+            self.events.append({"seq": self.next_event, "event": event, "args": list(args)})
+            self.next_event += 1
+            # Wake every long-poll waiting on this session
+            self.updated.set()
+            self.updated = asyncio.Event()
+        return record
+
+    def _schedule(self, phase, duration, cycle):
+        self._cancel_timer()
+        self.paused_remaining = None
+        self.deadline = self.service.scheduler.time() + duration
+        self.timer = self.service.scheduler.call_at(self.deadline, self.engine.expire)
+
+    def _cancel_timer(self):
+        if self.timer is not None:
+            self.service.scheduler.cancel(self.timer)
+            self.timer = None
+
+    def _log_task(self, task_name, status, duration):
+        settings = dict(self.settings, study_time=self.study_times.get(task_name))
+        self.service.log_session(task_name, status, duration, settings)
+
+    def remaining(self):
+        if self.paused_remaining is not None:
+            return self.paused_remaining
+        if self.deadline is None or self.engine.finished:
+            return 0.0
+        return max(0.0, self.deadline - self.service.scheduler.time())
+
+    def pause(self):
+        if self.timer is None:
+            return
+        self.paused_remaining = self.remaining()
+        self._cancel_timer()
+
+    def resume(self):
+        if self.paused_remaining is None:
+            return
+        self.deadline = self.service.scheduler.time() + self.paused_remaining
+        self.paused_remaining = None
+        self.timer = self.service.scheduler.call_at(self.deadline, self.engine.expire)
+
+    def close(self):
+        self._cancel_timer()
+        self.updated.set()
+
+    async def wait_events(self, since, timeout):
+        """Events with seq >= since, waiting up to `timeout` seconds for one if there are none yet."""
+        if self.next_event <= since and timeout > 0:
+            try:
+                await asyncio.wait_for(self.updated.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return [event for event in self.events if event["seq"] >= since]
+
+    def state(self):
+        engine = self.engine
+        return {
+            "id": self.id,
+            "user": self.settings.get("user"),
+            "task": engine.current_task,
+            "phase": engine.phase,
+            "cycle": engine.cycle,
+            "cycles": engine.cycles,
+            "remaining": round(self.remaining(), 3),
+            "paused": self.paused_remaining is not None,
+            "finished": engine.finished,
+            "tasks": [{"name": name, "study_time": seconds // 60} for name, seconds in engine.tasks],
+            "completed_tasks": list(engine.completed_tasks),
+            "next_event": self.next_event,
+        }
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(payload, key, default=None, minimum=0):
+    value = payload.get(key, default)
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value < minimum:
+        raise ServiceError(400, f"'{key}' must be a number >= {minimum}")
+    return value
+
+
+def _optional_count(payload, key):
+    value = payload.get(key)
+    if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+        raise ServiceError(400, f"'{key}' must be a whole number >= 0 or null")
+    return value
+
+
+class PomodoroService:
+    """Hosts many concurrent sessions on one event loop, sharing one scheduler, store and set of models."""
+
+    def __init__(self, store, max_sessions=MAX_SESSIONS):
+        self.store = store
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.scheduler = Scheduler()
+
+    def start(self):
+        self.scheduler.start()
+
+    def stop(self):
+        for session in self.sessions.values():
+            session.close()
+        self.scheduler.stop()
+
+    def log_session(self, task_name, status, duration, settings):
+        # SQLite writes run off the event loop so a slow disk can't delay other sessions' timers
+        asyncio.get_running_loop().run_in_executor(None, self.store.log_session, task_name, status, duration,
+                                                   settings)
+
+    def create_session(self, payload):
+        if len(self.sessions) >= self.max_sessions:
+            raise ServiceError(503, "Too many sessions")
+        tasks = payload.get("tasks")
+        if not isinstance(tasks, list) or not tasks:
+            raise ServiceError(400, "'tasks' must be a non-empty list of {name, study_time}")
+        settings = {
+            "user": payload.get("user"),
+            "break_time": _number(payload, "break_time"),
+            "long_break_time": _number(payload, "long_break_time"),
+            "cycles": int(_number(payload, "cycles", 4, minimum=1)),
+            "session_limit": _optional_count(payload, "session_limit"),
+        }
+        session = ServiceSession(uuid.uuid4().hex[:12], self, settings)
+        for task in tasks:
+            if not isinstance(task, dict) or not task.get("name"):
+                raise ServiceError(400, "Every task needs a 'name'")
+            minutes = _number(task, "study_time", 25, minimum=1)
+            session.study_times[str(task["name"])] = minutes
+            session.engine.add_task(str(task["name"]), int(minutes * 60))
+        self.sessions[session.id] = session
+        session.engine.start(payload.get("start_task"))
+        return session
+
+    def session(self, session_id):
+        try:
+            return self.sessions[session_id]
+        except KeyError:
+            raise ServiceError(404, f"No session '{session_id}'")
+
+    def close_session(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+        return {"closed": session_id}
+
+    def act(self, session, action, payload):
+        engine = session.engine
+        if engine.finished and action not in ("pause", "resume"):
+            raise ServiceError(409, "Session has finished")
+        if action == "pause":
+            session.pause()
+        elif action == "resume":
+            session.resume()
+        elif action == "end_task":
+            engine.end_task(bool(payload.get("completed")))
+        elif action == "finish_study":
+            engine.finish_study(extend=bool(payload.get("extend")),
+                                task_completed=bool(payload.get("task_completed")))
+        elif action == "skip":
+            engine.expire()
+        elif action == "change_task":
+            if not payload.get("task"):
+                raise ServiceError(400, "'task' is required")
+            task_name = str(payload["task"])
+            minutes = payload.get("study_time")
+            if minutes is not None:
+                session.study_times[task_name] = _number(payload, "study_time", minimum=1)
+            engine.change_task(task_name, None if minutes is None else int(minutes * 60))
+        else:
+            raise ServiceError(404, f"Unknown action '{action}'")
+        return session.state()
+
+    def recommend(self, task_names):
+        """Recommended study minutes per task from the shared recommender."""
+        return trainer.recommend_minutes(self.store, model_registry.get("recommender"), task_names)
+
+    def classify(self, task_names):
+        """Task type and recommended seconds per task from the shared classifier and type model."""
+        classified = task_classifier.classify_task_types(task_names)
+        return {task_name: {"type": task_type, "recommended_time": task_types.predict_time(task_type)}
+                for task_name, task_type in zip(task_names, classified)}
+
+    def stats(self):
+        return {
+            "sessions": len(self.sessions),
+            "active": sum(1 for session in self.sessions.values() if not session.engine.finished),
+            "timers_pending": len(self.scheduler),
+            "timers_fired": self.scheduler.fired,
+            "scheduler_wakeups": self.scheduler.wakeups,
+            "models_loaded": [name for name in ("recommender", "spacy", "lemma_table", "type_recommender")
+                              if model_registry.is_loaded(name)],
+        }
+
+    # ---------- HTTP ----------
+
+    async def route(self, method, path, query, payload):
+        parts = [part for part in path.split("/") if part]
+        loop = asyncio.get_running_loop()
+        if parts == ["stats"] and method == "GET":
+            return self.stats()
+        if parts == ["sessions"]:
+            if method == "GET":
+                return [session.state() for session in self.sessions.values()]
+            if method == "POST":
+                return self.create_session(payload).state()
+        if parts in (["recommend"], ["classify"]) and method == "POST":
+            task_names = payload.get("tasks")
+            if not isinstance(task_names, list):
+                raise ServiceError(400, "'tasks' must be a list of task names")
+            # Model calls run on a worker thread; the first one may load the model from disk
+            handler = self.recommend if parts[0] == "recommend" else self.classify
+            return await loop.run_in_executor(None, handler, [str(name) for name in task_names])
+        if len(parts) >= 2 and parts[0] == "sessions":
+            session = self.session(parts[1])
+            if len(parts) == 2:
+                if method == "GET":
+                    return session.state()
+                if method == "DELETE":
+                    return self.close_session(session.id)
+            elif parts[2] == "events" and method == "GET":
+                since = int(query.get("since", ["0"])[0])
+                wait = min(float(query.get("wait", ["0"])[0]), MAX_WAIT)
+                return {"events": await session.wait_events(since, wait), "state": session.state()}
+            elif len(parts) == 3 and method == "POST":
+                return self.act(session, parts[2], payload)
+        raise ServiceError(404, f"No route for {method} {path}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                status, body = 200, None
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        raise ServiceError(413, "Request body too large")
+                    raw = await reader.readexactly(length) if length else b""
+                    payload = json.loads(raw) if raw else {}
+                    if not isinstance(payload, dict):
+                        raise ServiceError(400, "Request body must be a JSON object")
+                    url = urlsplit(target)
+                    body = await self.route(method, url.path, parse_qs(url.query), payload)
+                except ServiceError as e:
+                    status, body = e.status, {"error": str(e)}
+                except (ValueError, TypeError) as e:
+                    status, body = 400, {"error": str(e)}
+
+                data = json.dumps(body).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 409: "Conflict", 413: "Payload Too Large",
+            503: "Service Unavailable"}
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, db_path=session_store.DB_PATH):
+    """Runs the service until cancelled, on a loopback TCP port or a Unix socket."""
+    if unix_path is None and host not in LOOPBACK_HOSTS:
+        raise ValueError(f"Refusing to listen on non-loopback address {host!r}")
+    service = PomodoroService(session_store.open_store(db_path))
+    service.start()
+    if unix_path is not None:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)
+        server = await asyncio.start_unix_server(service.handle_connection, path=unix_path)
+        print(f"Pomodoro service listening on {unix_path}")
+    else:
+        server = await asyncio.start_server(service.handle_connection, host, port)
+        print(f"Pomodoro service listening on http://{host}:{port}")
+    model_registry.startup_report("pomodoro_service.py")
+    model_registry.warm_up(["recommender", task_classifier.backend_name(), "type_recommender"])
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.stop()
+        service.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Pomodoro timer service shared by thin clients.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--db", default=session_store.DB_PATH)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.db))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
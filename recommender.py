@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+
+# Layer sizes of the main.py recommender: 3 inputs -> 32 -> 32 -> 1
+LAYER_SIZES = (3, 32, 32, 1)
+
+
+class NumpyRecommender:
+    """Dense/ReLU forward pass over exported Keras weights, computed with NumPy."""
+
+    def __init__(self, weights):
+        # weights follows Keras' get_weights() order: [W1, b1, W2, b2, ...]
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self.layers = list(zip(self.weights[0::2], self.weights[1::2]))
+
+    @classmethod
+    def from_keras(cls, model):
+        return cls(model.get_weights())
+
+    @classmethod
+    def initialize(cls, layer_sizes=LAYER_SIZES, seed=None):
+        """Glorot-uniform kernels and zero biases, the same defaults Keras Dense layers use."""
+        rng = np.random.default_rng(seed)
+        weights = []
+        for fan_in, fan_out in zip(layer_sizes[:-1], layer_sizes[1:]):
+            limit = np.sqrt(6.0 / (fan_in + fan_out))
+            weights.append(rng.uniform(-limit, limit, size=(fan_in, fan_out)))
+            weights.append(np.zeros(fan_out))
+        return cls(weights)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls([data[f"arr_{i}"] for i in range(len(data.files))])
+
+    def save(self, path):
+        """Writes the weights atomically so a reader never sees a half-written file."""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, *self.weights)
+        os.replace(tmp_path, path)
+
+    def predict(self, features):
+        """Scores a batch of feature rows with one matrix multiply per layer; returns a 1-D array."""
+        x = np.asarray(features, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[np.newaxis, :]
+        last = len(self.layers) - 1
+        for i, (kernel, bias) in enumerate(self.layers):
+            x = x @ kernel + bias
+            if i < last:
+                np.maximum(x, 0, out=x)  # ReLU on hidden layers, linear output
+        return x[:, 0]
+
+    def predict_one(self, features):
+        return float(self.predict(features)[0])
+
+
+# ========================== VERSIONED PUBLISHING ==========================
+
+def published_path(prefix, version):
+    return f"{prefix}.v{version}.npz"
+
+
+def current_version(prefix):
+    """Version number the `<prefix>.current` pointer refers to, or 0 if nothing is published."""
+    try:
+        with open(f"{prefix}.current", "r") as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def publish(model, prefix):
+    """Saves weights as the next version, then atomically repoints `<prefix>.current` at them."""
+    version = current_version(prefix) + 1
+    model.save(published_path(prefix, version))
+    tmp_path = f"{prefix}.current.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(version))
+    os.replace(tmp_path, f"{prefix}.current")
+    return version
+
+
+def load_published(prefix):
+    """Returns (version, NumpyRecommender) for the current version, or (0, None)."""
+    version = current_version(prefix)
+    if not version:
+        return 0, None
+    return version, NumpyRecommender.load(published_path(prefix, version))
+
+
+def load_recommender(prefix, legacy_keras_weights=(), build_keras_model=None):
+    """Loads the current published weights; the first time, publishes v1 from a Keras checkpoint or fresh ones."""
+    version, model = load_published(prefix)
+    if model is not None:
+        return model
+    for path in legacy_keras_weights:
+        if build_keras_model and os.path.exists(path):
+            keras_model = build_keras_model()
+            keras_model.load_weights(path)
+            model = NumpyRecommender.from_keras(keras_model)
+            break
+    else:
+        model = NumpyRecommender.initialize()
+    publish(model, prefix)
+    return model
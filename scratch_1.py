@@ -1,108 +1,113 @@
-import time
+import model_registry  # Imported first so the startup report measures from process start
 import datetime
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import os
-import pickle
+from tkinter import ttk, messagebox, simpledialog, filedialog
+import session_store
+import recommender
+import trainer
 import pytesseract
 import pyautogui
-import numpy as np
-from PIL import Image
-from threading import Thread
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense
-from tensorflow.keras.optimizers import Adam
-import spacy
-import re  # Import for cleaning OCR output
-import nltk
-from nltk.corpus import words
+import ocr_pipeline
+import summary_digest
+import columnar_export
+import capture_service
+import window_sampler
+import analytics
+from task_classifier import classify_task_type, classify_task_types, backend_name
+from task_types import predict_time, on_model_published
+from activity_log import ActivityLog
+from timer_engine import DeadlineTimer
+from session_engine import PomodoroEngine, STUDY, SHORT_BREAK
 
 
 # ========================== SETUP AND INITIALIZATION ==========================
 
-# Load NLP model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except Exception as e:
-    print(f"Error loading NLP model: {e}")
-
 # Set Tesseract path (update this path as necessary for Windows)
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-# Create directory for screenshots
-if not os.path.exists('screenshots'):
-    os.makedirs('screenshots')
+# Compressed copies of captured frames, only if POMODORO_SAVE_FRAMES=1
+frame_archive = ocr_pipeline.open_frame_archive()
+# Parquet export after each session, only if POMODORO_EXPORT_DIR is set
+exporter = columnar_export.open_exporter()
+
+# Compares each capture with the previous one so unchanged screens skip OCR; seen-before screens hit the cache
+frame_gate = ocr_pipeline.cached_frame_gate()
 
 # Placeholder for current tasks and screen activity log
 active_tasks = []
-screen_activity_log = []
+screen_activity_log = ActivityLog()
+
+# Foreground app and window title, polled twice a second while studying; tracks focus time without OCR
+focus_sampler = window_sampler.open_sampler()
+# A window that was already OCR'd is read again only after this many seconds
+OCR_REFRESH = 300
+
+
+def active_window_title():
+    if focus_sampler.current is not None:
+        return focus_sampler.current.title
+    return pyautogui.getActiveWindowTitle() if hasattr(pyautogui, 'getActiveWindowTitle') else "Unknown"
+
+
+# One capture loop for the whole app while studying, paused otherwise. It captures every 10 seconds
+# when the screen or the foreground window changes and backs off to 2 minutes on a static screen.
+CAPTURE_INTERVAL = 30
+screen_tracker = capture_service.get_service(CAPTURE_INTERVAL)
+capture_cadence = capture_service.AdaptiveCadence(min_interval=10, max_interval=120, window_probe=active_window_title)
 
 
 # ========================== TASK MANAGEMENT FUNCTIONS ==========================
 
-# Load saved task times from file (not visible on UI)
-def load_task_times():
-    try:
-        with open("task_times.pkl", "rb") as f:
-            task_times = pickle.load(f)
-    except (FileNotFoundError, EOFError):
-        task_times = {}
-    return task_times
+store = None
 
 
-# Save task times to file
-def save_task_times(task_times):
-    with open("task_times.pkl", "wb") as f:
-        pickle.dump(task_times, f)
+# Open the session store for task times (not visible on UI); imports task_times.pkl on first run
+def load_task_times():
+    global store
+    if store is None:
+        store = session_store.open_store()
+    return store
+
+
+# Classify a task, add it to the active tasks and the catalog; returns (task type, recommended time)
+def add_active_task(task_name, tasks_menu):
+    task_type = classify_task_type(task_name)
+    recommended_time = predict_time(task_type)
+    active_tasks.append((task_name, task_type, recommended_time))
+    load_task_times().add_catalog_task(task_name, task_type, recommended_time)  # Links sessions to a type
+    tasks_menu['values'] = [task[0] for task in active_tasks]
+    return task_type, recommended_time
 
 
 # Add a new task, with task times saved locally but not displayed on UI
 def add_task(tasks_menu, recommendation_label):
     task_name = simpledialog.askstring("New Task", "Enter task name:")
     if task_name:
-        task_type = classify_task_type(task_name)
-        recommended_time = predict_time(task_type)
-        active_tasks.append((task_name, task_type, recommended_time))
-        tasks_menu['values'] = [task[0] for task in active_tasks]
+        task_type, recommended_time = add_active_task(task_name, tasks_menu)
         recommendation_label.config(text=f"Recommended time for '{task_type}' task: {display_time(recommended_time)}")
         messagebox.showinfo("Task Added",
                             f"Task '{task_name}' ({task_type}) added with recommended time: {display_time(recommended_time)}")
 
 
-# NLP-based task classification
-def classify_task_type(task_name):
-    doc = nlp(task_name)
-    for token in doc:
-        if token.lemma_ in ["study", "learn", "research", "read"]:
-            return "Learning"
-        elif token.lemma_ in ["build", "write", "create", "design"]:
-            return "Creative"
-    return "Administrative"
+# Import many tasks from a text file (one name per line), classified in a single batched call
+def import_tasks(tasks_menu):
+    path = filedialog.askopenfilename(title="Import Tasks", filetypes=[("Text files", "*.txt"), ("All files", "*")])
+    if not path:
+        return
+    with open(path, encoding="utf-8") as f:
+        task_names = [line.strip() for line in f if line.strip()]
+    rows = [(task_name, task_type, predict_time(task_type))
+            for task_name, task_type in zip(task_names, classify_task_types(task_names))]
+    active_tasks.extend(rows)
+    load_task_times().add_catalog_tasks(rows)
+    tasks_menu['values'] = [task[0] for task in active_tasks]
+    messagebox.showinfo("Tasks Imported", f"Imported {len(rows)} tasks.")
 
 
 # ========================== DEEP LEARNING MODEL FOR TIME PREDICTIONS ==========================
 
-# Build recommendation model
-def build_recommendation_model():
-    model = Sequential([
-        Dense(64, activation='relu', input_shape=(1,)),
-        Dense(32, activation='relu'),
-        Dense(1, activation='linear')
-    ])
-    model.compile(optimizer=Adam(), loss='mse')
-    return model
-
-
-recommendation_model = build_recommendation_model()
-
-
-# Predict time for task type using the deep learning model
-def predict_time(task_type):
-    task_data = {"Learning": [(1, 1800)], "Creative": [(1, 2400)], "Administrative": [(1, 1200)]}
-    X = np.array([x[0] for x in task_data[task_type]])
-    y = np.array([x[1] for x in task_data[task_type]])
-    recommendation_model.fit(X, y, epochs=10, verbose=0)  # Train model with dummy data
-    return int(recommendation_model.predict(np.array([[len(active_tasks)]])).flatten()[0])
+# Classification and time prediction live in task_types.py so the timer service can share them
+type_trainer = trainer.BackgroundTrainer(trainer.train_type_model, on_model_published)
 
 
 # ========================== COUNTDOWN TIMER AND POMODORO FUNCTION ==========================
@@ -113,155 +118,144 @@ def display_time(seconds):
     return f"{int(mins):02d}:{int(secs):02d}"
 
 
-# Countdown function for each session
+# Countdown function for each session, measured against a monotonic deadline so it can't drift
 def countdown(duration, timer_label, session_label, root, end_callback):
-    if duration > 0:
-        timer_label.config(text=display_time(duration))
-        root.after(1000, countdown, duration - 1, timer_label, session_label, root, end_callback)
-    else:
-        timer_label.config(text="00:00")
-        end_callback()
+    timer = DeadlineTimer(root, lambda remaining: timer_label.config(text=display_time(remaining)), end_callback)
+    timer.start(duration)
+    return timer
 
 
 # Start the Pomodoro session
 def start_pomodoro(root, study_time, short_break_time, long_break_time, cycles, selected_task, timer_label,
                    session_label, tasks_menu, task_label):
-    session_data = []
-    current_task = selected_task.get()
-    completed_tasks = set()
-    cycle_count = 0
-    is_break = False
-    task_times = load_task_times()
-
-    # Capture screen activity every 30 seconds during the session
+    session_digest = summary_digest.SessionDigest()  # Each study session is digested as it ends
+    session_started = datetime.datetime.now().timestamp()
+    session_start = cycle_start = screen_activity_log.mark()  # The log outlives the session; export only its slice
+    store = load_task_times()
+
+    # The engine owns the cycle logic; every task gets the same study time here
+    engine = PomodoroEngine(short_break_time, long_break_time, cycles)
+    for task in active_tasks:
+        engine.add_task(task[0], study_time)
+
+    # Capture screen activity during study sessions; OCR only windows that haven't been read yet
     def capture_screen_activity():
-        while not is_break:
-            screenshot = pyautogui.screenshot()
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            screenshot_path = f'screenshots/screen_{timestamp}.png'
-            screenshot.save(screenshot_path)
-            analyze_screenshot(screenshot_path, screen_activity_log)
-            time.sleep(30)
+        if not focus_sampler.needs_ocr(OCR_REFRESH):
+            return 0.0
+        focus_sampler.mark_ocr()
+        screenshot = ocr_pipeline.capture_frame()
+        if frame_archive:
+            frame_archive.save(screenshot)
+        analyze_screenshot(screenshot, screen_activity_log)
+        return frame_gate.last_change
+
+    # Called by the engine when a task is marked complete
+    def log_completed_task(task_name, status, duration):
+        task_info = next((task for task in active_tasks if task[0] == task_name), None)
+        if task_info:
+            active_tasks.remove(task_info)
+        tasks_menu['values'] = [task[0] for task in active_tasks]
+        store.log_session(task_name, status, duration)
+        type_trainer.request()  # Retrain in the background on the new session
 
     def end_study_session():
-        nonlocal cycle_count, is_break
-        is_break = True
-        task_completed = messagebox.askyesno("Session Complete", f"Did you complete the task '{current_task}'?")
-        if task_completed:
-            task_info = next((task for task in active_tasks if task[0] == current_task), None)
-            if task_info:
-                active_tasks.remove(task_info)
-            completed_tasks.add(current_task)
-            tasks_menu['values'] = [task[0] for task in active_tasks]
-            task_times[current_task] = task_times.get(current_task, 0) + study_time
-
-        save_task_times(task_times)
-
-        if not active_tasks:
-            show_summary(session_data, screen_activity_log)
+        screen_tracker.pause()
+        focus_sampler.stop()
+        task_type = next((task[1] for task in active_tasks if task[0] == engine.current_task), None)
+        session_digest.add_cycle(engine.current_task, engine.phase_duration, screen_activity_log.view(cycle_start),
+                                 task_type)
+        task_completed = messagebox.askyesno("Session Complete",
+                                             f"Did you complete the task '{engine.current_task}'?")
+        engine.finish_study(task_completed=task_completed)
+
+    def start_session(phase, duration, cycle):
+        if phase == STUDY:
+            start_study_session(duration)
         else:
-            cycle_count += 1
-            next_duration = short_break_time if cycle_count < cycles else long_break_time
-            session_label.config(text="Break Time" if cycle_count < cycles else "Long Break")
-            countdown(next_duration, timer_label, session_label, root, start_study_session)
-
-    def start_study_session():
-        nonlocal is_break
-        is_break = False
+            session_label.config(text="Break Time" if phase == SHORT_BREAK else "Long Break")
+            countdown(duration, timer_label, session_label, root, engine.finish_break)
+
+    def start_study_session(duration):
+        nonlocal cycle_start
+        cycle_start = screen_activity_log.mark()
         session_label.config(text="Study Time")
+        task_label.config(text=f"Task: {engine.current_task}")
 
-        screen_thread = Thread(target=capture_screen_activity)
-        screen_thread.daemon = True
-        screen_thread.start()
+        focus_sampler.start()
+        if not screen_tracker.start(capture_screen_activity, cadence=capture_cadence):
+            print("Screen tracking is already running in another window")
 
-        countdown(study_time, timer_label, session_label, root, end_study_session)
+        countdown(duration, timer_label, session_label, root, end_study_session)
 
-    start_study_session()
+    engine.on("phase", start_session)
+    engine.on("task", log_completed_task)
+    engine.on("finished", screen_tracker.pause)
+    engine.on("finished", lambda: print(f"Screen tracking: {screen_tracker.stats()}"))
+    engine.on("finished", lambda: show_summary(session_digest, session_started))
+    if exporter:
+        engine.on("finished", lambda: exporter.export_in_background(store, screen_activity_log.between(session_start)))
+    engine.start(selected_task.get())
 
 
 # ========================== SCREEN TRACKING AND SUMMARY GENERATION ==========================
 
-import nltk
-from nltk.corpus import words
-
-# Download the words corpus if not already available
-nltk.download('words')
-english_words = set(words.words())
-
-
-# Clean and filter OCR text for readability, focusing on relevant info
-def clean_ocr_text(text):
-    text = re.sub(r'\s+', ' ', text)  # Remove excessive whitespace
-    text = re.sub(r'[^\w\s.,!?-]', '', text)  # Remove special characters
-    return text.strip()
-
-
-# Function to determine if text is comprehensible (contains English words)
-def is_comprehensible(text):
-    words_in_text = text.split()
-    word_count = sum(1 for word in words_in_text if word.lower() in english_words)
-    return word_count / len(words_in_text) > 0.5 if words_in_text else False  # At least 50% of words should be valid
-
-
 # Analyze screenshot and log activity if text is comprehensible
-def analyze_screenshot(image_path, screen_activity_log):
-    image = Image.open(image_path).convert("L")  # Convert to grayscale for faster OCR
-    text = pytesseract.image_to_string(image)
-    cleaned_text = clean_ocr_text(text)
+def analyze_screenshot(image, screen_activity_log):
+    # The gate cleans (clean_ocr_text) and scores (score_lines) each band, reusing cached results
+    frame_gate.process(ocr_pipeline.prepare_frame(image))  # Grayscale for faster OCR
+    cleaned_text = frame_gate.text.replace("\n", " ")
 
     # Check if cleaned text is comprehensible
-    if is_comprehensible(cleaned_text):
+    if frame_gate.comprehensible:
         # Get focused window title for coherence in activity logging
-        window_title = pyautogui.getActiveWindowTitle() if hasattr(pyautogui, 'getActiveWindowTitle') else "Unknown"
-        typing_detected = "Typing detected" if pyautogui.typewrite else "No typing detected"
+        window_title = active_window_title()
+        typing_detected = bool(pyautogui.typewrite)
 
         # Log screen activity if text is relevant
-        screen_activity_log.append({
-            "timestamp": datetime.datetime.now(),
-            "window_title": window_title,
-            "content": cleaned_text,
-            "typing_activity": typing_detected
-        })
+        screen_activity_log.append(datetime.datetime.now(), cleaned_text, window_title, typing_detected)
 
 
-# Generate structured summary based on session data and screen activity log
-def generate_structured_summary(session_data, screen_activity_log):
-    task_time_summary = {entry['task_type']: entry['time_spent'] for entry in session_data}
+# Distinct screen texts listed per window for each study session
+HIGHLIGHTS_PER_WINDOW = 3
 
-    # Summarize time and interactions per page/application
-    page_durations = {}
-    for entry in screen_activity_log:
-        page = entry["window_title"]
-        page_durations[page] = page_durations.get(page, 0) + 1  # Increment by 1 for each capture cycle
 
+# Generate structured summary by merging the per-session digests built as each study session ended
+def generate_structured_summary(session_digest, session_started=None):
     summary = "Session Summary:\n\nTask Time Breakdown:\n"
-    for task_type, total_time in task_time_summary.items():
+    for task_type, total_time in session_digest.task_times(by_type=True).items():
         summary += f" - {task_type}: {display_time(total_time)}\n"
 
     # Screen Activity Highlights
     summary += "\nDetailed Screen Activity Highlights:\n"
-    for entry in screen_activity_log:
-        timestamp = entry["timestamp"].strftime("%H:%M:%S")
-        page = entry["window_title"]
-        activity = entry["content"]
-        typing = entry["typing_activity"]
-
-        summary += (f"At {timestamp} on '{page}':\n"
-                    f" {activity[:100]}{'...' if len(activity) > 100 else ''}\n"
-                    f" - Typing Status: {typing}\n\n")
-
-    # Add information on time spent per page/application
+    for cycle in session_digest.cycles:
+        for page, entries in cycle.groups.items():
+            typing = "Typing detected" if cycle.typing[page] else "No typing detected"
+            for timestamp, activity, repeats in entries[:HIGHLIGHTS_PER_WINDOW]:
+                summary += (f"At {timestamp} on '{page}':\n"
+                            f" {activity[:100]}{'...' if len(activity) > 100 else ''}\n"
+                            f" - Typing Status: {typing}\n\n")
+
+    # Add information on time spent per page/application: measured by the window sampler where the
+    # platform supports it, otherwise estimated from the captures and the gaps between them
     summary += "\nPage/Application Focus Summary:\n"
-    for page, duration in page_durations.items():
-        time_spent = display_time(duration * 30)  # Assuming 30 seconds per capture interval
-        summary += f" - {page}: Focused for {time_spent}\n"
+    if focus_sampler.available:
+        focus = focus_sampler.focus(since=session_started)
+    else:
+        windows, seconds = [], []
+        for cycle in session_digest.cycles:
+            windows.extend(cycle.focus)
+            seconds.extend(cycle.focus.values())
+        focus = analytics.window_focus(windows, seconds)
+    for page, seconds in focus:
+        summary += f" - {page}: Focused for {display_time(seconds)}\n"
 
     return summary
 
 
 # Show summary at the end of all sessions
-def show_summary(session_data, screen_activity_log):
-    summary_text = generate_structured_summary(session_data, screen_activity_log)
+def show_summary(session_digest, session_started=None):
+    summary_text = generate_structured_summary(session_digest, session_started)
+    print(f"Screen tracking: {frame_gate.stats()}, windows: {focus_sampler.stats()}")
     summary_window = tk.Toplevel()
     summary_window.title("Session Summary")
     label = tk.Label(summary_window, text=summary_text, font=("Arial", 12), justify="left", wraplength=380)
@@ -306,6 +300,9 @@ def main_window():
     add_task_button = tk.Button(root, text="Add Task", command=lambda: add_task(tasks_menu, recommendation_label),
                                 font=("Arial", 14), width=20)
     add_task_button.pack(pady=5)
+    import_tasks_button = tk.Button(root, text="Import Tasks", command=lambda: import_tasks(tasks_menu),
+                                    font=("Arial", 14), width=20)
+    import_tasks_button.pack(pady=5)
     session_label = tk.Label(root, text="", font=("Arial", 16))
     timer_label = tk.Label(root, text="00:00", font=("Arial", 48))
     task_label = tk.Label(root, text="", font=("Arial", 14))
@@ -319,13 +316,20 @@ def main_window():
             short_break = int(short_break_entry.get()) * 60
             long_break = int(long_break_entry.get()) * 60
             cycles = int(cycles_entry.get())
+            if not active_tasks and not selected_task.get():
+                messagebox.showwarning("No Tasks", "Please add at least one task before starting.")
+                return
             if not selected_task.get():
                 messagebox.showwarning("No Task Selected", "Please select a task to start.")
                 return
+            # The engine only studies listed tasks, so a task typed into the box is added first
+            if selected_task.get() not in [task[0] for task in active_tasks]:
+                add_active_task(selected_task.get(), tasks_menu)
 
             timer_settings_frame.pack_forget()
             start_pomodoro_button.pack_forget()
             add_task_button.pack_forget()
+            import_tasks_button.pack_forget()
             session_label.config(text="Study Time")
             session_label.pack(pady=10)
             timer_label.config(text="00:00")
@@ -341,7 +345,16 @@ def main_window():
                                       width=20)
     start_pomodoro_button.pack(pady=10)
     root.geometry("400x500")
+    root.after_idle(model_registry.startup_report, "scratch_1.py")
+    root.after_idle(model_registry.warm_up, [backend_name(), "english_words"])
+
+    # Train a first model from logged history if none has been published yet
+    if not recommender.current_version(trainer.TYPE_MODEL_PREFIX):
+        root.after_idle(type_trainer.request)
     root.mainloop()
+    screen_tracker.stop()
+    focus_sampler.stop()
+    type_trainer.shutdown()
 
 
 # Run the main application
@@ -0,0 +1,191 @@
+import random
+import time
+from collections import defaultdict
+
+STUDY = "Study"
+SHORT_BREAK = "Short Break"
+LONG_BREAK = "Long Break"
+
+
+class PomodoroEngine:
+    """UI-free Pomodoro state machine shared by the Tk front-ends, tests, the CLI and simulators.
+
+    Study sessions alternate with short breaks, and every `cycles`-th study session is followed by a
+    long break. Front-ends feed it events (start, expire, finish_study, end_task, ...) and subscribe
+    to what happens next with on():
+
+        "task_started"  (task)                      a task was loaded for its first study session
+        "phase"         (phase, duration, cycle)    a study or break phase started; duration in seconds
+        "cycle"         (task, seconds)             a study session ran to the end
+        "task"          (task, status, duration)    a task attempt ended; status is completed/not_completed
+        "finished"      ()                          no tasks or sessions left
+
+    The engine never sleeps: whoever owns the clock calls expire() when a phase's time is up.
+    """
+
+    def __init__(self, break_time, long_break_time, cycles, study_time_for=None, session_limit=None,
+                 clock=time.monotonic):
+        self.break_time = break_time
+        self.long_break_time = long_break_time
+        self.cycles = max(1, cycles)
+        self.study_time_for = study_time_for or self.task_study_time
+        self.session_limit = session_limit  # Stop after this many study sessions (None = until tasks run out)
+        self.clock = clock
+        self.tasks = []  # [(task name, study seconds)] still to do, current task first
+        self.completed_tasks = []
+        self.current_task = None
+        self.phase = None
+        self.phase_duration = 0
+        self.cycle = 1
+        self.study_sessions = 0
+        self.task_started_at = None
+        self.finished = False
+        self.listeners = defaultdict(list)
+
+    def on(self, event, callback):
+        self.listeners[event].append(callback)
+        return self
+
+    def _emit(self, event, *args):
+        for callback in self.listeners[event]:
+            callback(*args)
+
+    # ---------- tasks ----------
+
+    def add_task(self, task_name, study_seconds):
+        self.tasks.append((task_name, study_seconds))
+
+    def task_study_time(self, task_name):
+        for name, study_seconds in self.tasks:
+            if name == task_name:
+                return study_seconds
+        return 0
+
+    def start(self, task_name=None):
+        """Loads the first task (or `task_name`) and starts its first study session."""
+        self.finished = False
+        self.study_sessions = 0
+        self._load_task(task_name)
+
+    def change_task(self, task_name, study_seconds=None):
+        """Switches to another task mid-session and restarts the study timer with its time."""
+        self.current_task = task_name
+        self.task_started_at = self.clock()
+        self._enter(STUDY, self.task_study_time(task_name) if study_seconds is None else study_seconds)
+
+    def end_task(self, completed):
+        """Logs the current task's attempt and loads the next task (or the same one again if not completed)."""
+        self._log_task(completed)
+        self._load_task()
+
+    def _load_task(self, task_name=None):
+        if not self.tasks:
+            self._finish()
+            return
+        names = [name for name, _ in self.tasks]
+        self.current_task = task_name if task_name in names else names[0]
+        self.cycle = 1
+        self.task_started_at = self.clock()
+        self._emit("task_started", self.current_task)
+        self._enter(STUDY, self.task_study_time(self.current_task))
+
+    def _log_task(self, completed):
+        task_name = self.current_task
+        actual_duration = int(self.clock() - self.task_started_at)
+        if completed:
+            self.completed_tasks.append(task_name)
+            self.tasks = [task for task in self.tasks if task[0] != task_name]
+        self._emit("task", task_name, "completed" if completed else "not_completed", actual_duration)
+
+    # ---------- phases ----------
+
+    def _enter(self, phase, duration):
+        self.phase = phase
+        self.phase_duration = duration
+        self._emit("phase", phase, duration, self.cycle)
+
+    def expire(self):
+        """The current phase's time is up: study goes to a break, a break back to study."""
+        if self.phase == STUDY:
+            self.finish_study()
+        elif self.phase is not None:
+            self.finish_break()
+
+    def finish_study(self, extend=False, task_completed=False):
+        """Ends a study session; `extend` repeats it, `task_completed` logs the task and moves to the next one.
+
+        Extensions don't count against `session_limit`, so extending the last session still extends it.
+        """
+        self._emit("cycle", self.current_task, self.phase_duration)
+        if task_completed:
+            self._log_task(True)
+            if not self.tasks:
+                self._finish()
+                return
+            self.current_task = self.tasks[0][0]
+            self.task_started_at = self.clock()
+        if extend:
+            self._enter(STUDY, self.phase_duration)
+            return
+        self.study_sessions += 1
+        if self.session_limit is not None and self.study_sessions >= self.session_limit:
+            self._finish()
+        elif self.cycle < self.cycles:
+            self.cycle += 1
+            self._enter(SHORT_BREAK, self.break_time)
+        else:
+            self.cycle = 1
+            self._enter(LONG_BREAK, self.long_break_time)
+
+    def finish_break(self):
+        self._enter(STUDY, self.study_time_for(self.current_task))
+
+    def _finish(self):
+        self.phase = None
+        self.finished = True
+        self._emit("finished")
+
+
+class VirtualClock:
+    """Clock for simulations: time only moves when advance() is called."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def simulate_sessions(count, tasks_per_session=3, seed=None):
+    """Runs `count` simulated days through the engine without any UI; returns the logged task attempts.
+
+    Each row is (task, status, duration, study_time, break_time, long_break_time) with times in
+    seconds, the same shape the session store and the recommender train on.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        clock = VirtualClock()
+        break_time = rng.choice((5, 10)) * 60
+        long_break_time = rng.choice((15, 20, 30)) * 60
+        engine = PomodoroEngine(break_time, long_break_time, rng.randint(2, 4), clock=clock)
+        study_times = {}
+        for i in range(tasks_per_session):
+            study_times[f"task-{i}"] = rng.choice((15, 25, 45, 50)) * 60
+            engine.add_task(f"task-{i}", study_times[f"task-{i}"])
+        engine.on("task", lambda task, status, duration: rows.append(
+            (task, status, duration, study_times[task], break_time, long_break_time)))
+
+        engine.start()
+        while not engine.finished:
+            if engine.phase == STUDY and rng.random() < 0.3:
+                # The user ends the task partway through a study session
+                clock.advance(rng.uniform(0, engine.phase_duration))
+                engine.end_task(rng.random() < 0.8)
+            else:
+                clock.advance(engine.phase_duration)
+                engine.expire()
+    return rows
@@ -0,0 +1,259 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+from datetime import datetime
+
+DB_PATH = "sessions.db"
+
+# Legacy files written by the three front-ends before the session store existed
+LEGACY_TASKS_JSON = "tasks.json"
+LEGACY_TASKS_PKL = "tasks.pkl"
+LEGACY_TASK_TIMES_PKL = "task_times.pkl"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    name TEXT PRIMARY KEY,
+    study_time INTEGER,
+    break_time INTEGER,
+    long_break_time INTEGER,
+    cycles INTEGER,
+    completed INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    total_time INTEGER NOT NULL DEFAULT 0,
+    last_completed TEXT
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    logged_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_task ON sessions (task, status);
+CREATE TABLE IF NOT EXISTS catalog (
+    name TEXT PRIMARY KEY,
+    task_type TEXT,
+    recommended_time INTEGER,
+    added_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_TASK_COLUMNS = ("name", "study_time", "break_time", "long_break_time", "cycles", "completed", "attempts",
+                 "total_time", "last_completed")
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SessionStore:
+    """Append-only session log in SQLite (WAL mode) with per-task counters indexed by name."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # ---------- writes: one indexed upsert plus one append per event ----------
+
+    def log_session(self, task_name, status, duration, settings=None, logged_at=None):
+        """Appends one session and bumps the task's counters; returns the new session id."""
+        logged_at = logged_at or _now()
+        settings = settings or {}
+        completed = 1 if status == "completed" else 0
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO tasks (name, study_time, break_time, long_break_time, cycles) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (task_name, settings.get("study_time"), settings.get("break_time"),
+                 settings.get("long_break_time"), settings.get("cycles")))
+            self.conn.execute(
+                "UPDATE tasks SET attempts = attempts + 1, completed = completed + ?, "
+                "total_time = total_time + ?, last_completed = ? WHERE name = ?",
+                (completed, duration if completed else 0, logged_at, task_name))
+            cursor = self.conn.execute(
+                "INSERT INTO sessions (task, status, duration, logged_at) VALUES (?, ?, ?, ?)",
+                (task_name, status, int(duration), logged_at))
+            return cursor.lastrowid
+
+    def add_catalog_task(self, task_name, task_type, recommended_time):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO catalog (name, task_type, recommended_time, added_at) VALUES (?, ?, ?, ?)",
+                (task_name, task_type, recommended_time, _now()))
+
+    def add_catalog_tasks(self, rows):
+        """Bulk version of add_catalog_task for (name, task type, recommended time) rows, in one transaction."""
+        with self.lock, self.conn:
+            self._insert_catalog(rows)
+
+    def _insert_catalog(self, rows):
+        added_at = _now()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO catalog (name, task_type, recommended_time, added_at) VALUES (?, ?, ?, ?)",
+            [(name, task_type, recommended_time, added_at) for name, task_type, recommended_time in rows])
+
+    def set_meta(self, key, value):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # ---------- reads: all served by primary-key or index lookups ----------
+
+    def get_task(self, task_name):
+        """Returns the task's settings and counters as a dict, or None if it was never logged."""
+        with self.lock:
+            row = self.conn.execute(f"SELECT {', '.join(_TASK_COLUMNS)} FROM tasks WHERE name = ?",
+                                    (task_name,)).fetchone()
+        return dict(zip(_TASK_COLUMNS, row)) if row else None
+
+    def tasks(self):
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {', '.join(_TASK_COLUMNS)} FROM tasks ORDER BY name").fetchall()
+        return [dict(zip(_TASK_COLUMNS, row)) for row in rows]
+
+    def durations(self, task_name, status="completed"):
+        """Actual durations (seconds) logged for a task, oldest first."""
+        with self.lock:
+            rows = self.conn.execute("SELECT duration FROM sessions WHERE task = ? AND status = ? ORDER BY id",
+                                     (task_name, status)).fetchall()
+        return [row[0] for row in rows]
+
+    def sessions_since(self, last_id=0, limit=None):
+        """Sessions appended after `last_id`, as (id, task, status, duration, logged_at) tuples."""
+        query = "SELECT id, task, status, duration, logged_at FROM sessions WHERE id > ? ORDER BY id"
+        params = (last_id,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        with self.lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def session_history(self):
+        """Every logged session as (task, status, duration), oldest first."""
+        with self.lock:
+            return self.conn.execute("SELECT task, status, duration FROM sessions ORDER BY id").fetchall()
+
+    def sessions_logged_since(self, logged_at):
+        """Sessions logged at or after `logged_at`, as (task, status, duration, logged_at) tuples."""
+        with self.lock:
+            return self.conn.execute("SELECT task, status, duration, logged_at FROM sessions WHERE logged_at >= ?",
+                                     (logged_at,)).fetchall()
+
+    def latest_logged_at(self):
+        with self.lock:
+            return self.conn.execute("SELECT MAX(logged_at) FROM sessions").fetchone()[0]
+
+    def study_times(self):
+        """Planned study time (minutes) per task, for tasks that have one."""
+        with self.lock:
+            return dict(self.conn.execute("SELECT name, study_time FROM tasks WHERE study_time IS NOT NULL"))
+
+    def durations_by_type(self, status="completed"):
+        """(task type, duration) pairs for logged sessions whose task is in the catalog."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT catalog.task_type, sessions.duration FROM sessions "
+                "JOIN catalog ON catalog.name = sessions.task WHERE sessions.status = ? ORDER BY sessions.id",
+                (status,)).fetchall()
+
+    def catalog(self):
+        with self.lock:
+            return self.conn.execute("SELECT name, task_type, recommended_time FROM catalog "
+                                     "ORDER BY added_at, name").fetchall()
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    # ---------- one-time import of the legacy whole-file formats ----------
+
+    def _already_migrated(self, path):
+        return self.get_meta(f"migrated:{os.path.abspath(path)}") is not None
+
+    def _mark_migrated(self, path):
+        # Called inside the import's transaction, so a file is never marked without its data or imported twice
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                          (f"migrated:{os.path.abspath(path)}", _now()))
+
+    def migrate_tasks_json(self, path=LEGACY_TASKS_JSON):
+        """Imports main.py's tasks.json: counters as-is, each time adjustment as a completed session."""
+        if not os.path.exists(path) or self._already_migrated(path):
+            return 0
+        with open(path, "r") as file:
+            tasks_data = json.load(file)
+        imported = 0
+        with self.lock, self.conn:
+            for task_name, data in tasks_data.items():
+                adjustments = data.get("time_adjustments", [])
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO tasks (name, study_time, break_time, long_break_time, cycles, "
+                    "completed, attempts, total_time, last_completed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (task_name, data.get("study_time"), data.get("break_time"), data.get("long_break_time"),
+                     data.get("cycles"), data.get("completed", 0), data.get("attempts", 0), sum(adjustments),
+                     data.get("last_completed")))
+                logged_at = data.get("last_completed") or _now()
+                self.conn.executemany(
+                    "INSERT INTO sessions (task, status, duration, logged_at) VALUES (?, 'completed', ?, ?)",
+                    [(task_name, int(duration), logged_at) for duration in adjustments])
+                imported += 1
+            self._mark_migrated(path)
+        return imported
+
+    def migrate_task_times_pkl(self, path=LEGACY_TASK_TIMES_PKL):
+        """Imports scratch_1.py's task_times.pkl ({task name: total seconds})."""
+        if not os.path.exists(path) or self._already_migrated(path):
+            return 0
+        try:
+            with open(path, "rb") as f:
+                task_times = pickle.load(f)
+        except EOFError:
+            task_times = {}
+        with self.lock, self.conn:
+            for task_name, total in task_times.items():
+                self.conn.execute("INSERT OR IGNORE INTO tasks (name) VALUES (?)", (task_name,))
+                self.conn.execute("UPDATE tasks SET total_time = total_time + ? WHERE name = ?",
+                                  (int(total), task_name))
+            self._mark_migrated(path)
+        return len(task_times)
+
+    def migrate_tasks_pkl(self, path=LEGACY_TASKS_PKL):
+        """Imports main_complete.py's tasks.pkl ([(name, type, recommended time), ...])."""
+        if not os.path.exists(path) or self._already_migrated(path):
+            return 0
+        try:
+            with open(path, "rb") as f:
+                tasks = pickle.load(f)
+        except EOFError:
+            tasks = []
+        with self.lock, self.conn:
+            self._insert_catalog(tasks)
+            self._mark_migrated(path)
+        return len(tasks)
+
+    def migrate_legacy_files(self):
+        return {
+            LEGACY_TASKS_JSON: self.migrate_tasks_json(),
+            LEGACY_TASK_TIMES_PKL: self.migrate_task_times_pkl(),
+            LEGACY_TASKS_PKL: self.migrate_tasks_pkl(),
+        }
+
+
+def open_store(path=DB_PATH):
+    """Opens the session store and imports any legacy task files on first run."""
+    store = SessionStore(path)
+    store.migrate_legacy_files()
+    return store
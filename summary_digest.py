@@ -0,0 +1,245 @@
+import queue
+import threading
+from collections import Counter, OrderedDict
+
+import model_registry
+from activity_log import ActivityView
+
+# GPT-2 sees at most 1024 tokens; keep the prompt well inside that and leave room for the answer
+CONTEXT_TOKENS = 1024
+PROMPT_TOKENS = 600
+NEW_TOKENS = 200
+MAX_LINE_CHARS = 160
+# Newest records scanned per cycle; older ones are already represented or cut by the budget
+MAX_RECORDS_PER_CYCLE = 2000
+# Distinct lines kept per window in a cycle's digest
+MAX_LINES_PER_WINDOW = 50
+# Longest gap between two captures counted as focus time; the capture cadence never waits longer
+MAX_CAPTURE_GAP = 120
+
+INSTRUCTION = "\nProvide insights on productivity and any potential areas for improvement.\n"
+
+
+def approx_tokens(text):
+    """Rough GPT-2 token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def _format_duration(seconds):
+    return f"{int(seconds // 60)} min {int(seconds % 60)} sec"
+
+
+class CycleDigest:
+    """Compact record of one study cycle: its distinct OCR lines, capture counts and focus time per window."""
+
+    __slots__ = ("task", "task_type", "time_spent", "groups", "captures", "typing", "focus")
+
+    def __init__(self, task, task_type, time_spent, groups, captures, typing, focus):
+        self.task = task
+        self.task_type = task_type
+        self.time_spent = time_spent
+        self.groups = groups  # {window: [[time, line, repeats]]}, newest first
+        self.captures = captures  # Counter of records per window
+        self.typing = typing  # Counter of records per window with typing detected
+        self.focus = focus  # Counter of seconds per window, each record lasting until the next capture
+
+
+def summarize_cycle(task, time_spent, records, task_type=None, max_records=MAX_RECORDS_PER_CYCLE,
+                    max_lines=MAX_LINES_PER_WINDOW, max_gap=MAX_CAPTURE_GAP):
+    """Builds a cycle's digest from its activity records; run once, when the cycle ends."""
+    records = records.tail(max_records) if isinstance(records, ActivityView) else list(records)[-max_records:]
+    groups = OrderedDict()
+    seen = {}
+    captures, typing, focus = Counter(), Counter(), Counter()
+    # The cadence varies the capture interval, so each record counts until the next one; the last
+    # record is taken to last as long as the one before it
+    timestamps = [record.timestamp for record in records]
+    gaps = [min(later - earlier, max_gap) for earlier, later in zip(timestamps, timestamps[1:])]
+    gaps.append(gaps[-1] if gaps else min(time_spent, max_gap))
+    for record, gap in zip(reversed(records), reversed(gaps)):
+        window = record.window_title
+        captures[window] += 1
+        focus[window] += gap
+        if record.typing:
+            typing[window] += 1
+        for line in record.content.splitlines() or [record.content]:
+            line = line.strip()
+            if not line:
+                continue
+            key = (window, line)
+            if key in seen:
+                seen[key][2] += 1
+                continue
+            entries = groups.setdefault(window, [])
+            if len(entries) >= max_lines:
+                continue
+            if len(line) > MAX_LINE_CHARS:
+                line = line[:MAX_LINE_CHARS - 3] + "..."
+            entry = [record.captured_at.strftime('%H:%M:%S'), line, 1]
+            seen[key] = entry
+            entries.append(entry)
+    return CycleDigest(task, task_type, time_spent, groups, captures, typing, focus)
+
+
+def _merge_groups(cycles):
+    """One {window: entries} for several cycles of a task, newest cycle first."""
+    groups = OrderedDict()
+    for cycle in reversed(cycles):
+        for window, entries in cycle.groups.items():
+            groups.setdefault(window, []).extend(entries)
+    return groups
+
+
+def build_prompt(cycles, token_budget=PROMPT_TOKENS, count_tokens=approx_tokens):
+    """Merges cycle digests into a prompt of at most `token_budget` tokens.
+
+    Cycles of the same task share one header line. Headers are paid for first, from at most half the
+    budget; tasks whose header no longer fits are folded into a single "more tasks" line. What's left is
+    shared between tasks and, within a task, handed out round-robin across windows so one busy
+    window can't crowd the others out.
+    """
+    header = "Summarize the user's productivity session based on the following data:\n\n"
+    lines = [header]
+    budget = token_budget - count_tokens(header) - count_tokens(INSTRUCTION)
+    tasks = OrderedDict()
+    for cycle in cycles:
+        tasks.setdefault(cycle.task, []).append(cycle)
+
+    # Headers (each with room for its "more lines" note) get at most half the budget, less the
+    # line that stands in for the tasks that don't fit
+    omitted_cost = count_tokens("  (+99999 more lines)\n")
+    more_cost = count_tokens("(+99999 more tasks, Time Spent: 99999 min 59 sec)\n")
+    header_budget = budget // 2 - more_cost
+    shown = []
+    for task, task_cycles in tasks.items():
+        task_line = f"Task: {task}, Time Spent: {_format_duration(sum(c.time_spent for c in task_cycles))}\n"
+        cost = count_tokens(task_line) + omitted_cost
+        # The last task can use the room kept for the "more tasks" line
+        if cost > header_budget + (more_cost if len(shown) + 1 == len(tasks) else 0):
+            break
+        header_budget -= cost
+        budget -= cost
+        shown.append((task_line, task_cycles))
+    hidden = list(tasks.values())[len(shown):]
+    if hidden:
+        budget -= more_cost
+
+    for index, (task_line, task_cycles) in enumerate(shown):
+        lines.append(task_line)
+        # Split what's left evenly among this and the remaining tasks
+        task_budget = max(0, budget // (len(shown) - index))
+        spent, omitted = 0, 0
+        queues = [(window, iter(entries)) for window, entries in _merge_groups(task_cycles).items()]
+        window_lines = OrderedDict((window, []) for window, _ in queues)
+        while queues:
+            window, entries = queues.pop(0)
+            entry = next(entries, None)
+            if entry is None:
+                continue
+            time_str, text, repeats = entry
+            line = f"    - {time_str}: {text}" + (f" (x{repeats})" if repeats > 1 else "") + "\n"
+            cost = count_tokens(line)
+            if not window_lines[window]:
+                cost += count_tokens(f"  Window: {window}\n")
+            if spent + cost > task_budget:
+                omitted += 1 + sum(1 for _ in entries)
+                continue
+            spent += cost
+            window_lines[window].append(line)
+            queues.append((window, entries))
+
+        for window, entries in window_lines.items():
+            if entries:
+                lines.append(f"  Window: {window}\n")
+                lines.extend(entries)
+        if omitted:
+            lines.append(f"  (+{omitted} more lines)\n")
+        budget -= spent
+    if hidden:
+        seconds = sum(cycle.time_spent for task_cycles in hidden for cycle in task_cycles)
+        lines.append(f"(+{len(hidden)} more tasks, Time Spent: {_format_duration(seconds)})\n")
+    lines.append(INSTRUCTION)
+    return "".join(lines)
+
+
+class SessionDigest:
+    """Rolling digest of a session: each cycle is summarized once as it ends, so the end-of-session
+    summary only merges per-cycle digests and takes the same time after one cycle or a whole day."""
+
+    def __init__(self):
+        self.cycles = []
+
+    def add_cycle(self, task, time_spent, records, task_type=None):
+        cycle = summarize_cycle(task, time_spent, records, task_type)
+        self.cycles.append(cycle)
+        return cycle
+
+    def prompt(self, token_budget=PROMPT_TOKENS, count_tokens=approx_tokens):
+        return build_prompt(self.cycles, token_budget, count_tokens)
+
+    def task_times(self, by_type=False):
+        totals = OrderedDict()
+        for cycle in self.cycles:
+            key = cycle.task_type if by_type else cycle.task
+            totals[key] = totals.get(key, 0) + cycle.time_spent
+        return totals
+
+
+class SummaryStream:
+    """Generates a summary on a worker thread, streaming text chunks through a queue.
+
+    The UI drains it with poll() from its own thread; None in the queue marks the end.
+    """
+
+    def __init__(self, prompt, max_new_tokens=NEW_TOKENS):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.chunks = queue.Queue()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="summary-generation", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        try:
+            import torch
+            from transformers import TextIteratorStreamer
+            generator = model_registry.get("gpt2")
+            tokenizer = generator.tokenizer
+            # The digest is sized by an estimate; this only guards GPT-2's hard context limit. Cut from
+            # the middle of the digest, so the instruction at the end of the prompt always survives
+            ids = tokenizer(self.prompt)["input_ids"]
+            limit = CONTEXT_TOKENS - self.max_new_tokens
+            if len(ids) > limit:
+                tail = len(tokenizer(INSTRUCTION)["input_ids"])
+                ids = ids[:limit - tail] + ids[-tail:]
+            # GPT-2 has no pad token, so build the single unpadded row directly rather than through pad()
+            input_ids = torch.tensor([ids])
+            inputs = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+            streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+            worker = threading.Thread(target=generator.model.generate, kwargs=dict(
+                inputs, max_new_tokens=self.max_new_tokens, do_sample=True, top_p=0.9, streamer=streamer,
+                pad_token_id=tokenizer.eos_token_id), daemon=True)
+            worker.start()
+            for text in streamer:
+                self.chunks.put(text)
+            worker.join()
+        except Exception as e:
+            self.error = e
+            self.chunks.put(f"\n[Summary generation failed: {e}]")
+        finally:
+            self.chunks.put(None)
+
+    def poll(self):
+        """Returns (text that arrived since the last call, finished)."""
+        parts = []
+        while True:
+            try:
+                chunk = self.chunks.get_nowait()
+            except queue.Empty:
+                return "".join(parts), False
+            if chunk is None:
+                return "".join(parts), True
+            parts.append(chunk)
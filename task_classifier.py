@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import model_registry
+
+# Lemmas that mark a task as Learning or Creative; everything else is Administrative
+LEARNING_LEMMAS = frozenset(["study", "learn", "research", "read"])
+CREATIVE_LEMMAS = frozenset(["build", "write", "create", "design"])
+DEFAULT_TYPE = "Administrative"
+
+CACHE_SIZE = 4096
+BATCH_SIZE = 256
+
+# Precomputed word form -> task type table (see build_lemma_table.py), used instead of spaCy in fast mode
+LEMMA_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "task_lemmas.json")
+FAST_MODE = os.environ.get("POMODORO_FAST_CLASSIFIER", "0") == "1"
+
+_WORD = re.compile(r"[a-z]+")
+
+_cache = OrderedDict()  # Normalized task name -> task type, least recently used first
+_cache_lock = threading.Lock()
+
+
+def normalize(task_name):
+    return " ".join(task_name.lower().split())
+
+
+def type_from_lemmas(lemmas):
+    for lemma in lemmas:
+        if lemma in LEARNING_LEMMAS:
+            return "Learning"
+        elif lemma in CREATIVE_LEMMAS:
+            return "Creative"
+    return DEFAULT_TYPE
+
+
+def load_lemma_table(path=LEMMA_TABLE_PATH):
+    """Returns (forms, ambiguous): word form -> task type for forms whose lemma never depends on context,
+    and word form -> context rules for forms like "reading" that spaCy lemmatizes by context (see
+    resolve_ambiguous)."""
+    with open(path, encoding="utf-8") as f:
+        table = json.load(f)
+    return table["forms"], table["ambiguous"]
+
+
+model_registry.register("lemma_table", load_lemma_table)
+
+
+def resolve_ambiguous(rules, next_word, first):
+    """Task type (or None) of a context-dependent form: by the word after it if the table has a rule
+    for that word ("reading list"), otherwise by whether it starts the name ("reading chapter 3")."""
+    before = rules.get("before", {})
+    if next_word in before:
+        return before[next_word]
+    return rules["first"] if first else rules["other"]
+
+
+def classify_with_table(key, table):
+    """Applies the lemma rule to a normalized name by dictionary lookups, without spaCy."""
+    forms, ambiguous = table
+    words = _WORD.findall(key)
+    for index, word in enumerate(words):
+        if word in ambiguous:
+            next_word = words[index + 1] if index + 1 < len(words) else None
+            task_type = resolve_ambiguous(ambiguous[word], next_word, index == 0)
+        else:
+            task_type = forms.get(word)
+        if task_type is not None:
+            return task_type
+    return DEFAULT_TYPE
+
+
+_load_errors = {}  # Backend name -> the error its load failed with; not retried until restart
+
+
+def _load(name):
+    """The named backend, or None if it can't be loaded; a failure is reported once and remembered."""
+    if name in _load_errors:
+        return None
+    try:
+        return model_registry.get(name)
+    except Exception as e:
+        _load_errors[name] = e
+        print(f"Could not load '{name}' for task classification: {e}")
+        return None
+
+
+def _remember(key, task_type):
+    with _cache_lock:
+        _cache[key] = task_type
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _cached(key):
+    with _cache_lock:
+        task_type = _cache.get(key)
+        if task_type is not None:
+            _cache.move_to_end(key)
+        return task_type
+
+
+def classify_task_types(task_names, batch_size=BATCH_SIZE, fast=None):
+    """Classifies many task names at once; names seen before come from the cache, the rest go
+    through the lemma table (fast mode, which never loads spaCy) or nlp.pipe in batches. Returns
+    the types in the same order as `task_names`."""
+    fast = FAST_MODE if fast is None else fast
+    keys = [normalize(task_name) for task_name in task_names]
+    types = {}
+    misses = []
+    for key in keys:
+        if key in types:
+            continue
+        task_type = _cached(key)
+        if task_type is None:
+            misses.append(key)
+            types[key] = None
+        else:
+            types[key] = task_type
+    if not misses:
+        return [types[key] for key in keys]
+    table = _load("lemma_table") if fast else None
+    if table is not None:
+        for key in misses:
+            types[key] = classify_with_table(key, table)
+            _remember(key, types[key])
+    else:
+        nlp = _load("spacy")
+        if nlp is None:
+            return [types[key] or DEFAULT_TYPE for key in keys]
+        for key, doc in zip(misses, nlp.pipe(misses, batch_size=batch_size)):
+            types[key] = type_from_lemmas(token.lemma_ for token in doc)
+            _remember(key, types[key])
+    return [types[key] for key in keys]
+
+
+# NLP-based task classification
+def classify_task_type(task_name):
+    return classify_task_types([task_name])[0]
+
+
+def backend_name():
+    """Registry name of the backend classification loads, for warm-up lists."""
+    return "lemma_table" if FAST_MODE else "spacy"
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def cache_info():
+    with _cache_lock:
+        return {"entries": len(_cache), "max_entries": CACHE_SIZE}
@@ -0,0 +1,32 @@
+import model_registry
+import recommender
+import trainer
+
+# Default times until a model trained on real sessions has been published
+DEFAULT_TASK_TIMES = {"Learning": 1800, "Creative": 2400, "Administrative": 1200}
+
+# Serve the latest published model as (version, NumpyRecommender); training happens in trainer.py
+model_registry.register("type_recommender", lambda: recommender.load_published(trainer.TYPE_MODEL_PREFIX))
+
+# Memoized predictions per (model version, task type)
+prediction_cache = {}
+
+
+# Called from the trainer's worker thread when a new model version has been published
+def on_model_published(version):
+    model_registry.replace("type_recommender", recommender.load_published(trainer.TYPE_MODEL_PREFIX))
+    prediction_cache.clear()
+    print(f"Published task-type model v{version}")
+
+
+# Predict time for task type using the current published model (never trains)
+def predict_time(task_type):
+    version, model = model_registry.get("type_recommender")
+    key = (version, task_type)
+    if key not in prediction_cache:
+        if model is None:
+            prediction_cache[key] = DEFAULT_TASK_TIMES[task_type]
+        else:
+            minutes = model.predict_one([trainer.TYPE_CODES[task_type]])
+            prediction_cache[key] = max(60, int(minutes * 60))
+    return prediction_cache[key]
@@ -0,0 +1,68 @@
+import datetime
+import threading
+
+from activity_log import ActivityLog
+
+START = datetime.datetime(2026, 1, 1, 10, 0, 0)
+
+
+def fill(log, count, first=0):
+    for i in range(first, first + count):
+        log.append(START + datetime.timedelta(seconds=i), f"text {i}", f"Window {i % 2}")
+
+
+def test_oldest_records_are_evicted_and_views_keep_their_slice():
+    log = ActivityLog(max_records=5)
+    fill(log, 3)
+    first_cycle = log.view(0)
+    second = log.mark()
+    fill(log, 5, first=3)
+    second_cycle = log.view(second)
+
+    assert len(log) == 5 and log.mark() == 8
+    assert [record.seq for record in log] == [3, 4, 5, 6, 7]
+    assert list(first_cycle) == []  # Its records have all been evicted
+    assert [record.content for record in second_cycle] == ["text 3", "text 4", "text 5", "text 6", "text 7"]
+    assert [record.seq for record in second_cycle.tail(2)] == [6, 7]
+    assert [record.seq for record in log.between(2, 5)] == [3, 4]
+    assert log.between(8) == [] and log.between(6, 6) == []
+
+
+def test_view_is_not_extended_by_later_records():
+    log = ActivityLog()
+    fill(log, 2)
+    view = log.view(0)
+    fill(log, 2, first=2)
+    assert len(view) == 2 and [record.seq for record in view] == [0, 1]
+    assert ActivityLog().between(0) == []
+
+
+def test_repeated_text_and_titles_share_one_string():
+    log = ActivityLog()
+    text = "".join(["same ", "screen"])  # Built at runtime so it isn't a shared constant
+    log.append(START, text, "".join(["Edi", "tor"]))
+    log.append(START, "".join(["same ", "screen"]), "".join(["Edi", "tor"]))
+    log.append(START, "other screen", "Editor")
+    log.append(START, "".join(["same ", "screen"]), "Editor")
+    records = list(log)
+    assert records[1].content is records[0].content
+    assert records[3].content is not records[0].content  # Only the previous record is compared
+    assert records[0].window_title is records[1].window_title is records[2].window_title
+
+
+def test_records_keep_whole_second_timestamps():
+    log = ActivityLog()
+    log.append(START.replace(microsecond=900000), "text", typing=1)
+    record = next(iter(log))
+    assert record.captured_at == START
+    assert record.window_title == "Unknown" and record.typing is True
+
+
+def test_concurrent_appends_get_unique_consecutive_seqs():
+    log = ActivityLog(max_records=100000)
+    threads = [threading.Thread(target=fill, args=(log, 2000, 2000 * n)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [record.seq for record in log] == list(range(8000))
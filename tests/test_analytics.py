@@ -0,0 +1,89 @@
+import math
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+import analytics
+import session_store
+
+
+def naive_task_stats(rows, planned_minutes):
+    """Per-task stats from (task, status, duration) rows with plain Python, tasks in order of first appearance."""
+    by_task = {}
+    for task, status, duration in rows:
+        by_task.setdefault(task, []).append((status, duration))
+    stats = []
+    for task, attempts in by_task.items():
+        done = sorted(duration for status, duration in attempts if status == "completed")
+        mean = statistics.fmean(done) if done else math.nan
+        planned = planned_minutes.get(task, math.nan) * 60
+        stats.append((task, len(attempts), len(done), len(done) / len(attempts), mean,
+                      float(np.quantile(done, 0.5)) if done else math.nan,
+                      float(np.quantile(done, 0.9)) if done else math.nan,
+                      mean - planned, mean / planned if planned else math.nan))
+    return stats
+
+
+def assert_rows_equal(actual, expected):
+    assert len(actual) == len(expected)
+    for got, want in zip(actual, expected):
+        assert got[:3] == want[:3]
+        assert list(got[3:]) == pytest.approx(list(want[3:]), nan_ok=True)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_group_quantiles_match_numpy_per_group(seed):
+    rng = np.random.default_rng(seed)
+    groups = 12
+    codes = rng.integers(0, groups - 2, size=500)  # The last two groups stay empty
+    values = rng.integers(60, 3600, size=500).astype(np.float64)
+    quantiles = (0.0, 0.25, 0.5, 0.9, 1.0)
+    result = analytics._group_quantiles(codes, values, groups, quantiles)
+    for group in range(groups):
+        members = values[codes == group]
+        if len(members):
+            assert result[group] == pytest.approx(np.quantile(members, quantiles))
+        else:
+            assert np.isnan(result[group]).all()
+
+
+def test_task_stats_match_a_naive_group_by(tmp_path):
+    rng = random.Random(0)
+    store = session_store.SessionStore(str(tmp_path / "sessions.db"))
+    planned = {f"task-{i}": rng.choice((25, 30, 45)) for i in range(0, 20, 2)}  # Odd tasks have no plan
+    rows = []
+    for _ in range(400):
+        task = f"task-{rng.randrange(20)}"
+        status = "completed" if rng.random() < 0.6 else "not_completed"
+        rows.append((task, status, rng.randint(60, 3600)))
+        store.log_session(*rows[-1], {"study_time": planned.get(task)})
+    rows.append(("never done", "not_completed", 0))
+    store.log_session(*rows[-1])
+
+    history = analytics.load_history(store)
+    store.close()
+    stats = analytics.task_stats(history)
+    assert_rows_equal(stats, naive_task_stats(rows, planned))
+    never_done = stats[-1]
+    assert never_done.completed == 0 and math.isnan(never_done.median)
+
+
+def test_task_stats_of_an_empty_history(tmp_path):
+    store = session_store.SessionStore(str(tmp_path / "sessions.db"))
+    assert analytics.task_stats(analytics.load_history(store)) == []
+    store.close()
+
+
+def test_window_focus_sums_seconds_longest_first():
+    rng = random.Random(0)
+    windows = [rng.choice("ABCDE") for _ in range(200)]
+    seconds = [rng.choice((10, 15.5, 120)) for _ in windows]
+    totals = {}
+    for window, value in zip(windows, seconds):
+        totals[window] = totals.get(window, 0) + value
+    focus = analytics.window_focus(windows, seconds)
+    assert dict(focus) == pytest.approx(totals)
+    assert [value for _, value in focus] == sorted(totals.values(), reverse=True)
+    assert analytics.window_focus([], []) == []
@@ -0,0 +1,16 @@
+import pytest
+
+import capture_service
+
+
+@pytest.mark.parametrize("budget", [0, -5])
+def test_cadence_rejects_a_budget_that_isnt_positive(budget):
+    with pytest.raises(ValueError):
+        capture_service.AdaptiveCadence(min_interval=2, max_interval=30, cpu_budget=budget)
+
+
+def test_cadence_stays_within_its_cpu_budget():
+    cadence = capture_service.AdaptiveCadence(min_interval=2, max_interval=30, cpu_budget=10)
+    # 0.5 CPU seconds per frame at 10% of a core needs at least 5 seconds between frames
+    assert cadence.observe(1.0, 0.5, now=0.0) == 5.0
+    assert cadence.worker_cpu_seconds() == 0.0
@@ -0,0 +1,76 @@
+import datetime
+
+import pytest
+
+import columnar_export
+import session_store
+from activity_log import ActivityLog
+
+pytest.importorskip("pyarrow")
+
+SETTINGS = {"study_time": 25, "break_time": 5, "long_break_time": 15, "cycles": 4}
+
+
+@pytest.fixture
+def stores(tmp_path):
+    source = session_store.SessionStore(str(tmp_path / "source.db"))
+    target = session_store.SessionStore(str(tmp_path / "target.db"))
+    yield source, target
+    source.close()
+    target.close()
+
+
+def test_export_and_read_round_trip(tmp_path, stores):
+    source, _ = stores
+    source.log_session("Essay", "completed", 1500, SETTINGS, logged_at="2026-01-01 09:00:00")
+    source.log_session("Essay", "not_completed", 300, SETTINGS, logged_at="2026-01-02 09:00:00")
+    source.log_session("Reading", "completed", 600, SETTINGS, logged_at="2026-01-02 10:00:00")
+    log = ActivityLog()
+    log.append(datetime.datetime(2026, 1, 2, 9, 0, 5), "chapter one", "Editor", True)
+    log.append(datetime.datetime(2026, 1, 2, 9, 0, 15), "chapter one", "Editor")
+
+    exporter = columnar_export.ColumnarExporter(str(tmp_path / "exports"))
+    assert exporter.export_sessions(source) == 3
+    assert exporter.export_sessions(source) == 0  # Resumes from the cursor
+    assert exporter.export_tasks(source) == 2
+    assert exporter.export_activity(log) == 2
+
+    sessions = columnar_export.read(exporter.root, columnar_export.SESSIONS).to_pylist()
+    assert [(row["task"], row["status"], row["duration"]) for row in sessions] == [
+        ("Essay", "completed", 1500), ("Essay", "not_completed", 300), ("Reading", "completed", 600)]
+    day = columnar_export.read(exporter.root, columnar_export.SESSIONS, start="2026-01-02", columns=["id"])
+    assert day.num_rows == 2 and day.column_names == ["id"]
+    tasks = {row["name"]: row for row in columnar_export.read(exporter.root, columnar_export.TASKS).to_pylist()}
+    assert tasks["Essay"]["study_time"] == 25 and tasks["Essay"]["attempts"] == 2
+    activity = columnar_export.read(exporter.root, columnar_export.ACTIVITY).to_pylist()
+    assert [(row["window_title"], row["typing"]) for row in activity] == [("Editor", True), ("Editor", False)]
+
+
+def test_import_restores_history_once(tmp_path, stores):
+    source, target = stores
+    for hour in range(3):
+        source.log_session("Essay", "completed", 1500, SETTINGS, logged_at=f"2026-01-01 0{hour}:00:00")
+    exporter = columnar_export.ColumnarExporter(str(tmp_path / "exports"))
+    exporter.export_sessions(source)
+    exporter.export_tasks(source)
+
+    assert columnar_export.import_sessions(exporter.root, target) == 3
+    assert columnar_export.import_sessions(exporter.root, target) == 0
+    assert target.session_history() == source.session_history()
+    assert target.get_task("Essay")["study_time"] == 25
+
+
+def test_sessions_logged_in_the_same_second_are_not_dropped(tmp_path, stores):
+    source, target = stores
+    exporter = columnar_export.ColumnarExporter(str(tmp_path / "exports"))
+    source.log_session("Essay", "completed", 1500, logged_at="2026-01-01 10:00:00")
+    exporter.export_sessions(source)
+    assert columnar_export.import_sessions(exporter.root, target) == 1
+
+    # Two more in the same second: one identical to the first, one for another task
+    source.log_session("Essay", "completed", 1500, logged_at="2026-01-01 10:00:00")
+    source.log_session("Reading", "completed", 60, logged_at="2026-01-01 10:00:00")
+    exporter.export_sessions(source)
+    assert columnar_export.import_sessions(exporter.root, target) == 2
+    assert sorted(target.session_history()) == sorted(source.session_history())
+    assert columnar_export.import_sessions(exporter.root, target) == 0
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("pytesseract")
+if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+    # pyautogui needs a display at import; the gate never calls it
+    sys.modules.setdefault("pyautogui", mock.MagicMock(name="pyautogui"))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+import ocr_pipeline  # noqa: E402
+
+WIDTH, HEIGHT, LINE_HEIGHT = 1920, 1080, 24
+
+
+def screen(lines):
+    image = Image.new("L", (WIDTH, HEIGHT), 255)
+    draw = ImageDraw.Draw(image)
+    for row, line in enumerate(lines):
+        draw.text((20, row * LINE_HEIGHT), line, fill=0)
+    return image
+
+
+def fake_ocr(crop):
+    return [(LINE_HEIGHT // 2, "line")]
+
+
+def code_lines():
+    return [f"    result_{row} = compute(values[{row}], offset={row * 3})  # step {row}" for row in range(45)]
+
+
+def test_one_changed_line_is_ocrd():
+    gate = ocr_pipeline.FrameGate()
+    lines = code_lines()
+    gate.process(screen(lines), ocr=fake_ocr)
+
+    lines[20] = "    result_20 = compute(values[20], offset=61)  # edited"
+    plan = gate.plan(screen(lines))
+    assert plan is not None
+    band = int(20 * LINE_HEIGHT / (HEIGHT / gate.bands))
+    assert band in plan.bands
+    assert len(plan.bands) == 1
+
+
+def test_unchanged_frame_is_skipped():
+    gate = ocr_pipeline.FrameGate()
+    frame = screen(code_lines())
+    gate.process(frame, ocr=fake_ocr)
+    assert gate.plan(frame.copy()) is None
+
+
+def test_bands_stay_dirty_until_they_are_applied():
+    gate = ocr_pipeline.FrameGate()
+    lines = code_lines()
+    gate.process(screen(lines), ocr=fake_ocr)
+
+    lines[5] = "    edited = True"
+    frame = screen(lines)
+    first = gate.plan(frame)
+    # OCR of `first` failed, so it was cancelled instead of applied: the same bands are planned again
+    gate.cancel(first)
+    second = gate.plan(frame)
+    assert second is not None and second.bands == first.bands
+    gate.apply(second, [fake_ocr(crop) for _, _, _, crop in second.runs])
+    assert gate.plan(frame) is None
+
+
+def test_bands_being_ocrd_are_not_planned_again():
+    gate = ocr_pipeline.FrameGate()
+    lines = code_lines()
+    gate.process(screen(lines), ocr=fake_ocr)
+
+    lines[5] = "    edited = True"
+    first = gate.plan(screen(lines))
+    lines[30] = "    also_edited = True"
+    second = gate.plan(screen(lines))
+    assert second is not None and not set(second.bands) & set(first.bands)
+    gate.apply(first, [fake_ocr(crop) for _, _, _, crop in first.runs])
+    gate.apply(second, [fake_ocr(crop) for _, _, _, crop in second.runs])
+    assert gate.plan(screen(lines)) is None
+
+
+def test_pool_reports_its_worker_pids():
+    pool = ocr_pipeline.OcrWorkerPool(workers=1)
+    try:
+        worker = pool.executor.submit(os.getpid).result(timeout=30)
+        deadline = time.monotonic() + 10
+        while worker not in pool.worker_pids() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert pool.worker_pids() == [worker]
+    finally:
+        pool.shutdown()
@@ -0,0 +1,77 @@
+import itertools
+import types
+
+import pytest
+from PIL import Image
+
+import ocr_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time.time() for the cache, so LRU order doesn't depend on clock resolution."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(ocr_cache, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def entry_size(key, value):
+    return len(key) + len(ocr_cache.json.dumps(value, separators=(",", ":")))
+
+
+def test_values_round_trip_and_stats_count_lookups(tmp_path, clock):
+    cache = ocr_cache.OcrCache(str(tmp_path / "cache.db"))
+    assert cache.get("a") is None
+    cache.put("a", [[12, "first line"], [36, "second"]])
+    assert cache.get("a") == [[12, "first line"], [36, "second"]]
+    assert cache.get("a") is not None
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3, "entries": 1,
+                             "bytes": entry_size("a", [[12, "first line"], [36, "second"]])}
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path, clock):
+    value = "x" * 100
+    cache = ocr_cache.OcrCache(str(tmp_path / "cache.db"), max_bytes=3 * entry_size("a", value))
+    for key in "abc":
+        cache.put(key, value)
+    cache.get("a")  # Now b is the least recently used
+    cache.put("d", value)
+    assert cache.get("b") is None
+    assert all(cache.get(key) == value for key in "acd")
+    cache.put("e", value)  # The reads above left a as the least recently used
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    cache.close()
+
+
+def test_replacing_an_entry_counts_its_size_once(tmp_path, clock):
+    cache = ocr_cache.OcrCache(str(tmp_path / "cache.db"))
+    cache.put("a", "short")
+    cache.put("a", "a longer value")
+    assert cache.stats()["bytes"] == entry_size("a", "a longer value")
+    assert cache.stats()["entries"] == 1
+    cache.close()
+
+
+def test_size_is_recovered_when_reopened(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    cache = ocr_cache.OcrCache(path)
+    cache.put("a", "one")
+    cache.put("b", "two")
+    total = cache.stats()["bytes"]
+    cache.close()
+    cache = ocr_cache.OcrCache(path)
+    assert cache.stats()["bytes"] == total
+    assert cache.get("b") == "two"
+    cache.close()
+
+
+def test_image_key_covers_pixels_size_and_mode():
+    image = Image.new("L", (8, 4), 10)
+    assert ocr_cache.image_key(image) == ocr_cache.image_key(image.copy())
+    changed = image.copy()
+    changed.putpixel((3, 2), 11)
+    keys = {ocr_cache.image_key(candidate) for candidate in (image, changed, Image.new("L", (4, 8), 10),
+                                                             image.convert("RGB"))}
+    assert len(keys) == 4
@@ -0,0 +1,16 @@
+import random
+
+import model_registry
+import ocr_text
+
+
+def test_score_lines_matches_cleaning_line_by_line(monkeypatch):
+    monkeypatch.setitem(model_registry._backends, "english_words", frozenset(["the", "cat", "sat"]))
+    rng = random.Random(0)
+    alphabet = "the cat sat\t#$é.-,\n"
+    for _ in range(2000):
+        lines = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 15))) for _ in range(rng.randint(0, 6))]
+        expected = [line for line in map(ocr_text.clean_ocr_text, lines) if line]
+        words = " ".join(expected).lower().split()
+        english = sum(word in ("the", "cat", "sat") for word in words)
+        assert ocr_text.score_lines(lines) == (expected, english, len(words))
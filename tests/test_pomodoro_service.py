@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+
+import pomodoro_service
+import session_store
+
+TASKS = [{"name": "Essay", "study_time": 25}, {"name": "Reading", "study_time": 10}]
+
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(body)
+
+
+def run_service(tmp_path, client):
+    """Runs `client(port, service)` against an in-process service on an ephemeral loopback port."""
+    async def main():
+        service = pomodoro_service.PomodoroService(session_store.SessionStore(str(tmp_path / "sessions.db")))
+        service.start()
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        try:
+            return await client(server.sockets[0].getsockname()[1], service)
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.stop()
+            service.store.close()
+    return asyncio.run(main())
+
+
+def session_payload(**settings):
+    return dict({"tasks": TASKS, "break_time": 5, "long_break_time": 15, "cycles": 4}, **settings)
+
+
+def test_session_lifecycle(tmp_path):
+    async def client(port, service):
+        status, state = await request(port, "POST", "/sessions", session_payload(start_task="Reading"))
+        assert status == 200
+        assert (state["task"], state["phase"], state["paused"]) == ("Reading", "Study", False)
+        session = f"/sessions/{state['id']}"
+
+        status, state = await request(port, "POST", f"{session}/pause")
+        assert status == 200 and state["paused"]
+        status, state = await request(port, "POST", f"{session}/resume")
+        assert status == 200 and not state["paused"]
+
+        status, state = await request(port, "POST", f"{session}/change_task", {"task": "Essay", "study_time": 1})
+        assert status == 200 and state["task"] == "Essay" and 0 < state["remaining"] <= 60
+
+        status, body = await request(port, "GET", f"{session}/events?since=0")
+        assert status == 200 and body["events"][0]["event"] == "task_started"
+
+        assert (await request(port, "GET", "/stats"))[1]["sessions"] == 1
+        assert await request(port, "DELETE", session) == (200, {"closed": state["id"]})
+        assert (await request(port, "GET", session))[0] == 404
+
+    run_service(tmp_path, client)
+
+
+def test_change_task_without_a_task_is_rejected(tmp_path):
+    async def client(port, service):
+        _, state = await request(port, "POST", "/sessions", session_payload(start_task="Essay"))
+        for payload in ({}, {"task": ""}, {"study_time": 5}):
+            status, body = await request(port, "POST", f"/sessions/{state['id']}/change_task", payload)
+            assert status == 400 and "task" in body["error"]
+        _, after = await request(port, "GET", f"/sessions/{state['id']}")
+        assert after["task"] == "Essay"
+
+    run_service(tmp_path, client)
+
+
+@pytest.mark.parametrize("limit", [-1, 2.5, "3", True, [1]])
+def test_invalid_session_limit_is_rejected(tmp_path, limit):
+    async def client(port, service):
+        status, body = await request(port, "POST", "/sessions", session_payload(session_limit=limit))
+        assert status == 400 and "session_limit" in body["error"]
+        assert not service.sessions
+
+    run_service(tmp_path, client)
+
+
+@pytest.mark.parametrize("limit", [None, 0, 3])
+def test_valid_session_limit_is_passed_to_the_engine(tmp_path, limit):
+    async def client(port, service):
+        status, state = await request(port, "POST", "/sessions", session_payload(session_limit=limit))
+        assert status == 200
+        assert service.sessions[state["id"]].engine.session_limit == limit
+
+    run_service(tmp_path, client)
+
+
+def test_bad_requests(tmp_path):
+    async def client(port, service):
+        assert (await request(port, "POST", "/sessions", {"tasks": []}))[0] == 400
+        assert (await request(port, "POST", "/sessions", session_payload(break_time=-5)))[0] == 400
+        assert (await request(port, "GET", "/nowhere"))[0] == 404
+        _, state = await request(port, "POST", "/sessions", session_payload())
+        assert (await request(port, "POST", f"/sessions/{state['id']}/explode"))[0] == 404
+
+    run_service(tmp_path, client)
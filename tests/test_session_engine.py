@@ -0,0 +1,42 @@
+from session_engine import LONG_BREAK, SHORT_BREAK, STUDY, PomodoroEngine, VirtualClock
+
+
+def make_engine(cycles=2, session_limit=None):
+    engine = PomodoroEngine(300, 900, cycles, session_limit=session_limit, clock=VirtualClock())
+    engine.add_task("write report", 1500)
+    phases = []
+    engine.on("phase", lambda phase, duration, cycle: phases.append((phase, duration)))
+    return engine, phases
+
+
+def test_extending_the_last_session_extends_it():
+    engine, phases = make_engine(cycles=2, session_limit=2)
+    engine.start()
+    engine.finish_study()
+    engine.finish_break()
+
+    engine.finish_study(extend=True)
+    assert not engine.finished
+    assert phases[-1] == (STUDY, 1500)
+
+    engine.finish_study()
+    assert engine.finished
+
+
+def test_session_limit_ends_after_that_many_sessions():
+    engine, phases = make_engine(cycles=4, session_limit=2)
+    engine.start()
+    engine.finish_study()
+    assert phases[-1] == (SHORT_BREAK, 300)
+    engine.finish_break()
+    engine.finish_study()
+    assert engine.finished
+
+
+def test_long_break_after_the_last_cycle():
+    engine, phases = make_engine(cycles=2)
+    engine.start()
+    engine.finish_study()
+    engine.finish_break()
+    engine.finish_study()
+    assert phases[-1] == (LONG_BREAK, 900)
@@ -0,0 +1,33 @@
+import pickle
+
+import pytest
+
+import session_store
+
+
+def write_pickle(path, data):
+    with open(path, "wb") as file:
+        pickle.dump(data, file)
+
+
+def test_task_times_are_imported_once(tmp_path):
+    store = session_store.SessionStore(str(tmp_path / "sessions.db"))
+    path = tmp_path / "task_times.pkl"
+    write_pickle(path, {"Essay": 600})
+    assert store.migrate_task_times_pkl(str(path)) == 1
+    assert store.migrate_task_times_pkl(str(path)) == 0
+    assert store.get_task("Essay")["total_time"] == 600
+    store.close()
+
+
+def test_failed_import_leaves_neither_data_nor_marker(tmp_path):
+    store = session_store.SessionStore(str(tmp_path / "sessions.db"))
+    path = tmp_path / "task_times.pkl"
+    write_pickle(path, {"Essay": 600, "Broken": "not a number"})
+    with pytest.raises(ValueError):
+        store.migrate_task_times_pkl(str(path))
+    assert store.get_task("Essay") is None
+
+    write_pickle(path, {"Essay": 600})
+    assert store.migrate_task_times_pkl(str(path)) == 1
+    store.close()
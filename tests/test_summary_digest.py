@@ -0,0 +1,111 @@
+import datetime
+import sys
+import types
+
+import model_registry
+import summary_digest
+from activity_log import ActivityLog
+
+
+def make_digest(cycles, task_name):
+    log = ActivityLog()
+    digest = summary_digest.SessionDigest()
+    for cycle in range(cycles):
+        start = log.mark()
+        for second in range(30):
+            log.append(datetime.datetime(2026, 1, 1, 10, 0, second), f"line {cycle} {second} of screen text",
+                       f"Window {second % 3}")
+        digest.add_cycle(task_name(cycle), 1500, log.view(start))
+    return digest
+
+
+def test_many_cycles_stay_within_the_budget():
+    prompt = make_digest(100, lambda cycle: f"Task number {cycle}").prompt(600)
+    assert summary_digest.approx_tokens(prompt) <= 600
+    assert "more tasks" in prompt
+    assert prompt.endswith(summary_digest.INSTRUCTION)
+
+
+def test_cycles_of_one_task_share_a_header():
+    prompt = make_digest(100, lambda cycle: f"Task {cycle % 3}").prompt(600)
+    assert summary_digest.approx_tokens(prompt) <= 600
+    assert prompt.count("Task: Task 0,") == 1
+    assert "Time Spent: 850 min 0 sec" in prompt
+
+
+def test_focus_weights_each_capture_by_the_gap_to_the_next():
+    log = ActivityLog()
+    start = datetime.datetime(2026, 1, 1, 10, 0, 0)
+    # Editor at 0 s, then a 10 s cadence in the browser, then a 2-minute back-off and a pause
+    for offset, window in ((0, "Editor"), (30, "Browser"), (40, "Browser"), (160, "Editor"), (1000, "Editor")):
+        log.append(start + datetime.timedelta(seconds=offset), "text", window)
+    cycle = summary_digest.summarize_cycle("Essay", 1500, log.view(0), max_gap=120)
+    assert cycle.focus == {"Editor": 30 + 120 + 120, "Browser": 10 + 120}
+    assert cycle.captures == {"Editor": 3, "Browser": 2}
+
+
+def test_single_capture_counts_for_at_most_the_cycle():
+    log = ActivityLog()
+    log.append(datetime.datetime(2026, 1, 1, 10, 0, 0), "text", "Editor")
+    assert summary_digest.summarize_cycle("Essay", 45, log.view(0)).focus == {"Editor": 45}
+
+
+class StubTokenizer:
+    """GPT-2-like: one id per word, and no pad token."""
+
+    pad_token = None
+    eos_token_id = 50256
+
+    def __call__(self, text):
+        return {"input_ids": list(range(len(text.split())))}
+
+    def pad(self, *args, **kwargs):
+        raise ValueError("Asking to pad but the tokenizer does not have a padding token.")
+
+
+class StubStreamer:
+    def __init__(self, tokenizer, **kwargs):
+        self.chunks = []
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+
+class StubGenerator:
+    def __init__(self):
+        self.tokenizer = StubTokenizer()
+        self.model = self
+        self.inputs = None
+
+    def generate(self, input_ids, attention_mask, streamer, **kwargs):
+        self.inputs = (input_ids, attention_mask)
+        streamer.chunks.append("Focused session.")
+
+
+def stream_with_stubs(monkeypatch, prompt):
+    torch = types.SimpleNamespace(tensor=lambda rows: rows, ones_like=lambda rows: [[1] * len(rows[0])])
+    monkeypatch.setitem(sys.modules, "torch", torch)
+    monkeypatch.setitem(sys.modules, "transformers", types.SimpleNamespace(TextIteratorStreamer=StubStreamer))
+    generator = StubGenerator()
+    monkeypatch.setattr(model_registry, "_backends", {"gpt2": generator})
+    stream = summary_digest.SummaryStream(prompt).start()
+    stream.thread.join(5)
+    text, finished = stream.poll()
+    return generator, stream, text, finished
+
+
+def test_stream_generates_with_a_tokenizer_without_pad_token(monkeypatch):
+    generator, stream, text, finished = stream_with_stubs(monkeypatch, "Summarize this." + summary_digest.INSTRUCTION)
+    assert stream.error is None
+    assert finished and text == "Focused session."
+    input_ids, attention_mask = generator.inputs
+    assert attention_mask == [[1] * len(input_ids[0])]
+
+
+def test_long_prompts_keep_the_instruction(monkeypatch):
+    prompt = "word " * 5000 + summary_digest.INSTRUCTION
+    generator, stream, _, _ = stream_with_stubs(monkeypatch, prompt)
+    input_ids = generator.inputs[0][0]
+    tail = len(summary_digest.INSTRUCTION.split())
+    assert len(input_ids) == summary_digest.CONTEXT_TOKENS - summary_digest.NEW_TOKENS
+    assert input_ids[-tail:] == list(range(5000, 5000 + tail))
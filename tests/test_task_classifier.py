@@ -0,0 +1,37 @@
+import model_registry
+import task_classifier
+
+
+def test_table_resolves_context_dependent_forms():
+    table = task_classifier.load_lemma_table()
+    assert task_classifier.classify_with_table("reading chapter 3", table) == "Learning"
+    assert task_classifier.classify_with_table("draft reading list", table) == task_classifier.DEFAULT_TYPE
+    assert task_classifier.classify_with_table("reading list", table) == task_classifier.DEFAULT_TYPE
+    assert task_classifier.classify_with_table("create building permit", table) == "Creative"
+
+
+def test_fast_mode_never_loads_spacy(monkeypatch):
+    def no_spacy():
+        raise AssertionError("fast mode loaded spaCy")
+
+    monkeypatch.setitem(model_registry._loaders, "spacy", no_spacy)
+    task_classifier.clear_cache()
+    names = ["Reading chapter 3", "Draft reading list", "Studying for the exam", "Pay rent"]
+    assert task_classifier.classify_task_types(names, fast=True) == [
+        "Learning", task_classifier.DEFAULT_TYPE, "Learning", task_classifier.DEFAULT_TYPE]
+
+
+def test_failed_spacy_load_is_not_retried(monkeypatch, capsys):
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise OSError("no model")
+
+    monkeypatch.setitem(model_registry._loaders, "spacy", broken)
+    monkeypatch.setattr(task_classifier, "_load_errors", {})
+    task_classifier.clear_cache()
+    for name in ("Essay", "Taxes", "Essay"):
+        assert task_classifier.classify_task_types([name], fast=False) == [task_classifier.DEFAULT_TYPE]
+    assert len(calls) == 1
+    assert capsys.readouterr().out.count("Could not load 'spacy'") == 1
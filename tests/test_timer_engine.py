@@ -0,0 +1,132 @@
+import heapq
+import itertools
+
+import pytest
+
+from timer_engine import DeadlineTimer
+
+
+class FakeTk:
+    """Tk's `after` scheduling on a virtual clock; `lag` makes every callback run that much late."""
+
+    def __init__(self, lag=0.0):
+        self.now = 0.0
+        self.lag = lag
+        self.queue = []
+        self.ids = itertools.count()
+        self.cancelled = set()
+
+    def clock(self):
+        return self.now
+
+    def after(self, ms, callback):
+        after_id = next(self.ids)
+        heapq.heappush(self.queue, (self.now + ms / 1000, after_id, callback))
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.cancelled.add(after_id)
+
+    def pending(self):
+        return [entry for entry in self.queue if entry[1] not in self.cancelled]
+
+    def run(self, until=float("inf")):
+        """Runs callbacks in due order up to the virtual time `until`, then moves the clock there."""
+        while self.queue and self.queue[0][0] <= until:
+            due, after_id, callback = heapq.heappop(self.queue)
+            if after_id in self.cancelled:
+                continue
+            self.now = max(self.now, due + self.lag)
+            callback()
+        if until != float("inf"):
+            self.now = max(self.now, until)
+
+
+def make_timer(tk):
+    ticks, expired = [], []
+    timer = DeadlineTimer(tk, ticks.append, lambda: expired.append(tk.now), clock=tk.clock)
+    return timer, ticks, expired
+
+
+def test_ticks_once_per_shown_second_and_expires_at_the_deadline():
+    tk = FakeTk()
+    timer, ticks, expired = make_timer(tk)
+    timer.start(5)
+    tk.run()
+    assert ticks == [5, 4, 3, 2, 1, 0]
+    assert expired == [pytest.approx(5.0, abs=0.002)]
+    assert not timer.running and timer.remaining() == 0.0
+
+
+def test_fractional_start_shows_the_rounded_up_second():
+    tk = FakeTk()
+    timer, ticks, expired = make_timer(tk)
+    timer.start(2.5)
+    tk.run(until=0.4)
+    assert ticks == [3]
+    tk.run()
+    assert ticks == [3, 2, 1, 0] and expired == [pytest.approx(2.5, abs=0.002)]
+
+
+def test_late_callbacks_skip_seconds_but_never_fall_behind():
+    tk = FakeTk(lag=1.7)  # A busy event loop runs every callback 1.7 s late
+    timer, ticks, expired = make_timer(tk)
+    timer.start(10)
+    tk.run()
+    assert ticks[0] == 10 and ticks[-1] == 0
+    assert ticks == sorted(set(ticks), reverse=True)  # Never the same second twice
+    assert len(ticks) < 11
+    # Expiry is late by at most one lag, not by one lag per tick
+    assert 10.0 <= expired[0] <= 10.0 + 1.7 + 0.002
+
+
+def test_pause_freezes_the_remaining_time():
+    tk = FakeTk()
+    timer, ticks, expired = make_timer(tk)
+    timer.start(10)
+    tk.run(until=3.2)
+    timer.pause()
+    assert timer.paused and not timer.running and not tk.pending()
+    assert timer.remaining() == pytest.approx(6.8)
+    tk.now += 100
+    assert timer.remaining() == pytest.approx(6.8)
+
+    ticks.clear()
+    timer.resume()
+    assert timer.running and not timer.paused
+    tk.run()
+    assert ticks == [6, 5, 4, 3, 2, 1, 0]  # 7 was already shown before the pause
+    assert expired == [pytest.approx(110.0, abs=0.002)]
+
+
+def test_pause_and_resume_are_idempotent():
+    tk = FakeTk()
+    timer, _, expired = make_timer(tk)
+    timer.resume()  # Not paused: nothing to do
+    assert not timer.running
+    timer.start(3)
+    timer.pause()
+    timer.pause()
+    tk.now = 50
+    timer.resume()
+    timer.resume()
+    assert len(tk.pending()) == 1
+    tk.run()
+    assert expired == [pytest.approx(53.0, abs=0.002)]
+
+
+def test_cancel_and_restart():
+    tk = FakeTk()
+    timer, ticks, expired = make_timer(tk)
+    timer.start(5)
+    tk.run(until=2.5)
+    timer.cancel()
+    assert not tk.pending() and timer.remaining() == 0.0
+    tk.run()
+    assert expired == []
+
+    ticks.clear()
+    timer.start(2)
+    tk.run()
+    assert ticks == [2, 1, 0]  # The restarted countdown shows its first second again
+    assert expired == [pytest.approx(4.5, abs=0.002)]
@@ -0,0 +1,100 @@
+import asyncio
+import random
+import time
+
+import timer_wheel
+
+
+def test_timers_fire_in_deadline_order_and_never_early():
+    wheel = timer_wheel.TimerWheel(now=100.0)
+    fired = []
+    for deadline in (100.35, 100.1, 100.2):
+        wheel.schedule(deadline, lambda deadline=deadline: fired.append(deadline))
+    assert wheel.advance(100.15) and len(wheel) == 2
+    for timer in wheel.advance(101.0):
+        timer.callback()
+    assert fired == [100.2, 100.35]
+    assert len(wheel) == 0
+
+
+def test_cancelled_timer_never_fires():
+    wheel = timer_wheel.TimerWheel()
+    timer = wheel.schedule(1.0, lambda: None)
+    keep = wheel.schedule(2.0, lambda: None)
+    wheel.cancel(timer)
+    wheel.cancel(timer)  # A second cancel is a no-op
+    assert not timer.active and len(wheel) == 1
+    assert wheel.advance(5.0) == [keep]
+
+
+def test_far_timers_cascade_down_to_their_tick():
+    wheel = timer_wheel.TimerWheel()
+    deadlines = [30.0, 1000.0, 86400.0, 3e6, 1e7]  # Level 0 up to beyond the wheel's span
+    timers = {wheel.schedule(deadline, None): deadline for deadline in deadlines}
+    for deadline in deadlines:
+        assert wheel.advance(deadline - 0.2) == []
+        due = wheel.advance(deadline)
+        assert [timers[timer] for timer in due] == [deadline]
+
+
+def test_past_deadline_fires_on_the_next_tick():
+    wheel = timer_wheel.TimerWheel()
+    wheel.advance(10.0)
+    timer = wheel.schedule(3.0, None)
+    assert wheel.next_deadline() == wheel.time_of(timer.tick)
+    assert wheel.advance(10.1) == [timer]
+
+
+def test_long_advance_jumps_over_idle_ticks():
+    wheel = timer_wheel.TimerWheel()
+    timer = wheel.schedule(5.2e5, None)
+    start = time.perf_counter()
+    assert wheel.advance(5.2e5 + 1) == [timer]
+    assert time.perf_counter() - start < 0.1  # Stepping every 0.1 s tick would take about a second
+
+
+def test_matches_a_naive_scheduler():
+    rng = random.Random(0)
+    wheel = timer_wheel.TimerWheel()
+    pending = {}  # Timer -> deadline
+    now = 0.0
+    for _ in range(3000):
+        action = rng.random()
+        if action < 0.5:
+            deadline = now + rng.choice((rng.uniform(0, 30), rng.uniform(0, 3000), rng.uniform(0, 3e5)))
+            pending[wheel.schedule(deadline, None)] = deadline
+        elif action < 0.6 and pending:
+            timer = rng.choice(list(pending))
+            wheel.cancel(timer)
+            del pending[timer]
+        else:
+            now += rng.choice((0.05, 1.0, 60.0, 5000.0))
+            due = wheel.advance(now)
+            expected = {timer for timer in pending if wheel.time_of(timer.tick) <= now + 1e-9}
+            assert set(due) == expected
+            assert all(pending[timer] <= now + 1e-9 for timer in due)
+            for timer in due:
+                del pending[timer]
+        assert len(wheel) == len(pending)
+        if pending:
+            assert wheel.next_deadline() == wheel.time_of(min(timer.tick for timer in pending))
+
+
+def test_scheduler_runs_callbacks_on_the_event_loop():
+    async def main():
+        scheduler = timer_wheel.Scheduler()
+        scheduler.start()
+        done = asyncio.Event()
+        fired = []
+        start = scheduler.time()
+        scheduler.call_at(start + 0.3, lambda: (fired.append("late"), done.set()))
+        cancelled = scheduler.call_at(start + 0.2, lambda: fired.append("cancelled"))
+        scheduler.call_at(start + 0.1, lambda: fired.append("early"))
+        scheduler.cancel(cancelled)
+        await asyncio.wait_for(done.wait(), 5)
+        scheduler.stop()
+        return fired, scheduler.time() - start
+
+    fired, elapsed = asyncio.run(main())
+    assert fired == ["early", "late"]
+    assert elapsed >= 0.3
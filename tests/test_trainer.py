@@ -0,0 +1,41 @@
+import multiprocessing
+
+import trainer
+
+
+def gated_job(gate, runs):
+    """Records that it ran, then blocks until the test opens the gate."""
+    runs.append(1)
+    gate.wait()
+    return len(runs)
+
+
+def test_requests_while_training_coalesce_into_one_more_run():
+    published = []
+    with multiprocessing.Manager() as manager:
+        gate, runs = manager.Event(), manager.list()
+        background = trainer.BackgroundTrainer(gated_job, published.append, gate, runs)
+        try:
+            for _ in range(5):
+                background.request()
+            assert not background.idle.is_set() and background.pending
+            gate.set()
+            assert background.idle.wait(60)
+            assert published == [1, 2]
+            assert len(runs) == 2
+            assert not background.running and not background.pending
+        finally:
+            background.shutdown()
+
+
+def test_failed_job_still_runs_the_pending_request(capsys):
+    published = []
+    background = trainer.BackgroundTrainer(int, published.append, "not a number")
+    try:
+        background.request()
+        background.request()  # Either queued behind the first run or started after it
+        assert background.idle.wait(60)
+        assert published == []
+        assert capsys.readouterr().out.count("Background training failed") == 2
+    finally:
+        background.shutdown()
@@ -0,0 +1,102 @@
+import pytest
+
+import window_sampler
+
+SCRIPT = [(10, "editor", "essay.txt"), (5, "browser", "Search"), (20, "editor", "essay.txt"),
+          (8, "editor", "notes.txt")]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_sampler(script=SCRIPT):
+    clock = FakeClock()
+    provider = window_sampler.FakeWindowProvider(script, clock=clock)
+    return window_sampler.WindowSampler(provider, clock=clock), clock
+
+
+def poll(sampler, clock, until, step=0.5):
+    while clock.now < until:
+        sampler.sample()
+        clock.now += step
+
+
+def test_focus_intervals_per_app_and_title():
+    sampler, clock = make_sampler()
+    poll(sampler, clock, 1050)
+    assert sampler.focus() == [("editor", 45.0), ("browser", 5.0)]
+    assert sampler.focus(by="title") == [("essay.txt", 30.0), ("notes.txt", 15.0), ("Search", 5.0)]
+    assert sampler.focus(since=1012) == [("editor", 35.0), ("browser", 3.0)]
+    assert sampler.stats() == {"polls": 100, "switches": 4, "apps": 2, "windows_ocrd": 0}
+
+
+def test_stop_closes_the_open_interval():
+    sampler, clock = make_sampler([(60, "editor", "essay.txt")])
+    poll(sampler, clock, 1010)
+    sampler.stop()
+    clock.now += 500  # Time away isn't counted
+    assert sampler.focus() == [("editor", 10.0)]
+    assert sampler.current is None
+
+
+def test_unknown_window_counts_as_no_focus():
+    class FlakyProvider:
+        def __init__(self):
+            self.windows = iter([window_sampler.WindowInfo("editor", "a", 1), None, RuntimeError("gone"),
+                                 window_sampler.WindowInfo("editor", "a", 1)])
+
+        def active_window(self):
+            window = next(self.windows)
+            if isinstance(window, Exception):
+                raise window
+            return window
+
+    clock = FakeClock()
+    sampler = window_sampler.WindowSampler(FlakyProvider(), clock=clock)
+    for _ in range(4):
+        sampler.sample()
+        clock.now += 1
+    assert sampler.focus() == [("editor", 2.0)]  # One second before the gap and one after it
+
+
+def test_needs_ocr_until_the_window_is_marked():
+    sampler, clock = make_sampler()
+    sampler.sample()
+    assert sampler.needs_ocr()
+    sampler.mark_ocr()
+    assert not sampler.needs_ocr()
+    clock.now += 12
+    sampler.sample()  # browser
+    assert sampler.needs_ocr()
+    sampler.mark_ocr()
+    clock.now += 5
+    sampler.sample()  # Back to the editor's essay.txt, read 17 s ago
+    assert not sampler.needs_ocr()
+    assert not sampler.needs_ocr(refresh=30)
+    assert sampler.needs_ocr(refresh=15)
+    assert sampler.stats()["windows_ocrd"] == 2
+
+
+def test_without_a_provider_nothing_is_tracked_and_ocr_always_runs():
+    sampler = window_sampler.WindowSampler(None)
+    assert not sampler.available
+    assert sampler.sample() is None
+    sampler.mark_ocr()
+    assert sampler.needs_ocr()
+    sampler.start()
+    assert sampler.thread is None
+    assert sampler.focus() == []
+
+
+@pytest.mark.parametrize("elapsed, title", [(0, "essay.txt"), (9.9, "essay.txt"), (10, "Search"),
+                                            (35, "notes.txt"), (500, "notes.txt")])
+def test_fake_provider_follows_its_script(elapsed, title):
+    clock = FakeClock()
+    provider = window_sampler.FakeWindowProvider(SCRIPT, clock=clock)
+    clock.now += elapsed
+    assert provider.active_window().title == title
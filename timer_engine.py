@@ -0,0 +1,86 @@
+import math
+import time
+
+
+class DeadlineTimer:
+    """Countdown driven by a time.monotonic() deadline on a Tk-style `after` scheduler.
+
+    Remaining time is always computed from the deadline, so a busy event loop can delay a redraw but
+    never makes the countdown fall behind wall time. on_tick(seconds) is called only when the whole
+    number of seconds shown changes, and on_expire() once the deadline passes.
+    """
+
+    def __init__(self, root, on_tick, on_expire, clock=time.monotonic):
+        self.root = root
+        self.on_tick = on_tick
+        self.on_expire = on_expire
+        self.clock = clock
+        self.deadline = None
+        self.paused_remaining = None
+        self.shown = None
+        self.after_id = None
+
+    def start(self, seconds):
+        self.cancel()
+        self.deadline = self.clock() + seconds
+        self.paused_remaining = None
+        self.shown = None
+        self._tick()
+
+    def remaining(self):
+        """Seconds left (float), frozen while paused."""
+        if self.paused_remaining is not None:
+            return self.paused_remaining
+        if self.deadline is None:
+            return 0.0
+        return max(0.0, self.deadline - self.clock())
+
+    @property
+    def paused(self):
+        return self.paused_remaining is not None
+
+    @property
+    def running(self):
+        return self.after_id is not None
+
+    def pause(self):
+        if self.deadline is None or self.paused:
+            return
+        self.paused_remaining = self.remaining()
+        self._cancel_callback()
+
+    def resume(self):
+        if not self.paused:
+            return
+        self.deadline = self.clock() + self.paused_remaining
+        self.paused_remaining = None
+        self._tick()
+
+    def cancel(self):
+        self._cancel_callback()
+        self.deadline = None
+        self.paused_remaining = None
+
+    def _cancel_callback(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def _tick(self):
+        self.after_id = None
+        remaining = self.remaining()
+        if remaining <= 0:
+            self.deadline = None
+            if self.shown != 0:
+                self.shown = 0
+                self.on_tick(0)
+            self.on_expire()
+            return
+
+        shown = math.ceil(remaining)
+        if shown != self.shown:
+            self.shown = shown
+            self.on_tick(shown)
+        # Wake just after the displayed second rolls over (or the deadline passes)
+        delay_ms = int((remaining - (shown - 1)) * 1000) + 1
+        self.after_id = self.root.after(max(1, delay_ms), self._tick)
@@ -0,0 +1,240 @@
+import asyncio
+import math
+
+# Tick length in seconds; deadlines fire at most this late and never early
+RESOLUTION = 0.1
+
+# Slots per level: 256 ticks at level 0, then 64 coarser slots per level (about 77 days at 0.1 s ticks)
+LEVEL_BITS = (8, 6, 6, 6)
+
+
+class Timer:
+    """Handle for one scheduled callback; pass it to TimerWheel.cancel()."""
+
+    __slots__ = ("deadline", "tick", "callback", "bucket")
+
+    def __init__(self, deadline, tick, callback):
+        self.deadline = deadline
+        self.tick = tick
+        self.callback = callback
+        self.bucket = None
+
+    @property
+    def active(self):
+        return self.bucket is not None
+
+
+class TimerWheel:
+    """Hierarchical timing wheel: O(1) insert and cancel; advance() only stops at ticks that have timers
+    due or an occupied slot to cascade, however far it moves.
+
+    Level 0 holds timers due within 256 ticks, one slot per tick. Each higher level has 64 slots,
+    each as wide as the whole level below; its timers are cascaded down when the wheel reaches their
+    slot. next_deadline() gives the earliest pending deadline, so a caller can sleep until then.
+    """
+
+    def __init__(self, now=0.0, resolution=RESOLUTION, level_bits=LEVEL_BITS):
+        self.origin = now
+        self.resolution = resolution
+        self.shifts = []
+        self.masks = []
+        shift = 0
+        for bits in level_bits:
+            self.shifts.append(shift)
+            self.masks.append((1 << bits) - 1)
+            shift += bits
+        self.span = 1 << shift  # Ticks covered by the whole wheel
+        self.levels = [[set() for _ in range(mask + 1)] for mask in self.masks]
+        self.current = 0  # Last tick processed
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _tick_at(self, when):
+        return (when - self.origin) / self.resolution
+
+    def time_of(self, tick):
+        return self.origin + tick * self.resolution
+
+    def schedule(self, deadline, callback):
+        """Runs callback() on the first advance() at or after `deadline`; returns its Timer."""
+        tick = max(self.current + 1, math.ceil(self._tick_at(deadline)))
+        timer = Timer(deadline, tick, callback)
+        self._place(timer)
+        self.count += 1
+        return timer
+
+    def _place(self, timer):
+        delta = timer.tick - self.current
+        tick = timer.tick if delta < self.span else self.current + self.span - 1
+        for level, shift in enumerate(self.shifts):
+            if delta < (self.masks[level] + 1) << shift or level == len(self.shifts) - 1:
+                bucket = self.levels[level][(tick >> shift) & self.masks[level]]
+                break
+        bucket.add(timer)
+        timer.bucket = bucket
+
+    def cancel(self, timer):
+        if timer.bucket is not None:
+            timer.bucket.discard(timer)
+            timer.bucket = None
+            self.count -= 1
+
+    def advance(self, now):
+        """Moves the wheel up to `now` and returns the timers that came due, in deadline order."""
+        target = math.floor(self._tick_at(now) + 1e-9)  # Don't lose a tick to float rounding
+        if target <= self.current:
+            return []
+        if not self.count:
+            self.current = target
+            return []
+
+        due = []
+        level0 = self.levels[0]
+        mask0 = self.masks[0]
+        while self.count:
+            # Jump straight to the next tick with a timer due or a non-empty slot to cascade; the
+            # cascades skipped on the way would only have found empty slots
+            tick = self._next_event()
+            if tick > target:
+                break
+            self.current = tick
+            index = tick & mask0
+            if index == 0:
+                self._cascade(1)
+            bucket = level0[index]
+            if bucket:
+                for timer in bucket:
+                    timer.bucket = None
+                self.count -= len(bucket)
+                due.extend(bucket)
+                bucket.clear()
+        self.current = target
+        due.sort(key=lambda timer: timer.deadline)
+        return due
+
+    def _next_event(self):
+        """First tick after the current one with an occupied level-0 slot or an occupied higher slot starting."""
+        best = None
+        level0 = self.levels[0]
+        mask0 = self.masks[0]
+        for offset in range(1, mask0 + 2):
+            if level0[(self.current + offset) & mask0]:
+                best = self.current + offset
+                break
+        for level in range(1, len(self.levels)):
+            shift, mask = self.shifts[level], self.masks[level]
+            slots = self.levels[level]
+            for offset in range(1, mask + 2):
+                start = ((self.current >> shift) + offset) << shift
+                if best is not None and start >= best:
+                    break
+                if slots[(start >> shift) & mask]:
+                    best = start
+                    break
+        return best
+
+    def _cascade(self, level):
+        """Re-places the timers of the level-`level` slot the wheel just entered."""
+        if level >= len(self.levels):
+            return
+        index = (self.current >> self.shifts[level]) & self.masks[level]
+        if index == 0:
+            self._cascade(level + 1)
+        bucket = self.levels[level][index]
+        if bucket:
+            timers = list(bucket)
+            bucket.clear()
+            for timer in timers:
+                self._place(timer)
+
+    def next_deadline(self):
+        """Time the earliest pending timer is due (rounded up to its tick), or None if there are none."""
+        if not self.count:
+            return None
+        best = None
+        level0 = self.levels[0]
+        mask0 = self.masks[0]
+        for offset in range(1, mask0 + 2):
+            if level0[(self.current + offset) & mask0]:
+                best = self.current + offset
+                break
+        for level in range(1, len(self.levels)):
+            shift, mask = self.shifts[level], self.masks[level]
+            # Timers on this level can't be due before its next slot starts
+            if best is not None and best <= ((self.current >> shift) + 1) << shift:
+                break
+            slots = self.levels[level]
+            for offset in range(1, mask + 2):
+                start = ((self.current >> shift) + offset) << shift
+                bucket = slots[(start >> shift) & mask]
+                if bucket:
+                    # Timers beyond the wheel's span wait in a slot they aren't due in; wake to re-place them
+                    tick = min(timer.tick for timer in bucket)
+                    if tick >= start + (1 << shift):
+                        tick = start
+                    best = tick if best is None else min(best, tick)
+                    break
+        return None if best is None else self.time_of(best)
+
+
+class Scheduler:
+    """One timer loop for every session: a timing wheel of monotonic deadlines served by a single asyncio task.
+
+    The task sleeps until the earliest deadline, so idle sessions cost nothing between phase changes.
+    """
+
+    def __init__(self):
+        self.wheel = None
+        self.wakeup = None
+        self.sleep_until = None  # When the loop will next wake on its own
+        self.task = None
+        self.fired = 0
+        self.wakeups = 0
+
+    def start(self):
+        self.wheel = TimerWheel(self.time())
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def time(self):
+        return asyncio.get_running_loop().time()
+
+    def call_at(self, deadline, callback):
+        """Runs callback() once loop.time() passes `deadline`; returns a handle for cancel()."""
+        timer = self.wheel.schedule(deadline, callback)
+        due = self.wheel.time_of(timer.tick)
+        if self.sleep_until is None or due < self.sleep_until:
+            # The loop would sleep past this deadline; wake it to recompute the timeout
+            self.sleep_until = due
+            self.wakeup.set()
+        return timer
+
+    def cancel(self, timer):
+        self.wheel.cancel(timer)
+
+    def __len__(self):
+        return len(self.wheel)
+
+    async def _run(self):
+        while True:
+            self.wakeups += 1
+            for timer in self.wheel.advance(self.time()):
+                self.fired += 1
+                try:
+                    timer.callback()
+                except Exception as e:
+                    print(f"Timer callback failed: {e}")
+            self.wakeup.clear()
+            self.sleep_until = self.wheel.next_deadline()
+            timeout = None if self.sleep_until is None else max(0.0, self.sleep_until - self.time())
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,185 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import model_registry
+import recommender
+import session_store
+
+# The main.py duration recommender, published as recommender.vN.npz
+RECOMMENDER_PREFIX = "recommender"
+RECOMMENDER_CURSOR_KEY = "recommender_cursor"
+
+# Keras checkpoints written by earlier versions of main.py; converted once into the first published version
+LEGACY_RECOMMENDER_WEIGHTS = ("trained_model_weights.weights.h5", "trained_model_weights.h5")
+
+# Input encoding for the task-type recommender used by scratch_1.py
+TYPE_CODES = {"Learning": 0, "Creative": 1, "Administrative": 2}
+TYPE_MODEL_PREFIX = "type_recommender"
+TYPE_LAYER_SIZES = (1, 64, 32, 1)
+
+# Don't publish a model trained on fewer logged sessions than this
+MIN_EXAMPLES = 5
+
+
+def build_keras_model(layer_sizes):
+    """Dense/ReLU regressor with a linear output, matching the NumPy inference path."""
+    tf = model_registry.get("tensorflow")
+    layers = [tf.keras.layers.Dense(layer_sizes[1], activation='relu', input_shape=(layer_sizes[0],))]
+    for size in layer_sizes[2:-1]:
+        layers.append(tf.keras.layers.Dense(size, activation='relu'))
+    layers.append(tf.keras.layers.Dense(layer_sizes[-1], activation='linear'))
+    model = tf.keras.Sequential(layers)
+    model.compile(optimizer='adam', loss='mse')
+    return model
+
+
+def train_type_model(db_path=session_store.DB_PATH, prefix=TYPE_MODEL_PREFIX, epochs=50):
+    """Fits the task-type model on logged durations and publishes it; runs in a worker process."""
+    store = session_store.SessionStore(db_path)
+    rows = [(task_type, duration) for task_type, duration in store.durations_by_type() if task_type in TYPE_CODES]
+    store.close()
+    if len(rows) < MIN_EXAMPLES:
+        return None
+
+    X = np.array([[TYPE_CODES[task_type]] for task_type, _ in rows], dtype=np.float32)
+    y = np.array([duration / 60 for _, duration in rows], dtype=np.float32)  # Train in minutes
+
+    model = build_keras_model(TYPE_LAYER_SIZES)
+    model.fit(X, y, epochs=epochs, batch_size=32, verbose=0)
+    return recommender.publish(recommender.NumpyRecommender.from_keras(model), prefix)
+
+
+def load_current_recommender(prefix=RECOMMENDER_PREFIX):
+    return recommender.load_recommender(prefix, LEGACY_RECOMMENDER_WEIGHTS,
+                                        lambda: build_keras_model(recommender.LAYER_SIZES))
+
+
+def task_features(task):
+    """Model inputs for a task row from the session store, in hours like the original training data."""
+    return [task["study_time"] / 60, task["break_time"] / 60, task["long_break_time"] / 60]
+
+
+def recommend_minutes(store, model, task_names):
+    """Recommended minutes per task with one batched forward pass; tasks without data are skipped."""
+    names, features = [], []
+    for task_name in task_names:
+        task = store.get_task(task_name)
+        if task and task["study_time"] is not None:
+            features.append(task_features(task))
+            names.append(task_name)
+    if not names:
+        return {}
+
+    # Model prediction and scaling to get output in minutes
+    predictions = model.predict(np.array(features)) * 60
+
+    # Ensure the recommended time is reasonable (e.g., at least 1 minute)
+    return {name: max(1, int(minutes)) for name, minutes in zip(names, predictions)}
+
+
+def train_recommender_increment(db_path=session_store.DB_PATH, prefix=RECOMMENDER_PREFIX, epochs=5,
+                                batch_size=32):
+    """Warm-starts the recommender from its published weights and fits only sessions logged since the cursor."""
+    store = session_store.SessionStore(db_path)
+    try:
+        cursor = int(store.get_meta(RECOMMENDER_CURSOR_KEY, 0))
+        new_sessions = store.sessions_since(cursor)
+        if not new_sessions:
+            return None
+
+        X, y, tasks = [], [], {}
+        for session_id, task_name, status, duration, logged_at in new_sessions:
+            if status != "completed":
+                continue
+            if task_name not in tasks:
+                tasks[task_name] = store.get_task(task_name)
+            task = tasks[task_name]
+            if task and task["study_time"] is not None:
+                X.append(task_features(task))
+                y.append(duration / 60)  # Target output (scaled)
+
+        version = None
+        if X:
+            model = build_keras_model(recommender.LAYER_SIZES)
+            current = load_current_recommender(prefix)
+            model.set_weights(current.weights)
+            model.fit(np.array(X, dtype=np.float32), np.array(y, dtype=np.float32), epochs=epochs,
+                      batch_size=batch_size, shuffle=True, verbose=0)
+            version = recommender.publish(recommender.NumpyRecommender.from_keras(model), prefix)
+
+        # Advance the cursor only after publishing, so a crash retrains the same slice
+        store.set_meta(RECOMMENDER_CURSOR_KEY, new_sessions[-1][0])
+        return version
+    finally:
+        store.close()
+
+
+class BackgroundTrainer:
+    """Runs one training job at a time in a worker process; requests made while busy are coalesced.
+
+    request() comes from the UI thread and _finished() from the executor's callback thread, so the
+    job state is guarded by a lock.
+    """
+
+    def __init__(self, train_fn, on_published, *args):
+        self.train_fn = train_fn
+        self.on_published = on_published
+        self.args = args
+        self.executor = None
+        self.future = None
+        self.pending = False
+        self.running = False
+        self.closed = False
+        self.lock = threading.Lock()
+        self.idle = threading.Event()  # Set while no job is running or pending
+        self.idle.set()
+
+    def request(self):
+        with self.lock:
+            if self.running:
+                self.pending = True  # Retrain once more with whatever arrives meanwhile
+                return
+            future = self._submit()
+        if future is not None:
+            future.add_done_callback(self._finished)
+
+    def _submit(self):
+        # Called with the lock held; the caller adds the done callback once it's released, since an
+        # already finished future runs it straight away
+        if self.closed:
+            return None
+        if self.executor is None:
+            # Spawned, not forked: the caller is a threaded Tk process, and a forked child could inherit a
+            # lock some other thread held at the time
+            self.executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        self.pending = False
+        self.running = True
+        self.idle.clear()
+        self.future = self.executor.submit(self.train_fn, *self.args)
+        return self.future
+
+    def _finished(self, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Background training failed: {e}")
+            result = None
+        if result is not None:
+            self.on_published(result)
+        with self.lock:
+            self.running = False
+            future = self._submit() if self.pending else None
+            if future is None:
+                self.idle.set()
+        if future is not None:
+            future.add_done_callback(self._finished)
+
+    def shutdown(self):
+        with self.lock:
+            self.closed = True
+            executor = self.executor
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
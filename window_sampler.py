@@ -0,0 +1,240 @@
+"""Cheap foreground-window tracking: which application and window title has focus, and for how long.
+
+A WindowSampler polls a provider a couple of times a second. Each poll costs a window-system query
+instead of a screenshot and an OCR pass, so focus intervals are exact to the poll interval, and OCR
+is only needed when the foreground window shows something it hasn't OCR'd yet.
+"""
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+WindowInfo = namedtuple("WindowInfo", ["app", "title", "pid"])
+FocusInterval = namedtuple("FocusInterval", ["app", "title", "start", "end"])
+
+# Seconds between polls of the foreground window
+POLL_INTERVAL = 0.5
+# Closed focus intervals kept for reports
+MAX_INTERVALS = 10000
+
+_pid_names = {}
+
+
+def process_name(pid):
+    """Executable name of a process, via psutil when available; cached per pid."""
+    if pid is None:
+        return None
+    if pid not in _pid_names:
+        try:
+            import psutil
+            name = psutil.Process(pid).name()
+        except ImportError:
+            try:
+                with open(f"/proc/{pid}/comm") as file:
+                    name = file.read().strip()
+            except OSError:
+                name = None
+        except Exception:  # psutil.Error: the process is gone or not ours to inspect
+            name = None
+        if len(_pid_names) > 1000:
+            _pid_names.clear()
+        _pid_names[pid] = name
+    return _pid_names[pid]
+
+
+class X11WindowProvider:
+    """Foreground window from the EWMH properties the window manager publishes, read with xprop."""
+
+    def __init__(self, xprop="xprop"):
+        self.xprop = xprop
+
+    def _query(self, *args):
+        return subprocess.run([self.xprop, *args], capture_output=True, text=True, timeout=1).stdout
+
+    def active_window(self):
+        match = re.search(r"window id # (0x[0-9a-f]+)", self._query("-root", "-notype", "_NET_ACTIVE_WINDOW"))
+        if not match or int(match.group(1), 16) == 0:
+            return None
+        output = self._query("-id", match.group(1), "-notype", "_NET_WM_NAME", "WM_NAME", "_NET_WM_PID")
+        title = re.search(r'^(?:_NET_WM_NAME|WM_NAME) = "(.*)"$', output, re.MULTILINE)
+        pid = re.search(r"^_NET_WM_PID = (\d+)$", output, re.MULTILINE)
+        pid = int(pid.group(1)) if pid else None
+        return WindowInfo(process_name(pid) or "Unknown", title.group(1) if title else "", pid)
+
+
+class Win32WindowProvider:
+    """Foreground window through user32, via ctypes."""
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        self.user32 = ctypes.windll.user32
+        self.pid = wintypes.DWORD()
+
+    def active_window(self):
+        hwnd = self.user32.GetForegroundWindow()
+        if not hwnd:
+            return None
+        length = self.user32.GetWindowTextLengthW(hwnd)
+        buffer = self.ctypes.create_unicode_buffer(length + 1)
+        self.user32.GetWindowTextW(hwnd, buffer, length + 1)
+        self.user32.GetWindowThreadProcessId(hwnd, self.ctypes.byref(self.pid))
+        pid = self.pid.value or None
+        return WindowInfo(process_name(pid) or "Unknown", buffer.value, pid)
+
+
+class FakeWindowProvider:
+    """Replays a script of (seconds, app, title) steps against a clock, for tests and demos.
+
+    Each step holds focus for its duration; after the last one the last window keeps focus.
+    """
+
+    def __init__(self, script, clock=time.time):
+        self.clock = clock
+        self.start = clock()
+        self.steps = []
+        offset = 0.0
+        for pid, (seconds, app, title) in enumerate(script, 1):
+            self.steps.append((offset, WindowInfo(app, title, pid)))
+            offset += seconds
+
+    def active_window(self):
+        elapsed = self.clock() - self.start
+        current = None
+        for offset, window in self.steps:
+            if offset > elapsed:
+                break
+            current = window
+        return current
+
+
+def default_provider():
+    """The platform's provider, or None where the foreground window can't be queried."""
+    if sys.platform == "win32":
+        return Win32WindowProvider()
+    if sys.platform.startswith("linux") and os.environ.get("DISPLAY") and shutil.which("xprop"):
+        return X11WindowProvider()
+    return None
+
+
+class WindowSampler:
+    """Polls a provider on a background thread and keeps focus intervals per application and title.
+
+    Also remembers which (app, title) pairs have been OCR'd, so callers can skip OCR while the
+    foreground window is one they have already read.
+    """
+
+    def __init__(self, provider, interval=POLL_INTERVAL, clock=time.time, max_intervals=MAX_INTERVALS):
+        self.provider = provider
+        self.interval = interval
+        self.clock = clock
+        self.intervals = deque(maxlen=max_intervals)
+        self.current = None  # WindowInfo with focus, or None
+        self.since = None  # When it got focus
+        self.apps_seen = set()
+        self.ocr_done = {}  # (app, title) -> time of its last OCR
+        self.polls = 0
+        self.switches = 0
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+
+    @property
+    def available(self):
+        return self.provider is not None
+
+    def sample(self, now=None):
+        """Polls the provider once; returns the foreground WindowInfo (None if unknown)."""
+        if self.provider is None:
+            return None
+        try:
+            window = self.provider.active_window()
+        except Exception:
+            window = None
+        now = self.clock() if now is None else now
+        with self.lock:
+            self.polls += 1
+            if window is not None and self.current is not None and window[:2] == self.current[:2]:
+                return self.current
+            self._close(now)
+            if window is not None:
+                self.switches += 1
+                self.apps_seen.add(window.app)
+                self.current, self.since = window, now
+            return window
+
+    def _close(self, now):
+        if self.current is not None:
+            self.intervals.append(FocusInterval(self.current.app, self.current.title, self.since, now))
+        self.current, self.since = None, None
+
+    def needs_ocr(self, refresh=None, now=None):
+        """True if the foreground window hasn't been OCR'd yet (or not for `refresh` seconds).
+
+        While the foreground window is unknown (or there's no provider) every capture needs OCR, as before.
+        """
+        with self.lock:
+            if self.current is None:
+                return True
+            last = self.ocr_done.get(self.current[:2])
+        now = self.clock() if now is None else now
+        return last is None or (refresh is not None and now - last >= refresh)
+
+    def mark_ocr(self, now=None):
+        """Records that the current foreground window has just been OCR'd."""
+        with self.lock:
+            if self.current is not None:
+                self.ocr_done[self.current[:2]] = self.clock() if now is None else now
+
+    def focus(self, since=None, by="app", now=None):
+        """Seconds of focus per app (or per title with by="title") from `since` on, longest first."""
+        now = self.clock() if now is None else now
+        with self.lock:
+            intervals = list(self.intervals)
+            if self.current is not None:
+                intervals.append(FocusInterval(self.current.app, self.current.title, self.since, now))
+        totals = {}
+        for interval in intervals:
+            start = interval.start if since is None else max(since, interval.start)
+            if interval.end > start:
+                key = interval.app if by == "app" else interval.title
+                totals[key] = totals.get(key, 0.0) + interval.end - start
+        return sorted(totals.items(), key=lambda item: -item[1])
+
+    def start(self):
+        """Starts polling on a daemon thread; a no-op if already polling or there's no provider."""
+        with self.lock:
+            if self.provider is None or self.thread is not None:
+                return
+            self.wake.clear()
+            self.thread = threading.Thread(target=self._run, name="window-sampler", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stops polling and closes the open focus interval, so time away isn't counted."""
+        with self.lock:
+            thread, self.thread = self.thread, None
+            self.wake.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self.lock:
+            self._close(self.clock())
+
+    def _run(self):
+        while not self.wake.is_set():
+            self.sample()
+            self.wake.wait(self.interval)
+
+    def stats(self):
+        return {"polls": self.polls, "switches": self.switches, "apps": len(self.apps_seen),
+                "windows_ocrd": len(self.ocr_done)}
+
+
+def open_sampler(interval=POLL_INTERVAL):
+    """A WindowSampler on the platform's provider; without one it tracks nothing and never skips OCR."""
+    return WindowSampler(default_provider(), interval)